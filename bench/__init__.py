@@ -0,0 +1,3 @@
+"""
+bench package: local benchmarks and load tools (no AWS/OpenAI account needed).
+"""
@@ -0,0 +1,72 @@
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bench import local_dynamo
+
+# "Is 19:00 on the 24th free?" answered three ways against local DynamoDB:
+# list_tasks (what the model had to do before), check_availability on a cold cache
+# (partition read or date GSI) and on a warm per-tenant SlotIndex.
+#
+#   python -m bench.availability --reservations 500 --days 30
+
+
+def _time(fn, n: int):
+    samples = []
+    out = None
+    for _ in range(n):
+        t = time.perf_counter()
+        out = fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples), out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Availability lookup benchmark")
+    parser.add_argument("--reservations", type=int, default=500)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--endpoint-url", default=None, help="dynamodb-local URL (default: start moto server)")
+    args = parser.parse_args()
+
+    local_dynamo.start(args.endpoint_url)
+    from src import config, tools_impl
+    from src.availability import availability_cache
+    tools_impl.TOOLS_DEBUG = False
+
+    rnd = random.Random(7)
+    base = datetime(2025, 12, 1)
+    for i in range(args.reservations):
+        start = base + timedelta(days=rnd.randrange(args.days), hours=rnd.randrange(11, 21), minutes=rnd.choice((0, 30)))
+        tools_impl.create_task({"name": f"BENCH-{i:05d}", "start_datetime": start.strftime("%Y-%m-%d %H:%M"),
+                                "request": "table for two", "phone_number": "09012345678"})
+    query = {"start_datetime": "2025-12-24 19:00"}
+
+    ms, out = _time(lambda: tools_impl.list_tasks({}), args.repeat)
+    print(f"list_tasks              p50={ms:8.3f}ms rows={len(out.get('items', []))} "
+          f"result={len(json.dumps(out, default=str, ensure_ascii=False))}B")
+
+    for label, index_name in (("partition", ""), ("date GSI", "slot-date-index")):
+        config.AVAILABILITY_INDEX_NAME = index_name
+
+        def _cold():
+            availability_cache.invalidate(config.CLIENT_ID)
+            return tools_impl.check_availability(query)
+
+        ms, out = _time(_cold, args.repeat)
+        rows = availability_cache.stats["rows_read"]
+        availability_cache.stats["rows_read"] = 0
+        print(f"check ({label:<9}) cold p50={ms:8.3f}ms rows/read={rows // args.repeat} "
+              f"result={len(json.dumps(out, ensure_ascii=False))}B {out}")
+
+    ms, out = _time(lambda: tools_impl.check_availability(query), args.repeat * 50)
+    print(f"check (warm index)      p50={ms:8.3f}ms")
+    ms, out = _time(lambda: tools_impl.find_free_slots({"date": "2025-12-24", "after": "17:00"}), args.repeat * 50)
+    print(f"find_free_slots (warm)  p50={ms:8.3f}ms {out}")
+
+
+if __name__ == "__main__":
+    main()
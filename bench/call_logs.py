@@ -0,0 +1,114 @@
+import argparse
+import json
+import logging
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from bench import local_dynamo
+
+# Call-log read path against local DynamoDB: one call by call_sid (GSI vs partition
+# filter) and an NDJSON export of the whole range (time-sliced parallel GSI queries vs one reader),
+# through the same Flask routes operators use.
+#
+# moto evaluates every query in-process by walking the table, so time-sliced parallel
+# reads cannot beat one reader here (and many slices hit the read timeout); against
+# DynamoDB or dynamodb-local (--endpoint-url) the slices overlap their round trips.
+#
+#   python -m bench.call_logs --calls 500 --turns 10
+
+TOKEN = "bench-admin-token"
+
+
+def _seed(calls: int, turns: int, days: int) -> list:
+    from src import config
+    from src.call_transcript import CallTranscript
+    from src.aws_clients import dynamodb_table
+
+    table = dynamodb_table(config.CALL_LOGS_TABLE_NAME)
+    rnd = random.Random(11)
+    base = datetime(2025, 12, 1, tzinfo=timezone.utc)
+    sids = []
+    with table.batch_writer() as batch:
+        for n in range(calls):
+            sid = f"CA{n:032d}"
+            sids.append(sid)
+            phone = f"090{rnd.randrange(10 ** 8):08d}"
+            start = base + timedelta(seconds=rnd.randrange(days * 86400))
+            transcript = CallTranscript(sid, phone_number=phone, client_id=config.CLIENT_ID)
+            for t in range(turns):
+                ts = (start + timedelta(seconds=5 * t)).isoformat(timespec="microseconds")
+                role = "user" if t % 2 else "assistant"
+                text = f"turn {t} of call {n}: " + "予約の確認をお願いします。" * 3
+                transcript.add_turn(role, text)
+                batch.put_item(Item={"client_id": config.CLIENT_ID, "sk": f"{phone}#{ts}", "phone_number": phone,
+                                     "ts": ts, "call_sid": sid, f"{role}_text": text})
+            transcript.started_at = start.timestamp()
+            batch.put_item(Item=transcript.to_item(final=True, summary={"duration_ms": 5000.0 * turns}))
+    return sids
+
+
+def _time(fn, n: int):
+    samples = []
+    out = None
+    for _ in range(n):
+        t = time.perf_counter()
+        out = fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples), out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Call-log query/export benchmark")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--endpoint-url", default=None, help="dynamodb-local URL (default: start moto server)")
+    args = parser.parse_args()
+
+    local_dynamo.start(args.endpoint_url)
+    logging.getLogger("app").setLevel(logging.WARNING)
+    from src import app_modular, config
+    config.ADMIN_API_TOKEN = TOKEN
+    client = app_modular.app.test_client()
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+
+    sids = _seed(args.calls, args.turns, args.days)
+    sid = sids[len(sids) // 2]
+
+    for label, index in (("call_sid GSI", "call-sid-index"), ("partition filter", "")):
+        config.CALL_LOGS_CALL_SID_INDEX = index
+        ms, res = _time(lambda: client.get(f"/admin/calls/{sid}", headers=headers), args.repeat)
+        body = res.get_json()
+        print(f"get call ({label:<16}) p50={ms:8.1f}ms items={len(body['items'])} "
+              f"transcript_turns={len(body.get('transcript', {}).get('turns', []))}")
+    config.CALL_LOGS_CALL_SID_INDEX = "call-sid-index"
+
+    span = "from=2025-12-01&to=%s" % (datetime(2025, 12, 1) + timedelta(days=args.days)).date().isoformat()
+    for label, index, parallelism in (("ts GSI x1", "client-ts-index", 1), ("ts GSI x4", "client-ts-index", 4),
+                                      ("partition filter", "", 1)):
+        config.CALL_LOGS_TS_INDEX = index
+        config.CALL_LOG_QUERY_PARALLELISM = parallelism
+
+        def _export():
+            res = client.get(f"/admin/calls/export?{span}", headers=headers)
+            return sum(1 for line in res.iter_encoded() for _ in line.splitlines()), res
+
+        ms, (lines, _) = _time(_export, max(1, args.repeat // 2))
+        print(f"export  ({label:<16}) p50={ms:8.1f}ms lines={lines} ({lines / ms * 1000:,.0f} items/s)")
+
+    config.CALL_LOGS_TS_INDEX = "client-ts-index"
+    res = client.get(f"/admin/calls?{span}&limit=50", headers=headers).get_json()
+    pages, total = 1, len(res["items"])
+    while res.get("next_cursor"):
+        res = client.get(f"/admin/calls?{span}&limit=50&cursor={res['next_cursor']}", headers=headers).get_json()
+        pages += 1
+        total += len(res["items"])
+    print(f"list    (limit=50 pages) pages={pages} items={total}")
+    print(json.dumps({"denied_without_token": client.get("/admin/calls").status_code}))
+
+
+if __name__ == "__main__":
+    main()
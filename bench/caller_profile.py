@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+from bench import local_dynamo
+
+# Caller profile at webhook time: load latency of the caller's reservations + last call
+# through the caller GSI (independent of the partition size), the instructions a returning
+# caller gets in inject mode, and get_task served from the seeded tool cache instead of DynamoDB.
+#
+#   python -m bench.caller_profile --tasks 2000 --callers 50
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def _seed(client_id: str, tasks: int, callers: int) -> list:
+    from src import tools_impl
+    from src.dynamo_utils import write_call_summary, flush_call_logs
+    from src.tenants import use_tenant
+
+    phones = [f"090{n:08d}" for n in range(callers)]
+    with use_tenant(client_id):
+        for i in range(tasks):
+            # Reservations spread over many numbers; the measured callers have 1-3 each
+            phone = phones[i % callers] if i < callers * 3 else f"080{i:08d}"
+            tools_impl.create_task({"name": f"客{i:05d}", "request": "剪定と草取り", "phone_number": phone,
+                                    "start_datetime": f"2026-11-{1 + i % 28:02d} {10 + i % 8}:00"})
+        for phone in phones:
+            write_call_summary({"outcome": "ok", "duration_ms": 95000}, phone_number=phone, call_sid=f"CA{phone}")
+        flush_call_logs()
+    return phones
+
+
+def _load(client_id: str, phones: list) -> list:
+    from src.caller_profile import load_caller_profile
+
+    spans = []
+    for phone in phones:
+        t = time.perf_counter()
+        profile = load_caller_profile(client_id, "+81" + phone[1:])
+        spans.append((time.perf_counter() - t) * 1000)
+        assert profile is not None and profile.returning, phone
+    return spans
+
+
+async def _seeded_get_task(client_id: str, phone: str) -> dict:
+    from src.caller_profile import load_caller_profile
+    from src.tenants import use_tenant
+    from src.tool_cache import CallToolCache
+
+    profile = load_caller_profile(client_id, phone)
+    out = {}
+    for label, seed in (("cold", False), ("seeded", True)):
+        cache = CallToolCache()
+        if seed:
+            for item in profile.reservations:
+                cache.seed("get_task", {"name": item["name"]}, {"item": item})
+        with use_tenant(client_id):
+            t = time.perf_counter()
+            result = await cache.run("get_task", {"name": profile.reservations[0]["name"]})
+            out[label] = round((time.perf_counter() - t) * 1000, 2)
+        assert "item" in result
+        cache.close()
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Caller profile load benchmark")
+    parser.add_argument("--tasks", type=int, default=2000, help="reservations in the tenant partition")
+    parser.add_argument("--callers", type=int, default=50)
+    parser.add_argument("--endpoint-url", default=None, help="dynamodb-local URL (default: start moto server)")
+    args = parser.parse_args()
+
+    local_dynamo.start(args.endpoint_url)
+    logging.getLogger("app").setLevel(logging.WARNING)
+    from src import config
+    from src.caller_profile import load_caller_profile
+
+    client_id = config.CLIENT_ID
+    phones = _seed(client_id, args.tasks, args.callers)
+    config.CALLER_TASKS_INDEX_NAME = "caller-index"
+    spans = _load(client_id, phones)
+    print(f"profile load (caller GSI) p50={statistics.median(spans):7.1f}ms p90={_pct(spans, 0.9):7.1f}ms "
+          f"({args.tasks} reservations in the partition)")
+    print(load_caller_profile(client_id, phones[0]).instructions())
+    print(json.dumps({"get_task_ms": asyncio.run(_seeded_get_task(client_id, phones[0]))}))
+
+
+if __name__ == "__main__":
+    main()
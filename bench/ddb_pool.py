@@ -0,0 +1,56 @@
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import local_dynamo
+
+# Per-call latency of a reservation lookup: a fresh boto3 resource per call
+# (the old tools_impl._ddb_table) vs the shared pooled handle from aws_clients.
+#
+#   python -m bench.ddb_pool --calls 200 --threads 8
+
+
+def _fresh_table(endpoint_url: str):
+    import boto3
+    from src import config
+    ddb = boto3.resource("dynamodb", region_name=config.AWS_REGION, endpoint_url=endpoint_url)
+    return ddb.Table(config.TASKS_TABLE_NAME)
+
+
+def _run(label: str, lookup, calls: int, threads: int) -> None:
+    def _one(_):
+        t = time.perf_counter()
+        lookup()
+        return (time.perf_counter() - t) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        samples = sorted(ex.map(_one, range(calls)))
+    wall = time.perf_counter() - started
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<8} calls={calls} threads={threads} "
+          f"avg={statistics.mean(samples):7.2f}ms p50={statistics.median(samples):7.2f}ms "
+          f"p99={p99:7.2f}ms throughput={calls / wall:8.1f}/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DynamoDB handle benchmark (fresh resource vs pooled registry)")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--endpoint-url", default=None, help="dynamodb-local URL (default: start moto server)")
+    args = parser.parse_args()
+
+    endpoint_url = local_dynamo.start(args.endpoint_url)
+    from src import config, aws_clients, tools_impl
+    tools_impl.TOOLS_DEBUG = False
+    tools_impl.create_task({"name": "BENCH", "start_datetime": "2025-12-24 19:00"})
+    key = {"client_id": config.CLIENT_ID, "name": "BENCH"}
+
+    _run("before", lambda: _fresh_table(endpoint_url).get_item(Key=key), args.calls, args.threads)
+    aws_clients.warm_up([config.TASKS_TABLE_NAME])
+    _run("after", lambda: tools_impl.get_task({"name": "BENCH"}), args.calls, args.threads)
+
+
+if __name__ == "__main__":
+    main()
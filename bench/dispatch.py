@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+from typing import List
+
+from src.ws_dispatch import EventDispatcher
+
+# Receive-loop cost per call: the old json.loads + if/elif chain vs EventDispatcher,
+# over a recorded (or synthetic) Realtime event stream.
+#
+#   python -m bench.dispatch --calls 200
+#   python -m bench.dispatch --stream recorded.jsonl   # one raw server frame per line
+
+
+def synthetic_stream(turns: int = 6, audio_deltas: int = 40, audio_bytes: int = 3200) -> List[str]:
+    audio = base64.b64encode(os.urandom(audio_bytes)).decode()
+    frames = [{"type": "session.updated", "session": {"type": "realtime"}}]
+    for turn in range(turns):
+        frames += [
+            {"type": "input_audio_buffer.speech_started", "item_id": f"u{turn}"},
+            {"type": "input_audio_buffer.speech_stopped", "item_id": f"u{turn}"},
+            {"type": "input_audio_buffer.committed", "item_id": f"u{turn}"},
+            {"type": "conversation.item.added", "item": {"id": f"u{turn}", "role": "user", "content": []}},
+            {"type": "conversation.item.input_audio_transcription.delta", "item_id": f"u{turn}", "delta": "予約を"},
+            {"type": "conversation.item.input_audio_transcription.completed", "item_id": f"u{turn}",
+             "transcript": "予約を確認したいです"},
+            {"type": "response.created", "response": {"id": f"r{turn}"}},
+        ]
+        for i in range(audio_deltas):
+            frames.append({"type": "response.output_audio.delta", "response_id": f"r{turn}", "item_id": f"a{turn}",
+                           "output_index": 0, "content_index": 0, "delta": audio})
+            if i % 4 == 0:
+                frames.append({"type": "response.output_audio_transcript.delta", "response_id": f"r{turn}",
+                               "item_id": f"a{turn}", "delta": "かしこまり"})
+        frames += [
+            {"type": "response.output_audio.done", "response_id": f"r{turn}", "item_id": f"a{turn}"},
+            {"type": "response.output_audio_transcript.done", "response_id": f"r{turn}", "item_id": f"a{turn}",
+             "transcript": "かしこまりました。"},
+            {"type": "response.content_part.done", "response_id": f"r{turn}", "item_id": f"a{turn}"},
+            {"type": "response.output_item.done", "response_id": f"r{turn}", "item": {"id": f"a{turn}"}},
+            {"type": "response.done", "response": {"id": f"r{turn}", "status": "completed"}},
+            {"type": "rate_limits.updated", "rate_limits": []},
+        ]
+    return [json.dumps(f, ensure_ascii=False) for f in frames]
+
+
+async def _legacy(frames: List[str]) -> None:
+    # Shape of the receive loop before the dispatcher: parse everything, then walk the chain
+    sink = []
+    for raw in frames:
+        try:
+            evt = json.loads(raw)
+            evt_type = evt.get("type")
+            if evt_type == "error":
+                sink.append(evt)
+            if isinstance(evt_type, str) and "input_audio_transcription" in evt_type:
+                sink.append(evt_type)
+            if evt_type == "input_audio_buffer.committed":
+                sink.append(evt_type)
+            if evt_type == "response.created":
+                sink.append(evt_type)
+            elif evt_type == "response.done":
+                sink.append(evt_type)
+            if evt_type == "response.output_text.delta":
+                sink.append(evt)
+            elif evt_type == "response.output_audio_transcript.delta":
+                sink.append(evt.get("delta"))
+            elif evt_type == "response.output_audio_transcript.done":
+                sink.append(evt.get("transcript"))
+            elif evt_type in ("response.output_text.done", "response.completed"):
+                sink.append(evt)
+            elif evt_type in ("response.function_call_arguments.delta", "response.tool_call.delta"):
+                sink.append(evt)
+            elif evt_type in ("response.function_call_arguments.done", "response.tool_call.done"):
+                sink.append(evt)
+            elif evt_type in ("conversation.item.input_audio_transcription.completed", "input_audio_transcription.completed"):
+                sink.append(evt.get("transcript"))
+            elif evt_type == "conversation.item.input_audio_transcription.delta":
+                sink.append(evt.get("delta"))
+            elif evt_type in ("conversation.item.added", "conversation.item.done"):
+                sink.append(evt.get("item"))
+        except Exception:
+            pass
+
+
+def _dispatcher() -> EventDispatcher:
+    # Same subscriptions as realtime_ws._websocket_session, with no-op bodies
+    d = EventDispatcher()
+    d.observe(lambda t: None)
+    sink = []
+    for types in (
+        ("error",), ("input_audio_buffer.committed",), ("response.created",), ("response.done",),
+        ("response.output_text.delta",), ("response.output_audio_transcript.delta",),
+        ("response.output_audio_transcript.done",), ("response.output_text.done", "response.completed"),
+        ("response.function_call_arguments.delta", "response.tool_call.delta"),
+        ("response.function_call_arguments.done", "response.tool_call.done"),
+        ("conversation.item.input_audio_transcription.completed", "input_audio_transcription.completed"),
+        ("conversation.item.input_audio_transcription.delta",),
+        ("conversation.item.input_audio_transcription.failed",),
+        ("conversation.item.added", "conversation.item.done"),
+    ):
+        d.on(*types)(sink.append)
+    return d
+
+
+async def _dispatched(frames: List[str]) -> None:
+    d = _dispatcher()
+    for raw in frames:
+        await d.dispatch(raw)
+
+
+def _run(label: str, fn, frames: List[str], calls: int) -> None:
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(calls):
+        _loop.run_until_complete(fn(frames))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    events = len(frames) * calls
+    print(f"{label:<8} events/s={events / wall:12.0f}  cpu/call={cpu / calls * 1000:8.3f}ms  "
+          f"cpu/event={cpu / events * 1e6:6.2f}us")
+
+
+_loop = asyncio.new_event_loop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="WS receive-loop dispatch benchmark")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--stream", default=None, help="recorded event stream, one raw JSON frame per line")
+    args = parser.parse_args()
+
+    if args.stream:
+        with open(args.stream, "r", encoding="utf-8") as f:
+            frames = [line.rstrip("\n") for line in f if line.strip()]
+    else:
+        frames = synthetic_stream()
+    d = _dispatcher()
+    for raw in frames:
+        _loop.run_until_complete(d.dispatch(raw))
+    print(f"stream: {len(frames)} events/call, {sum(map(len, frames)) / 1024:.0f} KiB/call, "
+          f"parsed={d.stats['parsed']} skipped={d.stats['skipped']}")
+    _run("before", _legacy, frames, args.calls)
+    _run("after", _dispatched, frames, args.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import timeit
+
+from bench import local_dynamo
+
+# Accept -> greeting latency: /accept then WS connect (serial) vs the WS handshake
+# overlapping the /accept round trip (WS_CONNECT_WITH_ACCEPT), against the fake Realtime
+# server with simulated API round trips; plus the per-call cost of serializing the
+# static payloads (accept body, session.update, greeting) vs the cached versions.
+#
+#   python -m bench.greeting --calls 50 --accept-ms 150 --handshake-ms 100
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def _calls(n: int, pipelined: bool, client_id: str):
+    from src import config
+    from src.call_metrics import CallMetrics
+    from src import realtime_ws
+
+    config.WS_CONNECT_WITH_ACCEPT = pipelined
+    spans = []
+    for i in range(n):
+        cm = CallMetrics(f"rtc_greet_{pipelined}_{i}")
+        orig = realtime_ws.CallMetrics
+        # accept_and_run_call creates its own CallMetrics: capture it
+        realtime_ws.CallMetrics = lambda *a, **k: cm
+        try:
+            await realtime_ws.accept_and_run_call(f"rtc_greet_{int(pipelined)}_{i}", {"type": "realtime"},
+                                                  client_id, phone_number=None)
+        finally:
+            realtime_ws.CallMetrics = orig
+        spans.append(cm.summary()["accept_to_greeting_ms"])
+    return spans
+
+
+def _serialization(client_id: str, number: int) -> None:
+    from src.realtime_ws import _session_update, _session_update_frame
+    from src.tenant_cache import tenant_registry
+
+    tenant = tenant_registry.get(client_id)
+    call_accept = {"type": "realtime", "model": "gpt-4o-realtime-preview-2024-12-17"}
+    prompt = tenant.prompt.get().prompt
+
+    def _fresh():
+        json.dumps({**call_accept, "instructions": prompt}).encode("utf-8")
+        json.dumps(_session_update())
+        json.dumps(tenant.response_create())
+
+    def _cached():
+        tenant.accept_body(call_accept)
+        _session_update_frame()
+        tenant.response_create_frame()
+
+    fresh = timeit.timeit(_fresh, number=number) / number * 1e6
+    cached = timeit.timeit(_cached, number=number) / number * 1e6
+    print(f"payloads per call: json.dumps {fresh:7.1f}us  cached {cached:5.2f}us  "
+          f"(prompt {len(prompt):,} chars, accept body {len(tenant.accept_body(call_accept)):,} bytes)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Accept -> greeting latency benchmark")
+    parser.add_argument("--calls", type=int, default=30)
+    parser.add_argument("--accept-ms", type=float, default=150.0, help="simulated /accept round trip")
+    parser.add_argument("--handshake-ms", type=float, default=100.0, help="simulated WS opening handshake")
+    parser.add_argument("--endpoint-url", default=None, help="dynamodb-local URL (default: start moto server)")
+    args = parser.parse_args()
+
+    local_dynamo.start(args.endpoint_url)
+    logging.getLogger("app").setLevel(logging.WARNING)
+    from src import config
+    from src.fake_realtime import FakeRealtimeServer
+
+    fake = FakeRealtimeServer([], speed=1000, accept_delay_ms=args.accept_ms,
+                              handshake_delay_ms=args.handshake_ms).start_in_thread()
+    config.OPENAI_REALTIME_WS_URL = fake.ws_url
+    config.OPENAI_API_BASE = fake.api_base
+    config.CALL_LOG_MODE = "transcript"
+
+    _serialization(config.CLIENT_ID, 2000)
+
+    async def _run():
+        out = {}
+        # Warm up the pooled HTTP client and the tenant once
+        await _calls(2, False, config.CLIENT_ID)
+        for label, pipelined in (("serial", False), ("pipelined", True)):
+            out[label] = await _calls(args.calls, pipelined, config.CLIENT_ID)
+        return out
+
+    results = asyncio.run(_run())
+    for label, spans in results.items():
+        print(f"accept->greeting ({label:<9}) p50={statistics.median(spans):7.1f}ms "
+              f"p90={_pct(spans, 0.9):7.1f}ms  (accept {args.accept_ms:.0f}ms, handshake {args.handshake_ms:.0f}ms)")
+    print(json.dumps({"fake_server": dict(fake.stats)}))
+
+
+if __name__ == "__main__":
+    main()
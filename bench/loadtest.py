@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import base64
+import contextlib
+import hashlib
+import hmac
+import io
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from bench import local_dynamo
+
+# End-to-end load test of one worker: signed webhooks -> call host -> fake Realtime
+# server (src/fake_realtime.py) -> tools / call logs against local DynamoDB.
+#
+#   python -m bench.loadtest --calls 200 --rate 50 --speed 4
+#
+# Reports the limits that matter for sizing: max concurrent calls, event-loop lag,
+# memory per live call and call-log write throughput.
+
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _signed(secret: str, payload: Dict) -> Dict:
+    body = json.dumps(payload)
+    msg_id = "msg_" + secrets.token_hex(8)
+    ts = str(int(time.time()))
+    key = base64.b64decode(secret.split("_", 1)[1])
+    sig = base64.b64encode(hmac.new(key, f"{msg_id}.{ts}.{body}".encode(), hashlib.sha256).digest()).decode()
+    return {
+        "data": body,
+        "headers": {"webhook-id": msg_id, "webhook-timestamp": ts, "webhook-signature": "v1," + sig,
+                    "Content-Type": "application/json"},
+    }
+
+
+def _incoming(call_id: str, n: int) -> Dict:
+    return {
+        "id": "evt_" + call_id,
+        "object": "event",
+        "type": "realtime.call.incoming",
+        "created_at": int(time.time()),
+        "data": {
+            "call_id": call_id,
+            "sip_headers": [
+                {"name": "From", "value": f"<sip:+8190{n:08d}@example.com>"},
+                {"name": "X-Twilio-CallSid", "value": f"CA{n:032d}"},
+            ],
+        },
+    }
+
+
+async def _lag_probe(samples: List[float], stop: threading.Event, interval: float) -> None:
+    # Scheduling delay of a periodic wake-up on the call host loop
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - t - interval))
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test against a fake Realtime server and local DynamoDB")
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=20.0, help="new calls per second")
+    parser.add_argument("--speed", type=float, default=1.0, help="script speed multiplier (2 = twice as fast)")
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--no-tools", action="store_true")
+    parser.add_argument("--script", default=None, help="recorded session script (JSON list of steps)")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="override MAX_CONCURRENT_CALLS")
+    parser.add_argument("--max-active", type=int, default=None, help="override ADMISSION_MAX_ACTIVE_CALLS")
+    parser.add_argument("--max-loop-lag-ms", type=float, default=None, help="override ADMISSION_MAX_LOOP_LAG_MS")
+    parser.add_argument("--endpoint-url", default=None, help="dynamodb-local URL (default: start moto server)")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--verbose", action="store_true", help="keep the app's own output")
+    args = parser.parse_args()
+
+    from src.fake_realtime import FakeRealtimeServer, load_script, synthetic_script
+    script = load_script(args.script) if args.script else synthetic_script(args.turns, not args.no_tools)
+    fake = FakeRealtimeServer(script, speed=args.speed).start_in_thread()
+
+    secret = "whsec_" + base64.b64encode(secrets.token_bytes(32)).decode()
+    os.environ["OPENAI_API_BASE"] = fake.api_base
+    os.environ["OPENAI_REALTIME_WS_URL"] = fake.ws_url
+    os.environ["OPENAI_WEBHOOK_SECRET"] = secret
+    if args.max_concurrent:
+        os.environ["MAX_CONCURRENT_CALLS"] = str(args.max_concurrent)
+    if args.max_active:
+        os.environ["ADMISSION_MAX_ACTIVE_CALLS"] = str(args.max_active)
+    if args.max_loop_lag_ms is not None:
+        os.environ["ADMISSION_MAX_LOOP_LAG_MS"] = str(args.max_loop_lag_ms)
+    local_dynamo.start(args.endpoint_url)
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        from src import app_modular, tools_impl
+        from src.call_host import call_host
+        from src.admission import admission
+        from src.dynamo_utils import call_log_writer, flush_call_logs
+        from src.tool_cache import TOOL_PREFETCH, tool_cache_stats
+        from src.tool_runner import tool_stats
+        from src.tool_results import TOOL_RESULT_BYTES
+        from src.call_metrics import TOOL_RESPONSE_LATENCY
+        tools_impl.TOOLS_DEBUG = False
+        if not args.verbose:
+            # App logs go to stdout from the logging thread, not through redirect_stdout
+            logging.getLogger("app").setLevel(logging.WARNING)
+        for i in range(args.turns):
+            tools_impl.create_task({"name": f"LOAD-{i}", "start_datetime": "2025-12-24 19:00"})
+        client = app_modular.app.test_client()
+
+        rss_base = _rss_kb()
+        lag: List[float] = []
+        stop = threading.Event()
+        call_host.run_coroutine(_lag_probe(lag, stop, 0.05))
+        log_stats_base = dict(call_log_writer().stats)
+
+        peak = {"active": 0, "rss": rss_base}
+        statuses: Dict[int, int] = {}
+        answered: List[str] = []
+        lock = threading.Lock()
+
+        def _sampler():
+            while not stop.is_set():
+                peak["active"] = max(peak["active"], call_host.active_count())
+                peak["rss"] = max(peak["rss"], _rss_kb())
+                time.sleep(0.02)
+
+        def _fire(n: int) -> None:
+            req = _signed(secret, _incoming(f"rtc_load_{n}", n))
+            res = client.post("/", data=req["data"], headers=req["headers"])
+            with lock:
+                statuses[res.status_code] = statuses.get(res.status_code, 0) + 1
+                if res.status_code == 200:
+                    answered.append(f"rtc_load_{n}")
+
+        threading.Thread(target=_sampler, daemon=True).start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            for n in range(args.calls):
+                ex.submit(_fire, n)
+                time.sleep(1.0 / args.rate if args.rate > 0 else 0)
+
+        deadline = time.time() + args.timeout
+        while call_host.active_count() and time.time() < deadline:
+            time.sleep(0.1)
+        elapsed = time.perf_counter() - started
+
+        # Every call answered 200 gets exactly one of accept / reject / refer (shed actions run async)
+        def _control(call_id):
+            return [a for a in fake.actions.get(call_id, ()) if a in ("accept", "reject", "refer")]
+
+        while any(not _control(c) for c in answered) and time.time() < deadline:
+            time.sleep(0.05)
+        control_mismatch = [c for c in answered if len(_control(c)) != 1]
+        flush_call_logs(timeout=30)
+        stop.set()
+        log_stats = {k: v - log_stats_base.get(k, 0) for k, v in call_log_writer().stats.items()}
+        tools = {name: s for name, s in tool_stats().items() if s["count"]}
+        shaped = {name: (TOOL_RESULT_BYTES.summary(tool=name), TOOL_RESPONSE_LATENCY.summary(tool=name)) for name in tools}
+        prefetch = {outcome: int(TOOL_PREFETCH.value(tool="get_task", outcome=outcome))
+                    for outcome in ("started", "hit", "unused")}
+        cache = tool_cache_stats()
+        load = admission.load()
+
+    mem_per_call = (peak["rss"] - rss_base) / peak["active"] if peak["active"] else 0.0
+    print(f"calls={args.calls} rate={args.rate}/s speed={args.speed}x elapsed={elapsed:.1f}s "
+          f"statuses={dict(sorted(statuses.items()))}")
+    print(f"max concurrent calls   {peak['active']} (fake server saw {fake.stats['max_active']}, "
+          f"sessions={fake.stats['sessions']}, tool outputs={fake.stats['tool_outputs']}, "
+          f"tool timeouts={fake.stats['tool_timeouts']})")
+    print(f"admission              admitted={load['admitted']} shed={load['shed']} "
+          f"(fake server accept={fake.stats.get('accept', 0)} reject={fake.stats.get('reject', 0)} "
+          f"refer={fake.stats.get('refer', 0)})")
+    print(f"call control           one action per answered call: "
+          f"{'ok' if not control_mismatch else 'MISMATCH ' + str(control_mismatch[:5])} ({len(answered)} answered)")
+    print(f"event-loop lag         p50={_pct(lag, 0.5) * 1000:.1f}ms p99={_pct(lag, 0.99) * 1000:.1f}ms "
+          f"max={max(lag or [0]) * 1000:.1f}ms")
+    print(f"memory                 base={rss_base / 1024:.1f}MiB peak={peak['rss'] / 1024:.1f}MiB "
+          f"per call~{mem_per_call:.0f}KiB")
+    print(f"call-log writes        {log_stats.get('written', 0)} items in {log_stats.get('batches', 0)} batches "
+          f"({log_stats.get('written', 0) / elapsed:.1f} items/s), retries={log_stats.get('retries', 0)} "
+          f"dropped={log_stats.get('dropped', 0)} spilled={log_stats.get('spilled', 0)} failed={log_stats.get('failed', 0)}")
+    for name, st in tools.items():
+        size, reply = shaped[name]
+        print(f"tool {name:<17} n={st['count']} p50={st['p50'] * 1000:.1f}ms p99={st['p99'] * 1000:.1f}ms "
+              f"result avg={size['avg'] or 0:.0f}B model reply p50={(reply['p50'] or 0) * 1000:.1f}ms")
+    print(f"get_task prefetch      {prefetch}")
+    print(f"tool cache             {cache}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import logging
+import os
+import socket
+from typing import Optional
+
+# Local DynamoDB stand-in for benchmarks: moto's threaded server (real HTTP, so
+# connection setup costs show up) or an already running dynamodb-local via
+# DYNAMODB_ENDPOINT_URL.
+
+TABLES = {
+    "app-tasks": ("client_id", "name"),
+    "app-logs": ("client_id", "sk"),
+    "app-prompts": ("client_id", "id"),
+    "app-faq": ("client_id", "question"),
+    "app-sessions": ("pk", "sk"),
+}
+
+# Optional GSIs: (index name, partition key, sort key[, projection type])
+INDEXES = {
+    "app-tasks": [("slot-date-index", "slot_date", "slot_start"), ("caller-index", "caller_key", "created_at", "ALL")],
+    "app-logs": [("call-sid-index", "call_sid", "ts", "ALL"), ("client-ts-index", "client_id", "ts", "ALL")],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start(endpoint_url: Optional[str] = None) -> str:
+    """Start (or reuse) a local endpoint, point the app config at it, create the tables."""
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-1")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-local")
+    endpoint_url = endpoint_url or os.getenv("DYNAMODB_ENDPOINT_URL")
+    if not endpoint_url:
+        try:
+            from moto.server import ThreadedMotoServer
+        except Exception as e:
+            raise SystemExit("moto[server] is required (pip install -r requirements-dev.txt): %s" % e)
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        port = _free_port()
+        server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+        server.start()
+        endpoint_url = f"http://127.0.0.1:{port}"
+    os.environ["DYNAMODB_ENDPOINT_URL"] = endpoint_url
+
+    from src import config, aws_clients
+    config.DYNAMODB_ENDPOINT_URL = endpoint_url
+    aws_clients.reset()
+    create_tables()
+    return endpoint_url
+
+
+def create_tables() -> None:
+    from src import aws_clients
+    client = aws_clients.dynamodb_client()
+    existing = set(client.list_tables().get("TableNames", []))
+    for name, (pk, sk) in TABLES.items():
+        if name in existing:
+            continue
+        attrs = {pk, sk}
+        kwargs = {}
+        if INDEXES.get(name):
+            kwargs["GlobalSecondaryIndexes"] = [
+                {
+                    "IndexName": index,
+                    "KeySchema": [{"AttributeName": ipk, "KeyType": "HASH"}, {"AttributeName": isk, "KeyType": "RANGE"}],
+                    "Projection": {"ProjectionType": projection[0] if projection else "KEYS_ONLY"},
+                }
+                for index, ipk, isk, *projection in INDEXES[name]
+            ]
+            for _, ipk, isk, *_ in INDEXES[name]:
+                attrs.update((ipk, isk))
+        client.create_table(
+            TableName=name,
+            KeySchema=[{"AttributeName": pk, "KeyType": "HASH"}, {"AttributeName": sk, "KeyType": "RANGE"}],
+            AttributeDefinitions=[{"AttributeName": a, "AttributeType": "S"} for a in sorted(attrs)],
+            BillingMode="PAY_PER_REQUEST",
+            **kwargs,
+        )
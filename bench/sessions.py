@@ -0,0 +1,127 @@
+import argparse
+import json
+import logging
+import statistics
+import time
+
+from bench import local_dynamo
+
+# Session registry across nodes: live calls run on node A (the app's call host, against the
+# fake Realtime server); node B, with no calls, sees them through the registry and routes
+# status / transcript tail / hangup to A through A's mailbox. Per backend: route latency,
+# hangups that end the calls, leases released, and a dead node's lease lapsing.
+#
+#   python -m bench.sessions --calls 10 --backends memory,dynamodb
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def _wait(cond, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.05)
+    return cond()
+
+
+def _run_backend(backend: str, calls: int, fake) -> dict:
+    from src import config, realtime_ws
+    from src.call_host import CallHost, call_host
+    from src.session_registry import SessionNode, make_registry
+
+    config.SESSION_REGISTRY_BACKEND = backend
+    registry = make_registry(backend)
+    node_a = SessionNode(call_host, registry, node_id=f"node-a-{backend}")
+    node_b = SessionNode(CallHost(4, 5.0), registry, node_id=f"node-b-{backend}")
+    # accept_and_run_call leases its calls through the module's node
+    realtime_ws.session_node = node_a
+    node_b.start()
+
+    ids = [f"rtc_sess_{backend}_{i}" for i in range(calls)]
+    for call_id in ids:
+        call_host.submit(call_id, lambda c=call_id: realtime_ws.accept_and_run_call(
+            c, {"type": "realtime"}, config.CLIENT_ID, phone_number=None))
+
+    def _live_turns(call_id):
+        entry = call_host.get_session(call_id)
+        return len(entry["live"].turns) if entry and entry.get("live") else 0
+
+    assert _wait(lambda: all(_live_turns(c) >= 3 for c in ids), 30), "calls did not start"
+    _wait(lambda: len(registry.calls()) >= calls, 10)
+    seen = node_b.cluster()
+
+    def _route(call_id, action, args=None):
+        t = time.perf_counter()
+        status, body = node_b.host.run_coroutine(node_b.route(call_id, action, args)).result(timeout=30)
+        return status, body, (time.perf_counter() - t) * 1000
+
+    spans = {"status": [], "transcript": [], "hangup": []}
+    sample = None
+    for call_id in ids:
+        for action in ("status", "transcript"):
+            status, body, ms = _route(call_id, action, {"tail": 2})
+            assert status == 200 and body["node_id"] == node_a.node_id, (status, body)
+            spans[action].append(ms)
+            sample = sample or body
+    # A second node must not be able to take over a live call
+    stolen = registry.claim(ids[0], node_b.node_id, {}, config.SESSION_LEASE_SECONDS)
+    for call_id in ids:
+        status, body, ms = _route(call_id, "hangup")
+        assert status == 200 and body.get("hangup"), (status, body)
+        spans["hangup"].append(ms)
+    ended = _wait(lambda: call_host.active_count() == 0, 30)
+    released = _wait(lambda: not registry.calls(), 10)
+    missing = _route("rtc_no_such_call", "status")[0]
+
+    # Dead node: its lease lapses without a release
+    registry.claim("rtc_orphan", "node-dead", {}, 1.0)
+    held = registry.owner("rtc_orphan") is not None
+    # DynamoDB keeps whole-second expiries
+    time.sleep(2.2)
+    lapsed = registry.owner("rtc_orphan") is None
+
+    node_a.stop()
+    node_b.stop()
+    return {
+        "nodes_seen": len(seen["nodes"]), "calls_seen": len(seen["calls"]),
+        "latency_ms": {a: {"p50": round(statistics.median(v), 1), "p90": round(_pct(v, 0.9), 1)} for a, v in spans.items()},
+        "second_claim_refused": not stolen, "calls_ended": ended, "leases_released": released,
+        "unknown_call_status": missing, "dead_lease_held_then_lapsed": held and lapsed,
+        "sample_status": sample,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Session registry / routed actions benchmark")
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--backends", default="memory,dynamodb")
+    parser.add_argument("--poll", type=float, default=0.5, help="SESSION_INBOX_POLL_SECONDS")
+    parser.add_argument("--endpoint-url", default=None, help="dynamodb-local URL (default: start moto server)")
+    args = parser.parse_args()
+
+    local_dynamo.start(args.endpoint_url)
+    logging.getLogger("app").setLevel(logging.WARNING)
+    from src import config
+    from src.fake_realtime import FakeRealtimeServer
+
+    # Calls stay up (long pause) until they are hung up from the other node
+    script = [{"user": "予約の確認をお願いします"}, {"say": "かしこまりました。"}, {"pause_ms": 120000}]
+    fake = FakeRealtimeServer(script, speed=1).start_in_thread()
+    config.OPENAI_REALTIME_WS_URL = fake.ws_url
+    config.OPENAI_API_BASE = fake.api_base
+    config.CALL_LOG_MODE = "transcript"
+    config.SESSION_INBOX_POLL_SECONDS = args.poll
+    config.SESSION_HEARTBEAT_SECONDS = 1.0
+
+    for backend in args.backends.split(","):
+        result = _run_backend(backend.strip(), args.calls, fake)
+        print(f"[{backend}] " + json.dumps(result, ensure_ascii=False, default=str))
+    print(json.dumps({"fake_server": {k: fake.stats.get(k) for k in ("sessions", "accept", "hangup")}}))
+
+
+if __name__ == "__main__":
+    main()
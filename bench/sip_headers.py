@@ -0,0 +1,211 @@
+import argparse
+import json
+import random
+import re
+import timeit
+from types import SimpleNamespace
+
+# SIP header parsing on the webhook path: property checks over a generated corpus of
+# caller-number renderings, then the per-event cost of the old probes (phone, CallSid,
+# tenant header and dialed number each walking sip_headers) vs one SipHeaders pass.
+#
+#   python -m bench.sip_headers --cases 2000
+
+# Seen in the wild / edge cases; expected normalize_phone output (PHONE_FORMAT=national, cc 81)
+FIXED = [
+    ("09012345678", "09012345678"),
+    ("090-1234-5678", "09012345678"),
+    ("+819012345678", "09012345678"),
+    ("+81 90 1234 5678", "09012345678"),
+    ("+81(0)9012345678", "09012345678"),
+    ("+81 (0)90-1234-5678", "09012345678"),
+    ("+8109012345678", "09012345678"),
+    ("0081 90 1234 5678", "09012345678"),
+    ("010-81-90-1234-5678", "09012345678"),
+    ("03-1234-5678", "0312345678"),
+    ("0120-123-456", "0120123456"),
+    ("+14155550100", "14155550100"),
+    ("+1 (415) 555-0100", "14155550100"),
+    ("+44 (0)20 7946 0958", "442079460958"),
+    ("1234", "1234"),
+]
+FIXED_URIS = [
+    ('"Alice" <sip:+819012345678@pbx.example.com;user=phone>;tag=1a2b', "09012345678"),
+    ("<sip:+819012345678@203.0.113.5:5060;transport=udp>;tag=x", "09012345678"),
+    ("sip:0312345678@10.0.0.1:5060", "0312345678"),
+    ("<tel:+81-3-1234-5678>", "0312345678"),
+    ('"03-9999-0000" <sip:+815012345678@sip.example.com>', "05012345678"),
+    ("<sips:+14155550100@example.com>", "14155550100"),
+    ("<sip:anonymous@anonymous.invalid>;tag=1", None),
+    ("<sip:alice@192.0.2.1>", None),
+    ("+819012345678", "09012345678"),
+]
+
+
+def _legacy_normalize(num):
+    digits = "".join(ch for ch in num if ch.isdigit() or ch == "+")
+    if digits.startswith("+81"):
+        rest = digits[3:]
+        if rest and rest[0] != "0":
+            return "0" + rest
+        return rest if rest else None
+    return "".join(ch for ch in digits if ch.isdigit())
+
+
+def _renderings(national: str, rnd: random.Random):
+    # national: "0" + 9/10 digits; every rendering must normalize back to it
+    n = national[1:]
+    cut = rnd.randint(1, 3)
+    groups = [national[:cut + 1], national[cut + 1:cut + 5], national[cut + 5:]]
+    yield national, True
+    yield "-".join(groups), True
+    yield "+81" + n, True
+    yield "+81 " + " ".join([n[:cut], n[cut:cut + 4], n[cut + 4:]]), True
+    yield "+81(0)" + n, False
+    yield "0081" + n, False
+    yield "010-81-" + n, False
+    for fmt in ('"Caller" <sip:+81{n}@pbx.example.com;user=phone>;tag={tag}',
+                "<sip:+81{n}@203.0.113.{o}:5060>;tag={tag}",
+                "sip:{nat}@10.0.0.{o}",
+                "<tel:+81-{n}>"):
+        yield fmt.format(n=n, nat=national, tag=rnd.randrange(10 ** 6), o=rnd.randrange(256)), None
+
+
+def check_corpus(cases: int, seed: int) -> dict:
+    from src.phone_utils import SipHeaders, normalize_phone, number_from_uri, to_e164
+
+    failures = []
+    checked = 0
+
+    def _expect(value, got, want):
+        nonlocal checked
+        checked += 1
+        if got != want:
+            failures.append({"input": value, "got": got, "want": want})
+
+    for value, want in FIXED:
+        _expect(value, normalize_phone(value), want)
+    for value, want in FIXED_URIS:
+        number = number_from_uri(value)
+        _expect(value, normalize_phone(number) if number else None, want)
+
+    rnd = random.Random(seed)
+    legacy_same = legacy_total = 0
+    for _ in range(cases):
+        prefix = rnd.choice(["090", "080", "070", "050", "03", "06", "0120", "011"])
+        national = prefix + "".join(str(rnd.randrange(10)) for _ in range(11 - len(prefix) if prefix[1] in "5789" else 10 - len(prefix)))
+        for value, legacy_ok in _renderings(national, rnd):
+            number = number_from_uri(value) if legacy_ok is None else value
+            got = normalize_phone(number) if number else None
+            _expect(value, got, national)
+            # Idempotent, and E.164 round-trips to the same key
+            _expect(value + " (idempotent)", normalize_phone(got or ""), national)
+            _expect(value + " (e164)", to_e164(national), "+81" + national[1:])
+            if legacy_ok:
+                legacy_total += 1
+                legacy_same += _legacy_normalize(value) == got
+        # Header map: case-insensitive names, first non-empty value wins
+        name = rnd.choice(["From", "FROM", "from", "fRoM"])
+        sip = SipHeaders.from_event(SimpleNamespace(data=SimpleNamespace(sip_headers=[
+            {"name": name, "value": ""},
+            {"name": name, "value": f"<sip:+81{national[1:]}@x>"},
+            {"name": "from", "value": "<sip:+819999999999@x>"},
+        ])))
+        _expect(f"{name} header", sip.caller, national)
+    return {"checked": checked, "failures": len(failures), "examples": failures[:5],
+            "legacy_compatible": f"{legacy_same}/{legacy_total}"}
+
+
+def _event(n: int):
+    headers = [
+        {"name": "Via", "value": "SIP/2.0/UDP 10.0.0.1:5060;branch=z9hG4bK-1"},
+        {"name": "From", "value": f'"Caller" <sip:+8190{n:08d}@pstn.twilio.com>;tag=abc{n}'},
+        {"name": "To", "value": "<sip:+81312345678@sip.api.openai.com>"},
+        {"name": "Call-ID", "value": f"{n}@10.0.0.1"},
+        {"name": "CSeq", "value": "1 INVITE"},
+        {"name": "Contact", "value": "<sip:10.0.0.1:5060>"},
+        {"name": "User-Agent", "value": "Twilio Gateway"},
+        {"name": "Max-Forwards", "value": "70"},
+        {"name": "X-Twilio-AccountSid", "value": "AC" + "0" * 32},
+        {"name": "X-Twilio-CallSid", "value": f"CA{n:032d}"},
+        {"name": "X-Client-Id", "value": "ueki"},
+        {"name": "Content-Type", "value": "application/sdp"},
+    ]
+    return SimpleNamespace(type="realtime.call.incoming",
+                           data=SimpleNamespace(call_id=f"rtc_{n}", sip_headers=[SimpleNamespace(**h) for h in headers]))
+
+
+def _legacy_header(event, *names):
+    wanted = {n.lower() for n in names}
+    for h in event.data.sip_headers or []:
+        name, value = getattr(h, "name", None), getattr(h, "value", None)
+        if name and name.lower() in wanted and value:
+            return str(value).strip()
+    return None
+
+
+def _legacy(event, request):
+    # Old webhook path: phone probes (incl. a JSON body parse), then separate walks for
+    # the caller, the CallSid, the tenant header and the dialed number
+    phone = None
+    for key in ["X-Phone-Number", "X-Caller-Number", "From", "x-phone-number", "x-caller-number"]:
+        if request.headers.get(key):
+            phone = key
+    body = request.get_json(silent=True) or {}
+    for key in ["phone", "phone_number", "from", "From"]:
+        if body.get(key):
+            phone = key
+    if phone is None:
+        for h in event.data.sip_headers:
+            if h.name.lower() == "from" and h.value:
+                m = re.search(r"\+?\d+", h.value)
+                if m:
+                    phone = _legacy_normalize(m.group(0))
+                break
+    sid = _legacy_header(event, "x-twilio-callsid", "twilio-callsid")
+    tenant = _legacy_header(event, "x-client-id", "x-tenant-id")
+    to = _legacy_header(event, "to")
+    m = re.search(r"\+?\d+", to or "")
+    dialed = _legacy_normalize(m.group(0)) if m else None
+    return phone, sid, tenant, dialed
+
+
+def _current(event, request):
+    from src.phone_utils import SipHeaders, extract_phone_from_event_or_request
+    sip = SipHeaders.from_event(event)
+    return (extract_phone_from_event_or_request(event, request, sip), sip.call_sid,
+            sip.get("x-client-id", "x-tenant-id"), sip.dialed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SIP header parsing: property corpus + micro-benchmark")
+    parser.add_argument("--cases", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger("app").setLevel(logging.WARNING)
+    result = check_corpus(args.cases, args.seed)
+    print(json.dumps(result, ensure_ascii=False))
+
+    from flask import Request
+    from werkzeug.test import EnvironBuilder
+
+    body = json.dumps({"id": "evt_1", "object": "event", "type": "realtime.call.incoming",
+                       "data": {"call_id": "rtc_1", "sip_headers": [vars(h) for h in _event(1).data.sip_headers]}})
+    event = _event(1)
+
+    def _request():
+        # Fresh request each round: the parsed JSON body is cached on the request
+        return Request(EnvironBuilder("/", method="POST", data=body, content_type="application/json").get_environ())
+
+    print("legacy :", _legacy(event, _request()))
+    print("current:", _current(event, _request()))
+    base = timeit.timeit(_request, number=args.number) / args.number
+    for label, fn in (("legacy", _legacy), ("current", _current)):
+        t = timeit.timeit(lambda: fn(event, _request()), number=args.number) / args.number
+        print(f"{label:<8} {max(0.0, t - base) * 1e6:7.1f}us per webhook (request construction excluded)")
+
+if __name__ == "__main__":
+    main()
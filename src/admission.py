@@ -0,0 +1,162 @@
+import asyncio
+import collections
+import json
+import threading
+import time
+from typing import Any, Deque, Dict, Tuple
+
+from . import config
+from . import metrics
+from .app_logging import get_logger
+from .call_host import CallHost, call_host
+from .openai_http import accept_call, call_control
+
+log = get_logger(__name__)
+
+# Admission control for realtime.call.incoming. A new call is admitted only while the
+# worker has headroom: live sessions below ADMISSION_MAX_ACTIVE_CALLS and call host loop
+# lag below ADMISSION_MAX_LOOP_LAG_MS (with hysteresis, so shedding does not flap).
+# Shed calls never become sessions; they get ADMISSION_OVERLOAD_ACTION:
+#   reject   -> POST /reject (SIP ADMISSION_REJECT_STATUS, default 486 Busy Here)
+#   refer    -> POST /refer to ADMISSION_REFER_URI (another site / queue)
+#   callback -> accept, speak ADMISSION_CALLBACK_MESSAGE, hang up (no tools, no call logs)
+
+CALLS_ADMITTED = metrics.counter("calls_admitted_total", "realtime.call.incoming admitted as sessions")
+CALLS_SHED = metrics.counter("calls_shed_total", "realtime.call.incoming shed by reason and action")
+LOOP_LAG = metrics.gauge("event_loop_lag_seconds", "Call host loop scheduling delay (p90 of the recent window)")
+LOAD = metrics.gauge("admission_load", "max(active / max active, loop lag / lag limit); >= 1 means shedding")
+
+# Lag has to fall below this fraction of the limit before calls are admitted again
+_LAG_RECOVERY = 0.7
+
+
+class AdmissionController:
+    def __init__(self, host: CallHost, max_active: int, max_lag_ms: float,
+                 probe_interval: float = 0.1, window: int = 20):
+        self.host = host
+        self.max_active = max(1, max_active)
+        self.max_lag = max_lag_ms / 1000.0
+        self.probe_interval = probe_interval
+        self._lags: Deque[float] = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._probe = None
+        self._lagging = False
+        self.stats = {"admitted": 0, "shed": 0}
+
+    def start(self) -> None:
+        with self._lock:
+            if self._probe is not None:
+                return
+            self._probe = self.host.run_coroutine(self._probe_lag())
+
+    async def _probe_lag(self) -> None:
+        # Scheduling delay of a periodic wake-up on the call host loop
+        loop = asyncio.get_running_loop()
+        while True:
+            t = loop.time()
+            await asyncio.sleep(self.probe_interval)
+            self._lags.append(max(0.0, loop.time() - t - self.probe_interval))
+
+    def loop_lag(self) -> float:
+        lags = sorted(self._lags)
+        return lags[int(len(lags) * 0.9)] if lags else 0.0
+
+    def load(self) -> Dict[str, Any]:
+        self.start()
+        active = self.host.active_count()
+        lag = self.loop_lag()
+        load = active / self.max_active
+        if self.max_lag > 0:
+            load = max(load, lag / self.max_lag)
+        LOOP_LAG.set(lag)
+        LOAD.set(load)
+        return {
+            "active_calls": active,
+            "max_active_calls": self.max_active,
+            "loop_lag_ms": round(lag * 1000, 1),
+            "max_loop_lag_ms": round(self.max_lag * 1000, 1),
+            "load": round(load, 3),
+            "accepting": not self.host.draining and active < self.max_active and not self._lagging,
+            "draining": self.host.draining,
+            **self.stats,
+        }
+
+    def check(self) -> Tuple[bool, str]:
+        """(admit, reason) for one incoming call; reason is ok | draining | capacity | loop_lag."""
+        self.start()
+        if self.host.draining:
+            return False, "draining"
+        active = self.host.active_count()
+        if active >= self.max_active:
+            return False, "capacity"
+        if self.max_lag > 0:
+            lag = self.loop_lag()
+            if self._lagging and lag < self.max_lag * _LAG_RECOVERY:
+                self._lagging = False
+                log.info("loop_lag_recovered", extra={"loop_lag_ms": round(lag * 1000, 1)})
+            elif not self._lagging and lag >= self.max_lag and active > 0:
+                self._lagging = True
+                log.warning("loop_lag_shedding", extra={"loop_lag_ms": round(lag * 1000, 1), "active_calls": active})
+            if self._lagging:
+                return False, "loop_lag"
+        return True, "ok"
+
+    def admitted(self) -> None:
+        self.stats["admitted"] += 1
+        CALLS_ADMITTED.inc()
+
+    async def shed(self, call_id: str, call_accept: Dict[str, Any], reason: str) -> None:
+        """Answer a call that was not admitted with the configured overload action."""
+        self.stats["shed"] += 1
+        action = config.ADMISSION_OVERLOAD_ACTION
+        if action == "refer" and not config.ADMISSION_REFER_URI:
+            action = "reject"
+        CALLS_SHED.inc(reason=reason, action=action)
+        log.warning("call_shed", extra={"call_id": call_id, "reason": reason, "action": action,
+                                        "active_calls": self.host.active_count()})
+        try:
+            if action == "callback":
+                await _callback_message(call_id, call_accept)
+            elif action == "refer":
+                await call_control(call_id, "refer", {"target_uri": config.ADMISSION_REFER_URI}, max_retries=1)
+            else:
+                await call_control(call_id, "reject", {"status_code": config.ADMISSION_REJECT_STATUS}, max_retries=1)
+        except Exception:
+            log.error("call_shed_failed", extra={"call_id": call_id, "action": action}, exc_info=True)
+
+
+async def _callback_message(call_id: str, call_accept: Dict[str, Any]) -> None:
+    # One short response on a bare session, then hang up
+    from .realtime_ws import _connect
+
+    message = config.ADMISSION_CALLBACK_MESSAGE
+    instructions = "次の文章だけをそのまま読み上げてください: " + message
+    if not await accept_call(call_id, {**call_accept, "instructions": instructions}):
+        return
+    try:
+        websocket = await _connect(call_id)
+        try:
+            await websocket.send(json.dumps({"type": "response.create", "response": {"instructions": instructions}}))
+            deadline = time.monotonic() + config.ADMISSION_CALLBACK_TIMEOUT
+            while time.monotonic() < deadline:
+                try:
+                    raw = await asyncio.wait_for(websocket.recv(), deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    break
+                if '"output_audio_buffer.stopped"' in raw:
+                    break
+                if '"response.done"' in raw:
+                    # Generation runs ahead of playback: leave time for the message to be heard
+                    deadline = min(deadline, time.monotonic() + len(message) * 0.15)
+        finally:
+            await websocket.close()
+    except Exception as e:
+        log.warning("callback_message_failed", extra={"call_id": call_id, "error": repr(e)})
+    await call_control(call_id, "hangup", max_retries=1)
+
+
+admission = AdmissionController(
+    call_host,
+    max_active=config.ADMISSION_MAX_ACTIVE_CALLS,
+    max_lag_ms=config.ADMISSION_MAX_LOOP_LAG_MS,
+)
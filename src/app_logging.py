@@ -0,0 +1,198 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO
+
+from . import config
+
+# Structured logging for the app. Call sites log a short event name plus fields:
+#
+#   log = get_logger(__name__)
+#   log.info("tool_call", extra={"tool": name, "arguments": args})
+#   log.debug("transcription_delta", extra={"sample": "transcription_delta", "delta": d})
+#
+# Records go through a bounded queue; formatting, redaction and stdout I/O happen on
+# the listener thread, never on the call host loop. Records carrying "sample" are kept
+# 1 in LOG_SAMPLE_EVERY per key.
+
+_ROOT = "app"
+_call_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("log_call_id", default=None)
+
+_STD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+# Field names whose values are masked / replaced when LOG_REDACT is on
+PHONE_FIELDS = {"phone", "phone_number", "caller", "from", "to", "dialed", "dialed_number"}
+TEXT_FIELDS = {"transcript", "user_text", "assistant_text", "text", "delta", "greeting", "prompt",
+               "instructions", "name", "address", "request", "answer", "question", "query"}
+# Phone-like runs in free text: 10-15 digits, optional "+" and hyphens (dates/times have fewer digits)
+_PHONE_RE = re.compile(r"(?<![\w.:/-])\+?\d[\d-]{8,}\d(?![\w.:/-])")
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_sample_counts: Dict[str, int] = {}
+stats = {"dropped": 0}
+
+
+def bind_call(call_id: Optional[str]) -> contextvars.Token:
+    """Tag every record logged from this context (the call's task) with call_id."""
+    return _call_id.set(call_id)
+
+
+def unbind_call(token: contextvars.Token) -> None:
+    _call_id.reset(token)
+
+
+def mask_phone(value: Any) -> str:
+    digits = re.sub(r"\D", "", str(value))
+    return ("*" * max(0, len(digits) - 4)) + digits[-4:] if digits else ""
+
+
+def _mask_phones_in(text: str) -> str:
+    def _mask(m: "re.Match[str]") -> str:
+        n = sum(ch.isdigit() for ch in m.group(0))
+        return mask_phone(m.group(0)) if 10 <= n <= 15 else m.group(0)
+    return _PHONE_RE.sub(_mask, text)
+
+
+def redact(value: Any, key: Optional[str] = None) -> Any:
+    k = (key or "").lower()
+    if isinstance(value, dict):
+        return {kk: redact(vv, str(kk)) for kk, vv in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v, key) for v in value]
+    if value is None or isinstance(value, (bool, int, float)) and k not in PHONE_FIELDS:
+        return value
+    if k in PHONE_FIELDS:
+        return mask_phone(value)
+    if k in TEXT_FIELDS:
+        return f"<redacted {len(str(value))} chars>"
+    if isinstance(value, str):
+        return _mask_phones_in(value)
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, redact_pii: bool = True):
+        super().__init__()
+        self.redact_pii = redact_pii
+
+    def fields(self, record: logging.LogRecord) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for k, v in record.__dict__.items():
+            if k not in _STD_ATTRS and k != "sample" and not k.startswith("_"):
+                out[k] = redact(v, k) if self.redact_pii else v
+        return out
+
+    def format(self, record: logging.LogRecord) -> str:
+        msg = record.getMessage()
+        doc: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + ".%03dZ" % record.msecs,
+            "level": record.levelname,
+            "logger": record.name[len(_ROOT) + 1:] if record.name.startswith(_ROOT + ".") else record.name,
+            "event": _mask_phones_in(msg) if self.redact_pii else msg,
+        }
+        doc.update(self.fields(record))
+        if record.exc_info:
+            doc["exc"] = self.formatException(record.exc_info)
+        return json.dumps(doc, ensure_ascii=False, default=str)
+
+
+class TextFormatter(JsonFormatter):
+    def format(self, record: logging.LogRecord) -> str:
+        msg = record.getMessage()
+        if self.redact_pii:
+            msg = _mask_phones_in(msg)
+        fields = " ".join(f"{k}={json.dumps(v, ensure_ascii=False, default=str)}" for k, v in self.fields(record).items())
+        line = f"{self.formatTime(record)} {record.levelname} {record.name}: {msg} {fields}".rstrip()
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class _ContextFilter(logging.Filter):
+    # Runs in the caller's thread: capture contextvars and apply sampling before queueing
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample", None)
+        if key:
+            every = max(1, config.LOG_SAMPLE_EVERY)
+            with _lock:
+                n = _sample_counts.get(key, 0)
+                _sample_counts[key] = n + 1
+            if n % every:
+                return False
+            record.sampled_every = every
+        if not hasattr(record, "call_id"):
+            call_id = _call_id.get()
+            if call_id:
+                record.call_id = call_id
+        if not hasattr(record, "client_id"):
+            try:
+                from .tenants import current_client_id
+                record.client_id = current_client_id()
+            except Exception:
+                pass
+        return True
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same process: hand the record over as is, formatting happens on the listener
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            stats["dropped"] += 1
+
+
+def configure(force: bool = False, stream: Optional[TextIO] = None) -> None:
+    """Install the queue handler; records are written to stream (default stdout)."""
+    global _listener
+    with _lock:
+        if _listener is not None and not force:
+            return
+        if _listener is not None:
+            _listener.stop()
+        root = logging.getLogger(_ROOT)
+        for h in list(root.handlers):
+            root.removeHandler(h)
+        root.setLevel(config.LOG_LEVEL)
+        root.propagate = False
+        for name, level in config.LOG_LEVELS.items():
+            logging.getLogger(f"{_ROOT}.{name}").setLevel(str(level).upper())
+
+        out = logging.StreamHandler(stream or sys.stdout)
+        formatter_cls = TextFormatter if config.LOG_FORMAT == "text" else JsonFormatter
+        out.setFormatter(formatter_cls(redact_pii=config.LOG_REDACT))
+        q: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=config.LOG_QUEUE_MAX)
+        handler = _NonBlockingQueueHandler(q)
+        handler.addFilter(_ContextFilter())
+        root.addHandler(handler)
+        first = _listener is None
+        _listener = logging.handlers.QueueListener(q, out, respect_handler_level=True)
+        _listener.start()
+    if first:
+        # Drain what is still queued when the process exits
+        atexit.register(shutdown)
+
+
+def shutdown() -> None:
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logger(module: str) -> logging.Logger:
+    configure()
+    short = module.rsplit(".", 1)[-1] if module.startswith("src.") or module.startswith(".") else module
+    return logging.getLogger(f"{_ROOT}.{short}")
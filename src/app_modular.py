@@ -1,101 +1,269 @@
+import hmac
+import logging
+import time
+from datetime import datetime, timedelta, timezone
 from flask import Flask, request, Response
-import threading
-import requests
 from openai import InvalidWebhookSignatureError
 
 # Support both "python -m src.app_modular" and "python src/app_modular.py"
 try:
     from . import config
-    from .prompt_loader import build_system_prompt
-    from .phone_utils import extract_phone_from_event_or_request
-    from .realtime_ws import websocket_task
+    from .tenant_cache import tenant_registry
+    from .tenants import resolve_client_id
+    from .phone_utils import SipHeaders, extract_caller_phone
+    from .realtime_ws import accept_and_run_call
+    from . import metrics
+    from .call_host import call_host
+    from .admission import admission
+    from .caller_profile import caller_profiles
+    from .session_registry import ACTIONS, session_node
+    from . import aws_clients
+    from .dynamo_utils import call_log_writer, get_call_logs, iter_call_logs, list_call_logs, parse_log_time, public_log_item
+    from .tool_results import dumps
+    from .app_logging import get_logger
 except Exception:
     import os as _os, sys as _sys
     _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
     from src import config  # type: ignore
-    from src.prompt_loader import build_system_prompt  # type: ignore
-    from src.phone_utils import extract_phone_from_event_or_request  # type: ignore
-    from src.realtime_ws import websocket_task  # type: ignore
+    from src.tenant_cache import tenant_registry  # type: ignore
+    from src.tenants import resolve_client_id  # type: ignore
+    from src.phone_utils import SipHeaders, extract_caller_phone  # type: ignore
+    from src.realtime_ws import accept_and_run_call  # type: ignore
+    from src import metrics  # type: ignore
+    from src.call_host import call_host  # type: ignore
+    from src.admission import admission  # type: ignore
+    from src.caller_profile import caller_profiles  # type: ignore
+    from src.session_registry import ACTIONS, session_node  # type: ignore
+    from src import aws_clients  # type: ignore
+    from src.dynamo_utils import call_log_writer, get_call_logs, iter_call_logs, list_call_logs, parse_log_time, public_log_item  # type: ignore
+    from src.tool_results import dumps  # type: ignore
+    from src.app_logging import get_logger  # type: ignore
 
+log = get_logger("app_modular")
 app = Flask(__name__)
+call_host.install_signal_handlers()
+aws_clients.warm_up_in_background([
+    config.TASKS_TABLE_NAME, config.CALL_LOGS_TABLE_NAME, config.PROMPTS_TABLE_NAME, config.FAQ_TABLE_NAME,
+])
 
-system_prompt = build_system_prompt()
+# Prime the default tenant at boot; other tenants load on their first call and
+# everything cached is refreshed in the background (see tenant_cache)
+tenant_registry.get(config.CLIENT_ID)
+tenant_registry.start()
 
+WEBHOOK_LATENCY = metrics.histogram("webhook_seconds", "Webhook handling time until the response is returned, by event type")
+metrics.gauge("calls_active", "Live call sessions in this worker").set_function(call_host.active_count)
+metrics.gauge("call_log_queue_pending", "Call-log items waiting to be written").set_function(
+    lambda: call_log_writer().pending()
+)
+
+# "instructions" is filled per call from the tenant's current prompt snapshot
 call_accept = {
     "type": "realtime",
-    "instructions": system_prompt,
     "model": "gpt-4o-realtime-preview-2024-12-17",
 }
 
-response_create = {
-    "type": "response.create",
-    "response": {
-        "instructions": "お電話ありがとうございます。ご予約ですか？それともご質問でしょうか？"
-    },
-}
+@app.before_request
+def _join_registry():
+    # Heartbeat from the first request on (after any fork): health checks make idle workers visible
+    session_node.start()
 
 @app.get("/")
 def healthz():
     # Simple health endpoint for HTTP health checks
     return Response("ok", status=200)
 
+@app.get("/metrics")
+def metrics_endpoint():
+    # Prometheus text format; per-worker values (scrape each worker or aggregate upstream)
+    return Response(metrics.render_prometheus(), status=200, mimetype="text/plain; version=0.0.4")
+
+@app.get("/load")
+def load_endpoint():
+    # Worker load for autoscaling / load balancing: live calls, loop lag, admission state
+    return _json_response(admission.load())
+
+def _admin_denied():
+    # /admin/* needs "Authorization: Bearer $ADMIN_API_TOKEN"; without a configured token the routes do not exist
+    if not config.ADMIN_API_TOKEN:
+        return Response("Not found", status=404)
+    auth = request.headers.get("Authorization", "")
+    token = auth[7:].strip() if auth.lower().startswith("bearer ") else ""
+    if not hmac.compare_digest(token.encode(), config.ADMIN_API_TOKEN.encode()):
+        return Response("Unauthorized", status=401)
+    return None
+
+def _json_response(obj, status=200):
+    return Response(dumps(obj), status=status, mimetype="application/json")
+
+def _time_range():
+    # ?from=&to= (ISO date/datetime, UTC if no offset); default: the last 24 hours
+    end = parse_log_time(request.args.get("to")) or datetime.now(timezone.utc)
+    start = parse_log_time(request.args.get("from")) or end - timedelta(days=1)
+    return start, end
+
+@app.get("/admin/calls/<call_sid>")
+def admin_get_call(call_sid):
+    denied = _admin_denied()
+    if denied:
+        return denied
+    client_id = request.args.get("client_id") or config.CLIENT_ID
+    try:
+        call = get_call_logs(call_sid, client_id)
+    except Exception as e:
+        log.error("admin_get_call_failed", extra={"call_sid": call_sid}, exc_info=True)
+        return _json_response({"error": str(e)}, status=500)
+    if call is None:
+        return _json_response({"error": "not found"}, status=404)
+    return _json_response(call)
+
+@app.get("/admin/calls")
+def admin_list_calls():
+    denied = _admin_denied()
+    if denied:
+        return denied
+    client_id = request.args.get("client_id") or config.CLIENT_ID
+    try:
+        start, end = _time_range()
+        limit = max(1, min(1000, int(request.args.get("limit", "100"))))
+    except ValueError as e:
+        return _json_response({"error": str(e)}, status=400)
+    try:
+        page = list_call_logs(start, end, client_id, limit=limit, cursor=request.args.get("cursor"))
+    except Exception as e:
+        log.error("admin_list_calls_failed", exc_info=True)
+        return _json_response({"error": str(e)}, status=500)
+    return _json_response(page)
+
+@app.get("/admin/calls/export")
+def admin_export_calls():
+    # NDJSON, one app-logs item per line, streamed as the pages arrive (nothing buffered per request)
+    denied = _admin_denied()
+    if denied:
+        return denied
+    client_id = request.args.get("client_id") or config.CLIENT_ID
+    try:
+        start, end = _time_range()
+    except ValueError as e:
+        return _json_response({"error": str(e)}, status=400)
+
+    def _lines():
+        n = 0
+        try:
+            for item in iter_call_logs(start, end, client_id):
+                n += 1
+                yield dumps(public_log_item(item)) + "\n"
+        except Exception as e:
+            log.error("admin_export_failed", extra={"items": n}, exc_info=True)
+            yield dumps({"error": str(e)}) + "\n"
+
+    return Response(_lines(), status=200, mimetype="application/x-ndjson")
+
+@app.get("/admin/sessions")
+def admin_sessions():
+    # Every live node and call lease in the session registry (all containers)
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        return _json_response(session_node.cluster())
+    except Exception as e:
+        log.error("admin_sessions_failed", exc_info=True)
+        return _json_response({"error": str(e)}, status=503)
+
+@app.get("/admin/sessions/<call_id>")
+@app.get("/admin/sessions/<call_id>/<action>")
+@app.post("/admin/sessions/<call_id>/<action>")
+def admin_session_action(call_id, action="status"):
+    # Routed to the node that owns the call: status, transcript (?tail=N), hangup (POST)
+    denied = _admin_denied()
+    if denied:
+        return denied
+    if action not in ACTIONS:
+        return _json_response({"error": f"unknown action: {action}"}, status=404)
+    if (action == "hangup") != (request.method == "POST"):
+        return _json_response({"error": "hangup is POST, status/transcript are GET"}, status=405)
+    try:
+        args = {"tail": max(0, int(request.args.get("tail", "0")))}
+    except ValueError as e:
+        return _json_response({"error": str(e)}, status=400)
+    try:
+        fut = call_host.run_coroutine(session_node.route(call_id, action, args))
+        status, body = fut.result(timeout=config.SESSION_ROUTE_TIMEOUT + 5)
+    except Exception as e:
+        log.error("admin_session_action_failed", extra={"call_id": call_id, "action": action}, exc_info=True)
+        return _json_response({"error": str(e)}, status=500)
+    return _json_response(body, status=status)
+
 @app.route("/", methods=["POST"])
-def webhook():
+@app.route("/t/<client_id>", methods=["POST"])
+def webhook(client_id=None):
+    started = time.perf_counter()
+    received_at = time.monotonic()
+    event_type = "invalid"
     try:
+        # Signature verification stays synchronous: nothing is scheduled for unverified requests
         event = config.openai_client.webhooks.unwrap(request.data, request.headers)
-        print("[event] type:", getattr(event, "type", None))
-        try:
-            print("[event] raw data:", getattr(event, "data", None))
-        except Exception:
-            pass
-
-        # Try to extract Twilio CallSid from SIP headers if present
-        def _extract_twilio_call_sid(evt) -> str | None:
-            try:
-                data = getattr(evt, "data", None)
-                sip_headers = None
-                if data is not None:
-                    if isinstance(data, dict):
-                        sip_headers = data.get("sip_headers")
-                    else:
-                        sip_headers = getattr(data, "sip_headers", None)
-                if sip_headers:
-                    for h in sip_headers:
-                        name = h.get("name") if isinstance(h, dict) else getattr(h, "name", None)
-                        value = h.get("value") if isinstance(h, dict) else getattr(h, "value", None)
-                        if name and name.lower() in ("x-twilio-callsid", "twilio-callsid"):
-                            if value:
-                                return str(value).strip()
-            except Exception:
-                pass
-            return None
-
-        phone_number = extract_phone_from_event_or_request(event, request)
-        print("[phone] extracted:", phone_number)
-        twilio_call_sid = _extract_twilio_call_sid(event)
-        print("[twilio] CallSid:", twilio_call_sid)
+        event_type = getattr(event, "type", None) or "unknown"
+        # Raw event data (SIP headers, caller number) only at DEBUG, phone numbers masked
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("webhook_event_data", extra={"event_type": event_type, "data": str(getattr(event, "data", None))})
+
+        # One pass over the SIP headers: caller, Twilio CallSid, dialed number, tenant headers
+        sip = SipHeaders.from_event(event)
+        phone_number, phone_source = extract_caller_phone(event, request, sip)
+        twilio_call_sid = sip.call_sid
+        log.info("webhook_event", extra={"event_type": event_type, "phone_number": phone_number,
+                                         "twilio_call_sid": twilio_call_sid})
 
         if event.type == "realtime.call.incoming":
-            requests.post(
-                "https://api.openai.com/v1/realtime/calls/" + event.data.call_id + "/accept",
-                headers={**config.AUTH_HEADER, "Content-Type": "application/json"},
-                json=call_accept,
-            )
-            threading.Thread(
-                target=lambda: __import__("asyncio").run(
-                    websocket_task(
-                        event.data.call_id,
-                        phone_number=phone_number,
-                        response_create=response_create,
-                        twilio_call_sid=twilio_call_sid,
-                    )
+            call_id = event.data.call_id
+            tenant_id = resolve_client_id(event, client_id, sip)
+            admit, reason = admission.check()
+            if reason == "draining":
+                # Shutting down: 503 so the event is delivered again (to another instance)
+                log.warning("no_capacity", extra={"call_id": call_id, "client_id": tenant_id, "reason": reason})
+                return Response("Busy", status=503)
+            if not admit:
+                # Overloaded: answer the call with the overload action; live calls keep their headroom
+                call_host.run_coroutine(admission.shed(call_id, call_accept, reason))
+                return Response(status=200)
+            # Caller's reservations / last call load while the call is being accepted
+            # (never for the DEFAULT_PHONE_NUMBER stand-in: that is someone else's record)
+            if phone_source != "default":
+                caller_profiles.prefetch(call_id, tenant_id, phone_number)
+            # Fast ack: accept + WS session run on the call host; the webhook returns right away
+            admitted = call_host.submit(
+                call_id,
+                lambda: accept_and_run_call(
+                    call_id,
+                    call_accept,
+                    tenant_id,
+                    phone_number=phone_number,
+                    twilio_call_sid=twilio_call_sid,
+                    received_at=received_at,
                 ),
-                daemon=True,
-            ).start()
+                phone_number=phone_number,
+                twilio_call_sid=twilio_call_sid,
+                client_id=tenant_id,
+            )
+            if admitted:
+                admission.admitted()
+                return Response(status=200)
+            caller_profiles.discard(call_id)
+            if call_host.draining:
+                # Started draining since admission.check(): redeliver elsewhere, like above
+                return Response("Busy", status=503)
+            if call_host.get_session(call_id) is None:
+                # Host full (MAX_CONCURRENT_CALLS): the call still needs exactly one call-control action.
+                # A duplicate delivery of a live call is skipped: that call was already accepted
+                call_host.run_coroutine(admission.shed(call_id, call_accept, "capacity"))
             return Response(status=200)
     except InvalidWebhookSignatureError as e:
-        print("Invalid signature", e)
+        log.warning("invalid_signature", extra={"error": str(e)})
         return Response("Invalid signature", status=400)
+    finally:
+        WEBHOOK_LATENCY.observe(time.perf_counter() - started, event_type=event_type)
 
 if __name__ == "__main__":
     app.run(port=8000)
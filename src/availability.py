@@ -0,0 +1,266 @@
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Key
+
+from . import aws_clients
+from . import config
+
+try:
+    from zoneinfo import ZoneInfo
+    _TZ = ZoneInfo(config.BUSINESS_TIMEZONE)
+except Exception:
+    from datetime import timezone
+    _TZ = timezone(timedelta(hours=9))
+
+# start_datetime is free-form text from the model/caller; these cover the shapes we see
+# ("2025-12-24 19:00", "2025/12/24T19:00", "12月24日 19時半", "午後7時", ...) after NFKC
+_DATE_YMD = re.compile(r"(\d{4})\s*[-/.年]\s*(\d{1,2})\s*[-/.月]\s*(\d{1,2})\s*日?")
+_DATE_MD = re.compile(r"(?<!\d)(\d{1,2})\s*[/月]\s*(\d{1,2})\s*日?")
+_TIME = re.compile(r"(午前|午後|AM|PM|am|pm)?\s*(\d{1,2})\s*(?::|時)\s*(\d{1,2}|半)?\s*分?\s*(AM|PM|am|pm)?")
+_RELATIVE_DAYS = {"今日": 0, "本日": 0, "today": 0, "明日": 1, "あした": 1, "tomorrow": 1, "明後日": 2, "あさって": 2}
+
+
+def now_local() -> datetime:
+    return datetime.now(_TZ).replace(tzinfo=None)
+
+
+def parse_date(value: Any, today: Optional[date] = None) -> Optional[date]:
+    if value is None:
+        return None
+    text = unicodedata.normalize("NFKC", str(value)).strip()
+    today = today or now_local().date()
+    m = _DATE_YMD.search(text)
+    try:
+        if m:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        m = _DATE_MD.search(text)
+        if m:
+            d = date(today.year, int(m.group(1)), int(m.group(2)))
+            # "12/24" said in January means next year's date
+            return d if d >= today - timedelta(days=30) else date(today.year + 1, d.month, d.day)
+    except ValueError:
+        return None
+    for word, offset in _RELATIVE_DAYS.items():
+        if word in text:
+            return today + timedelta(days=offset)
+    return None
+
+
+def parse_datetime(value: Any, today: Optional[date] = None) -> Optional[datetime]:
+    """Start datetime from free-form text; None when there is no date or no time in it."""
+    if value is None:
+        return None
+    text = unicodedata.normalize("NFKC", str(value)).strip()
+    d = parse_date(text, today)
+    if d is None:
+        return None
+    rest = _DATE_YMD.sub(" ", text, count=1)
+    if rest == text:
+        rest = _DATE_MD.sub(" ", text, count=1)
+    m = _TIME.search(rest)
+    if not m:
+        return None
+    hour = int(m.group(2))
+    minute = 30 if m.group(3) == "半" else int(m.group(3) or 0)
+    ampm = (m.group(1) or m.group(4) or "").lower()
+    if ampm in ("午後", "pm") and hour < 12:
+        hour += 12
+    elif ampm in ("午前", "am") and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return datetime(d.year, d.month, d.day, hour, minute)
+
+
+def parse_time_of_day(value: Any) -> Optional[Tuple[int, int]]:
+    if value is None:
+        return None
+    m = _TIME.search(unicodedata.normalize("NFKC", str(value)))
+    if not m:
+        return None
+    dt = parse_datetime("2000-01-01 " + m.group(0))
+    return (dt.hour, dt.minute) if dt else None
+
+
+def slot_attributes(client_id: str, start_datetime: Any) -> Dict[str, str]:
+    """Normalized attributes written next to start_datetime for the date GSI."""
+    dt = parse_datetime(start_datetime)
+    if dt is None:
+        return {}
+    return {"slot_date": f"{client_id}#{dt.date().isoformat()}", "slot_start": dt.strftime("%Y-%m-%dT%H:%M")}
+
+
+def _slot_start(item: Dict[str, Any], legacy: bool = True) -> Optional[datetime]:
+    # Absolute slot_start (see slot_attributes); items written before it existed only have start_datetime
+    try:
+        return datetime.strptime(item["slot_start"], "%Y-%m-%dT%H:%M")
+    except (KeyError, TypeError, ValueError):
+        return parse_datetime(item.get("start_datetime")) if legacy else None
+
+
+def _business_hours() -> Tuple[int, int]:
+    try:
+        open_s, close_s = config.BUSINESS_HOURS.split("-", 1)
+        oh, om = (int(x) for x in open_s.strip().split(":"))
+        ch, cm = (int(x) for x in close_s.strip().split(":"))
+        return oh * 60 + om, ch * 60 + cm
+    except Exception:
+        return 0, 24 * 60
+
+
+def within_business_hours(start: datetime, duration: timedelta) -> bool:
+    """True when [start, start + duration) lies inside BUSINESS_HOURS of start's day."""
+    open_min, close_min = _business_hours()
+    midnight = datetime(start.year, start.month, start.day)
+    return (midnight + timedelta(minutes=open_min) <= start
+            and start + duration <= midnight + timedelta(minutes=close_min))
+
+
+class SlotIndex:
+    """Reservation start times of one day in sorted order; overlap queries are two bisects.
+
+    Every reservation occupies the same slot length, so anything starting in
+    (start - slot, end) overlaps [start, end).
+    """
+
+    def __init__(self, entries: Iterable[Tuple[datetime, str]] = (), slot_minutes: Optional[int] = None):
+        self.slot = timedelta(minutes=slot_minutes or config.RESERVATION_SLOT_MINUTES)
+        pairs = sorted(entries)
+        self.starts: List[datetime] = [p[0] for p in pairs]
+        self.names: List[str] = [p[1] for p in pairs]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add(self, start: datetime, name: str) -> None:
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.names.insert(i, name)
+
+    def overlapping(self, start: datetime, end: datetime) -> List[str]:
+        lo = bisect_right(self.starts, start - self.slot)
+        hi = bisect_left(self.starts, end)
+        return self.names[lo:hi]
+
+    def count(self, start: datetime, end: datetime) -> int:
+        return max(0, bisect_left(self.starts, end) - bisect_right(self.starts, start - self.slot))
+
+    def is_free(self, start: datetime, duration: timedelta, capacity: Optional[int] = None) -> bool:
+        return self.count(start, start + duration) < (capacity or config.RESERVATION_CAPACITY)
+
+    def free_slots(self, day: date, duration: timedelta, after: Optional[datetime] = None,
+                   limit: int = 5, step_minutes: Optional[int] = None) -> List[datetime]:
+        open_min, close_min = _business_hours()
+        step = timedelta(minutes=step_minutes or config.AVAILABILITY_STEP_MINUTES)
+        t = datetime(day.year, day.month, day.day) + timedelta(minutes=open_min)
+        last = datetime(day.year, day.month, day.day) + timedelta(minutes=close_min) - duration
+        if after is not None and after > t:
+            # Round up to the step grid
+            k = -(-(after - t) // step)
+            t = t + k * step
+        out: List[datetime] = []
+        while t <= last and len(out) < limit:
+            if self.is_free(t, duration):
+                out.append(t)
+            t += step
+        return out
+
+
+class AvailabilityCache:
+    """Per-tenant, per-day SlotIndex built from app-tasks and kept for AVAILABILITY_CACHE_TTL.
+
+    With AVAILABILITY_INDEX_NAME set only the requested day is read (date GSI); otherwise
+    the tenant partition is read once (name/start_datetime only) and split by day.
+    Writes through tools_impl invalidate the tenant in this worker.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._days: Dict[Tuple[str, date], Tuple[float, SlotIndex]] = {}
+        self._full: Dict[str, float] = {}
+        self.stats = {"hits": 0, "loads": 0, "rows_read": 0}
+
+    def day(self, client_id: str, d: date) -> SlotIndex:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._days.get((client_id, d))
+            if entry is not None and entry[0] > now:
+                self.stats["hits"] += 1
+                return entry[1]
+            if not config.AVAILABILITY_INDEX_NAME and self._full.get(client_id, 0) > now:
+                self.stats["hits"] += 1
+                return SlotIndex()
+        if config.AVAILABILITY_INDEX_NAME:
+            rows = self._query_day(client_id, d)
+            days = {d: SlotIndex(rows)}
+        else:
+            rows = self._query_tenant(client_id)
+            by_day: Dict[date, List[Tuple[datetime, str]]] = {}
+            for start, name in rows:
+                by_day.setdefault(start.date(), []).append((start, name))
+            days = {k: SlotIndex(v) for k, v in by_day.items()}
+            days.setdefault(d, SlotIndex())
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self.stats["loads"] += 1
+            self.stats["rows_read"] += len(rows)
+            if not config.AVAILABILITY_INDEX_NAME:
+                for key in [k for k in self._days if k[0] == client_id]:
+                    del self._days[key]
+                self._full[client_id] = expires
+            for k, index in days.items():
+                self._days[(client_id, k)] = (expires, index)
+        return days[d]
+
+    def invalidate(self, client_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._days if k[0] == client_id]:
+                del self._days[key]
+            self._full.pop(client_id, None)
+
+    def _query_day(self, client_id: str, d: date) -> List[Tuple[datetime, str]]:
+        table = aws_clients.dynamodb_table(config.TASKS_TABLE_NAME)
+        kwargs: Dict[str, Any] = {
+            "IndexName": config.AVAILABILITY_INDEX_NAME,
+            "KeyConditionExpression": Key("slot_date").eq(f"{client_id}#{d.isoformat()}"),
+        }
+        rows: List[Tuple[datetime, str]] = []
+        while True:
+            res = table.query(**kwargs)
+            for it in res.get("Items", []):
+                start = _slot_start(it, legacy=False)
+                if start is not None:
+                    rows.append((start, str(it.get("name", ""))))
+            if "LastEvaluatedKey" not in res:
+                return rows
+            kwargs["ExclusiveStartKey"] = res["LastEvaluatedKey"]
+
+    def _query_tenant(self, client_id: str) -> List[Tuple[datetime, str]]:
+        table = aws_clients.dynamodb_table(config.TASKS_TABLE_NAME)
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("client_id").eq(client_id),
+            "ProjectionExpression": "#n, start_datetime, slot_start",
+            "ExpressionAttributeNames": {"#n": "name"},
+        }
+        rows: List[Tuple[datetime, str]] = []
+        while True:
+            res = table.query(**kwargs)
+            for it in res.get("Items", []):
+                # slot_start was resolved when the reservation was written; re-parsing the
+                # free-form text would move "明日 19時" a day later every day it stays cached
+                start = _slot_start(it)
+                if start is not None:
+                    rows.append((start, str(it.get("name", ""))))
+            if "LastEvaluatedKey" not in res:
+                return rows
+            kwargs["ExclusiveStartKey"] = res["LastEvaluatedKey"]
+
+
+availability_cache = AvailabilityCache(config.AVAILABILITY_CACHE_TTL)
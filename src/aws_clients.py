@@ -0,0 +1,119 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import boto3
+    from botocore.config import Config
+except Exception:
+    boto3 = None
+
+from . import config
+from .app_logging import get_logger
+
+log = get_logger(__name__)
+
+# boto3 resources (and the Table objects made from them) are not thread-safe, so each thread
+# gets its own resource and Table cache. They all come from one session per worker process,
+# so credentials and endpoint data are resolved once; each resource keeps its own pooled,
+# keep-alive connections.
+_lock = threading.Lock()
+_session = None
+_generation = 0
+_local = threading.local()
+
+
+def _client_config():
+    return Config(
+        region_name=config.AWS_REGION,
+        max_pool_connections=config.DDB_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=config.DDB_CONNECT_TIMEOUT,
+        read_timeout=config.DDB_READ_TIMEOUT,
+        retries={"max_attempts": 3, "mode": "standard"},
+    )
+
+
+def _thread_state() -> Dict[str, Any]:
+    state = getattr(_local, "state", None)
+    if state is None or state["generation"] != _generation:
+        state = {"generation": _generation, "resource": None, "tables": {}}
+        _local.state = state
+    return state
+
+
+def dynamodb_resource():
+    """This thread's DynamoDB resource (None when boto3 is unavailable); never hand it to another thread."""
+    global _session
+    if boto3 is None:
+        return None
+    state = _thread_state()
+    if state["resource"] is not None:
+        return state["resource"]
+    kwargs: Dict[str, Any] = {"config": _client_config()}
+    if config.DYNAMODB_ENDPOINT_URL:
+        kwargs["endpoint_url"] = config.DYNAMODB_ENDPOINT_URL
+    # Session objects are not thread-safe either; creating resources from the shared one is serialized
+    with _lock:
+        if _session is None:
+            log.info("dynamodb_init", extra={"region": config.AWS_REGION, "pool": config.DDB_MAX_POOL_CONNECTIONS})
+            _session = boto3.session.Session()
+        state["resource"] = _session.resource("dynamodb", **kwargs)
+    return state["resource"]
+
+
+def dynamodb_client():
+    # Low-level client of this thread's resource
+    res = dynamodb_resource()
+    return res.meta.client if res is not None else None
+
+
+def dynamodb_table(table_name: str):
+    tables = _thread_state()["tables"]
+    table = tables.get(table_name)
+    if table is not None:
+        return table
+    res = dynamodb_resource()
+    if res is None:
+        raise RuntimeError("boto3 not available")
+    table = res.Table(table_name)
+    tables[table_name] = table
+    return table
+
+
+def warm_up(table_names: Optional[Iterable[str]] = None) -> Optional[float]:
+    """Resolve credentials and open a pooled connection before the first call needs it.
+
+    Credentials live on the shared session, so every thread benefits; the warm connection
+    belongs to the calling thread's resource.
+    """
+    started = time.perf_counter()
+    try:
+        client = dynamodb_client()
+        if client is None:
+            return None
+        for name in table_names or ():
+            dynamodb_table(name)
+        try:
+            # Any response (even AccessDenied) leaves a warm TLS connection in the pool
+            client.describe_endpoints()
+        except Exception as e:
+            log.info("warm_up_request_failed", extra={"error": type(e).__name__})
+        elapsed = time.perf_counter() - started
+        log.info("warm_up_done", extra={"ms": round(elapsed * 1000, 1)})
+        return elapsed
+    except Exception:
+        log.warning("warm_up_failed", exc_info=True)
+        return None
+
+
+def warm_up_in_background(table_names: Optional[Iterable[str]] = None) -> None:
+    threading.Thread(target=warm_up, args=(list(table_names or ()),), name="aws-warm-up", daemon=True).start()
+
+
+def reset() -> None:
+    # Drop cached handles (tests/benchmarks that switch endpoints); other threads rebuild theirs lazily
+    global _session, _generation
+    with _lock:
+        _session = None
+        _generation += 1
@@ -0,0 +1,181 @@
+import asyncio
+import atexit
+import signal
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from . import config
+from .app_logging import bind_call, get_logger
+
+log = get_logger(__name__)
+
+
+class CallHost:
+    """One long-lived event loop per worker process; every live call runs on it as a task."""
+
+    def __init__(self, max_concurrent_calls: int, drain_timeout: float):
+        self.max_concurrent_calls = max_concurrent_calls
+        self.drain_timeout = drain_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._draining = False
+        self._idle = threading.Event()
+        self._idle.set()
+
+    # ---- lifecycle ----
+    def start(self) -> asyncio.AbstractEventLoop:
+        # Started lazily so that a preloading master never forks a live loop thread
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_run, name="call-host", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            log.info("started", extra={"max_concurrent_calls": self.max_concurrent_calls})
+            return loop
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self.start()
+
+    @property
+    def draining(self) -> bool:
+        return self._draining
+
+    # ---- registry ----
+    def active_count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def has_capacity(self) -> bool:
+        return not self._draining and self.active_count() < self.max_concurrent_calls
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "call_id": call_id,
+                    "started_at": s["started_at"],
+                    "age_seconds": round(now - s["started_at"], 3),
+                    **s["info"],
+                }
+                for call_id, s in self._sessions.items()
+            ]
+
+    def get_session(self, call_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._sessions.get(call_id)
+
+    def attach(self, call_id: str, **handles: Any) -> None:
+        """Hang per-call objects (e.g. the LiveCall) on a session entry."""
+        with self._lock:
+            entry = self._sessions.get(call_id)
+            if entry is not None:
+                entry.update(handles)
+
+    # ---- scheduling ----
+    def submit(self, call_id: str, coro_factory: Callable[[], Awaitable[Any]], **info: Any) -> bool:
+        """Schedule a call session on the host loop; False when draining, full or duplicate."""
+        loop = self.start()
+        with self._lock:
+            if self._draining:
+                log.warning("refused_draining", extra={"call_id": call_id})
+                return False
+            if call_id in self._sessions:
+                log.warning("duplicate_call_ignored", extra={"call_id": call_id})
+                return False
+            if len(self._sessions) >= self.max_concurrent_calls:
+                log.warning("refused_at_capacity", extra={"call_id": call_id})
+                return False
+            self._sessions[call_id] = {"started_at": time.time(), "info": info, "task": None}
+            self._idle.clear()
+
+        async def _runner():
+            # Every record logged from this call's task carries its call_id
+            bind_call(call_id)
+            entry = self.get_session(call_id)
+            if entry is not None:
+                entry["task"] = asyncio.current_task()
+            try:
+                await coro_factory()
+            except asyncio.CancelledError:
+                log.info("call_cancelled")
+            except Exception:
+                log.error("call_failed", exc_info=True)
+            finally:
+                self._release(call_id)
+
+        asyncio.run_coroutine_threadsafe(_runner(), loop)
+        return True
+
+    def run_coroutine(self, coro: Awaitable[Any]):
+        """Schedule a helper coroutine (not a call session) on the host loop."""
+        return asyncio.run_coroutine_threadsafe(coro, self.start())
+
+    def _release(self, call_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(call_id, None)
+            if not self._sessions:
+                self._idle.set()
+
+    # ---- shutdown ----
+    def begin_drain(self) -> None:
+        if not self._draining:
+            self._draining = True
+            log.info("draining", extra={"active_calls": self.active_count()})
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Stop taking calls and wait for live ones to end; cancel stragglers after timeout."""
+        self.begin_drain()
+        if self._loop is None:
+            return True
+        t = self.drain_timeout if timeout is None else timeout
+        if self._idle.wait(t):
+            return True
+        with self._lock:
+            tasks = [s["task"] for s in self._sessions.values() if s.get("task") is not None]
+        log.warning("drain_timeout_cancelling", extra={"calls": len(tasks)})
+        for task in tasks:
+            self._loop.call_soon_threadsafe(task.cancel)
+        return self._idle.wait(5.0)
+
+    def install_signal_handlers(self) -> None:
+        # Chain onto SIGTERM so the server's own shutdown (e.g. gunicorn's) still runs
+        if threading.current_thread() is not threading.main_thread():
+            return
+        try:
+            previous = signal.getsignal(signal.SIGTERM)
+        except Exception:
+            return
+
+        def _on_sigterm(signum, frame):
+            self.begin_drain()
+            if callable(previous):
+                previous(signum, frame)
+            elif previous == signal.SIG_DFL:
+                raise SystemExit(0)
+
+        try:
+            signal.signal(signal.SIGTERM, _on_sigterm)
+        except Exception as e:
+            log.warning("sigterm_handler_not_installed", extra={"error": repr(e)})
+        atexit.register(self.drain)
+
+
+call_host = CallHost(
+    max_concurrent_calls=config.MAX_CONCURRENT_CALLS,
+    drain_timeout=config.CALL_DRAIN_TIMEOUT,
+)
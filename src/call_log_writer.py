@@ -0,0 +1,301 @@
+import asyncio
+import base64
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .app_logging import get_logger
+
+log = get_logger(__name__)
+
+# DynamoDB BatchWriteItem hard limit
+BATCH_SIZE = 25
+
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "spill")
+
+
+# Queue entry: (table name, item, tag). The tag (the item's call_sid by default) lets a
+# call wait for its own items only (wait_for), not for the whole worker's backlog
+Entry = Tuple[str, Dict[str, Any], Optional[str]]
+
+
+class CallLogWriter:
+    """Bounded in-memory log queue drained by a background batch writer thread.
+
+    The WS loop only ever enqueues; the DynamoDB round trips happen on the writer thread.
+    """
+
+    def __init__(self, resource_factory: Callable[[], Any], max_queue: int = 10000,
+                 policy: str = "drop_oldest", spill_path: Optional[str] = None,
+                 block_timeout: float = 1.0, linger: float = 0.05, max_retries: int = 5,
+                 key_attrs: Tuple[str, ...] = ("client_id", "sk")):
+        if policy not in BACKPRESSURE_POLICIES:
+            log.warning("unknown_backpressure_policy", extra={"policy": policy})
+            policy = "drop_oldest"
+        self._resource_factory = resource_factory
+        self._queue: "queue.Queue[Entry]" = queue.Queue(maxsize=max_queue)
+        self.policy = policy
+        self.spill_path = spill_path
+        self.block_timeout = block_timeout
+        self.linger = linger
+        self.max_retries = max_retries
+        self.key_attrs = key_attrs
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._pending = 0
+        self._pending_cv = threading.Condition()
+        # Items not yet written per tag, and the call-end waiters on each tag
+        self._tags: Dict[str, int] = {}
+        self._waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[bool]"]]] = {}
+        # "block" from an event loop thread: the wait for room runs here, never on the loop
+        self._block_executor: Optional[ThreadPoolExecutor] = None
+        # Updated from the loop, the writer thread and the block executor
+        self._stats_lock = threading.Lock()
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "retries": 0,
+                      "dropped": 0, "spilled": 0, "failed": 0, "coalesced": 0,
+                      "write_units": 0}
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="call-log-writer", daemon=True)
+                self._thread.start()
+
+    # ---- producer side (called from the WS loop; never does network I/O) ----
+    def enqueue(self, table_name: str, item: Dict[str, Any], tag: Optional[str] = None) -> bool:
+        self.start()
+        entry: Entry = (table_name, item, tag or item.get("call_sid"))
+        with self._pending_cv:
+            self._pending += 1
+            if entry[2]:
+                self._tags[entry[2]] = self._tags.get(entry[2], 0) + 1
+        try:
+            self._queue.put_nowait(entry)
+            self._count("enqueued")
+            return True
+        except queue.Full:
+            pass
+        if self.policy == "block":
+            deadline = time.monotonic() + self.block_timeout
+            if _on_event_loop():
+                # Never park the call host loop (every live call on the worker): hand the wait
+                # off; the entry still counts as pending, so flush()/wait_for() cover it
+                self._block_pool().submit(self._put_blocking, entry, deadline)
+                return True
+            return self._put_blocking(entry, deadline)
+        if self.policy == "spill":
+            self._spill([entry], reason="queue_full")
+            self._done([entry])
+            return False
+        # drop_oldest
+        try:
+            oldest = self._queue.get_nowait()
+            self._count("dropped")
+            self._done([oldest])
+        except queue.Empty:
+            pass
+        try:
+            self._queue.put_nowait(entry)
+            self._count("enqueued")
+            return True
+        except queue.Full:
+            self._count("dropped")
+            self._done([entry])
+            return False
+
+    def _put_blocking(self, entry: Entry, deadline: float) -> bool:
+        try:
+            self._queue.put(entry, timeout=max(0.0, deadline - time.monotonic()))
+            self._count("enqueued")
+            return True
+        except queue.Full:
+            log.warning("queue_full_dropping", extra={"sample": "log_writer_queue_full"})
+            self._count("dropped")
+            self._done([entry])
+            return False
+
+    def _block_pool(self) -> ThreadPoolExecutor:
+        with self._start_lock:
+            if self._block_executor is None:
+                # One thread keeps the handed-off entries in order; each gives up at its own deadline
+                self._block_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="call-log-block")
+            return self._block_executor
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything enqueued so far is written (or given up on)."""
+        deadline = time.monotonic() + timeout
+        with self._pending_cv:
+            while self._pending > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    log.warning("flush_timeout", extra={"pending": self._pending})
+                    return False
+                self._pending_cv.wait(remaining)
+        return True
+
+    async def wait_for(self, tag: str, timeout: float = 5.0) -> bool:
+        """Wait (without a thread) until every item enqueued under tag is written or given up on."""
+        loop = asyncio.get_running_loop()
+        fut: "asyncio.Future[bool]" = loop.create_future()
+        with self._pending_cv:
+            if not self._tags.get(tag):
+                return True
+            waiter = (loop, fut)
+            self._waiters.setdefault(tag, []).append(waiter)
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            log.warning("flush_timeout", extra={"pending": self._tags.get(tag, 0)})
+            return False
+        finally:
+            with self._pending_cv:
+                waiters = self._waiters.get(tag)
+                if waiters and waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del self._waiters[tag]
+
+    def pending(self) -> int:
+        with self._pending_cv:
+            return self._pending
+
+    # ---- consumer side ----
+    def _done(self, entries: List[Entry]) -> None:
+        with self._pending_cv:
+            self._pending -= len(entries)
+            if self._pending <= 0:
+                self._pending = 0
+                self._pending_cv.notify_all()
+            for _, _, tag in entries:
+                if not tag:
+                    continue
+                left = self._tags.get(tag, 0) - 1
+                if left > 0:
+                    self._tags[tag] = left
+                    continue
+                self._tags.pop(tag, None)
+                for loop, fut in self._waiters.pop(tag, []):
+                    loop.call_soon_threadsafe(_resolve, fut)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception:
+                log.error("batch_write_failed", extra={"items": len(batch)}, exc_info=True)
+                self._count("failed", len(batch))
+                self._spill(batch, reason="write_failed")
+            finally:
+                self._done(batch)
+
+    def _write_batch(self, batch: List[Entry]) -> None:
+        ddb = self._resource_factory()
+        if not ddb:
+            log.error("no_dynamodb", extra={"items": len(batch)})
+            self._count("failed", len(batch))
+            self._spill(batch, reason="no_ddb")
+            return
+        # BatchWriteItem rejects two puts to one key (transcript checkpoints rewrite theirs): last one wins
+        latest: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        for table_name, item, _ in batch:
+            key = tuple(item.get(k) for k in self.key_attrs)
+            if (table_name, key) in latest:
+                self._count("coalesced")
+                del latest[(table_name, key)]
+            latest[(table_name, key)] = item
+        request_items: Dict[str, List[Dict[str, Any]]] = {}
+        for (table_name, _), item in latest.items():
+            request_items.setdefault(table_name, []).append({"PutRequest": {"Item": item}})
+            # Standard tables bill one write unit per started KB of item
+            self._count("write_units", -(-_item_size(item) // 1024))
+        attempt = 0
+        self._count("batches")
+        while request_items:
+            res = ddb.batch_write_item(RequestItems=request_items)
+            unprocessed = res.get("UnprocessedItems") or {}
+            sent = sum(len(v) for v in request_items.values())
+            left = sum(len(v) for v in unprocessed.values())
+            self._count("written", sent - left)
+            if not left:
+                return
+            attempt += 1
+            if attempt > self.max_retries:
+                log.error("unprocessed_items_given_up", extra={"items": left})
+                self._count("failed", left)
+                self._spill([(t, r["PutRequest"]["Item"], None) for t, reqs in unprocessed.items() for r in reqs],
+                            reason="unprocessed")
+                return
+            self._count("retries")
+            time.sleep(min(2.0, 0.05 * (2 ** attempt)))
+            request_items = unprocessed
+
+    def _spill(self, entries: List[Entry], reason: str) -> None:
+        if not self.spill_path:
+            self._count("dropped", len(entries))
+            return
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for table_name, item, _ in entries:
+                    f.write(json.dumps({"table": table_name, "reason": reason, "item": item},
+                                       ensure_ascii=False, default=_json_default) + "\n")
+            self._count("spilled", len(entries))
+        except Exception:
+            log.error("spill_failed", extra={"items": len(entries)}, exc_info=True)
+            self._count("dropped", len(entries))
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def _resolve(fut: "asyncio.Future[bool]") -> None:
+    if not fut.done():
+        fut.set_result(True)
+
+
+def _item_size(value: Any) -> int:
+    # Approximate DynamoDB item size: attribute names plus values
+    if isinstance(value, dict):
+        return sum(len(str(k)) + _item_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sum(_item_size(v) for v in value)
+    raw = getattr(value, "value", value)
+    if isinstance(raw, (bytes, bytearray)):
+        return len(raw)
+    if isinstance(raw, str):
+        return len(raw.encode("utf-8"))
+    return 21 if isinstance(raw, (int, float, Decimal)) else 1
+
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, Decimal):
+        return int(o) if o == o.to_integral_value() else float(o)
+    raw = getattr(o, "value", o)  # boto3 Binary
+    if isinstance(raw, (bytes, bytearray)):
+        return {"__b64__": base64.b64encode(bytes(raw)).decode()}
+    return str(o)
@@ -0,0 +1,150 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import metrics
+
+WEBHOOK_TO_ACCEPT = metrics.histogram("call_webhook_to_accept_seconds", "Webhook received -> /accept returned")
+ACCEPT_TO_WS_OPEN = metrics.histogram("call_accept_to_ws_open_seconds", "/accept returned -> Realtime WS open")
+ACCEPT_TO_GREETING = metrics.histogram("call_accept_to_greeting_seconds",
+                                       "/accept sent -> greeting response.create sent (accept and WS open pipelined)")
+GREETING_TO_FIRST_AUDIO = metrics.histogram("call_greeting_to_first_audio_seconds",
+                                            "Greeting response.create sent -> first audio delta")
+TURN_LATENCY = metrics.histogram("call_turn_latency_seconds",
+                                 "input_audio_buffer.committed -> first response delta of the reply")
+CALL_DURATION = metrics.histogram("call_duration_seconds", "Realtime WS session length",
+                                  buckets=(10, 30, 60, 120, 300, 600, 1200, 1800, 3600))
+TOOL_RESPONSE_LATENCY = metrics.histogram("tool_response_latency_seconds",
+                                          "function_call_output sent -> first output of the model's reply, by tool")
+CALLS_TOTAL = metrics.counter("calls_total", "Finished call sessions by outcome")
+WS_RECONNECTS = metrics.counter("ws_reconnects_total", "Realtime WS reconnect attempts by outcome")
+WS_RECONNECT_GAP = metrics.histogram("ws_reconnect_gap_seconds", "Realtime WS dropped -> reconnected (no audio meanwhile)",
+                                     buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30))
+
+# First output of a reply: audio if the session speaks, transcript/text otherwise
+FIRST_OUTPUT_EVENTS = (
+    "response.output_audio.delta",
+    "response.audio.delta",
+    "response.output_audio_transcript.delta",
+    "response.audio_transcript.delta",
+    "response.output_text.delta",
+)
+AUDIO_DELTA_EVENTS = ("response.output_audio.delta", "response.audio.delta")
+
+
+class CallMetrics:
+    """Per-call timing recorder fed from the WS event loop; one summary dict at hangup."""
+
+    def __init__(self, call_id: str, received_at: Optional[float] = None):
+        self.call_id = call_id
+        self.marks: Dict[str, float] = {}
+        if received_at is not None:
+            self.marks["webhook_received"] = received_at
+        self.turn_latencies: List[float] = []
+        self.tool_timings: List[Dict[str, Any]] = []
+        # Per-tool cache hit/miss counts, filled from the call's CallToolCache at hangup
+        self.tool_cache: Dict[str, Dict[str, int]] = {}
+        self.caller_profile: Optional[Dict[str, Any]] = None
+        self.events = 0
+        self.outcome: Optional[str] = None
+        self.reconnect_gaps: List[float] = []
+        self._turn_started: Optional[float] = None
+        # Tool outputs waiting for the model's next reply: (tool, sent at)
+        self._tool_outputs: List[Tuple[str, float]] = []
+
+    def mark(self, name: str, at: Optional[float] = None) -> float:
+        t = time.monotonic() if at is None else at
+        self.marks.setdefault(name, t)
+        return t
+
+    def _span(self, start: str, end: str) -> Optional[float]:
+        if start in self.marks and end in self.marks:
+            return self.marks[end] - self.marks[start]
+        return None
+
+    def accept_started(self) -> None:
+        self.mark("accept_started")
+
+    def accepted(self) -> None:
+        self.mark("accept_done")
+        span = self._span("webhook_received", "accept_done")
+        if span is not None:
+            WEBHOOK_TO_ACCEPT.observe(span)
+
+    def ws_opened(self) -> None:
+        self.mark("ws_open")
+        span = self._span("accept_done", "ws_open")
+        if span is not None:
+            ACCEPT_TO_WS_OPEN.observe(span)
+
+    def greeting_sent(self) -> None:
+        self.mark("greeting_sent")
+        span = self._span("accept_started", "greeting_sent")
+        if span is not None:
+            ACCEPT_TO_GREETING.observe(span)
+
+    def on_event(self, evt_type: Optional[str]) -> None:
+        self.events += 1
+        if evt_type == "input_audio_buffer.committed":
+            self._turn_started = time.monotonic()
+            return
+        if evt_type not in FIRST_OUTPUT_EVENTS:
+            return
+        now = time.monotonic()
+        if self._tool_outputs:
+            for name, sent_at in self._tool_outputs:
+                TOOL_RESPONSE_LATENCY.observe(now - sent_at, tool=name)
+            self._tool_outputs = []
+        if evt_type in AUDIO_DELTA_EVENTS and "first_audio" not in self.marks:
+            self.mark("first_audio", now)
+            span = self._span("greeting_sent", "first_audio")
+            if span is not None:
+                GREETING_TO_FIRST_AUDIO.observe(span)
+        if self._turn_started is not None:
+            latency = now - self._turn_started
+            self._turn_started = None
+            self.turn_latencies.append(latency)
+            TURN_LATENCY.observe(latency)
+
+    def ws_reconnected(self, gap: float) -> None:
+        self.reconnect_gaps.append(gap)
+        WS_RECONNECTS.inc(outcome="ok")
+        WS_RECONNECT_GAP.observe(gap)
+
+    def tool_done(self, name: str, seconds: float, outcome: str) -> None:
+        self.tool_timings.append({"tool": name, "ms": round(seconds * 1000, 1), "outcome": outcome})
+
+    def tool_output_sent(self, name: str) -> None:
+        self._tool_outputs.append((name, time.monotonic()))
+
+    def finish(self, outcome: str = "ok") -> Dict[str, Any]:
+        self.mark("hangup")
+        self.outcome = outcome
+        duration = self._span("ws_open", "hangup")
+        if duration is not None:
+            CALL_DURATION.observe(duration)
+        CALLS_TOTAL.inc(outcome=outcome)
+        return self.summary(outcome)
+
+    def summary(self, outcome: str = "ok") -> Dict[str, Any]:
+        def _ms(v: Optional[float]) -> Optional[float]:
+            return round(v * 1000, 1) if v is not None else None
+
+        turns = sorted(self.turn_latencies)
+        return {
+            "call_id": self.call_id,
+            "outcome": outcome,
+            "webhook_to_accept_ms": _ms(self._span("webhook_received", "accept_done")),
+            "accept_to_ws_open_ms": _ms(self._span("accept_done", "ws_open")),
+            "accept_to_greeting_ms": _ms(self._span("accept_started", "greeting_sent")),
+            "greeting_to_first_audio_ms": _ms(self._span("greeting_sent", "first_audio")),
+            "duration_ms": _ms(self._span("ws_open", "hangup")),
+            "turns": len(turns),
+            "turn_latency_p50_ms": _ms(turns[len(turns) // 2]) if turns else None,
+            "turn_latency_max_ms": _ms(turns[-1]) if turns else None,
+            "tools": self.tool_timings,
+            "tool_cache": self.tool_cache,
+            "caller_profile": self.caller_profile,
+            "events": self.events,
+            "reconnects": len(self.reconnect_gaps),
+            "reconnect_gap_ms": [_ms(g) for g in self.reconnect_gaps],
+        }
@@ -0,0 +1,110 @@
+import json
+import time
+import zlib
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from . import config
+
+# One call as one app-logs item (CALL_LOG_MODE=transcript|both):
+#
+#   client_id, sk="call#<call_sid>", record_type="call_transcript", call_sid, phone_number,
+#   status (in_progress|completed), started_at, ended_at, turn_count, tool_count,
+#   encoding="zlib+json", body=<zlib(JSON {"turns": [...], "tools": [...], "summary": {...}})>
+#
+# The same key is rewritten on every checkpoint, so a crashed worker leaves the last
+# checkpoint behind instead of nothing.
+
+ENCODING = "zlib+json"
+RECORD_TYPE = "call_transcript"
+
+
+def transcript_sk(call_sid: str) -> str:
+    return f"call#{call_sid}"
+
+
+def _utc_iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="microseconds")
+
+
+class CallTranscript:
+    """In-memory record of one call (turns, tool calls, timings), written as a single item."""
+
+    def __init__(self, call_sid: str, phone_number: Optional[str] = None, client_id: Optional[str] = None):
+        self.call_sid = call_sid
+        self.phone_number = phone_number
+        self.client_id = client_id
+        self.started_at = time.time()
+        self._started = time.monotonic()
+        self.turns: List[Dict[str, Any]] = []
+        self.tools: List[Dict[str, Any]] = []
+        self.dirty = False
+        self.checkpoints = 0
+
+    def _offset_ms(self) -> int:
+        return int((time.monotonic() - self._started) * 1000)
+
+    def add_turn(self, role: str, text: str) -> None:
+        self.turns.append({"role": role, "text": text, "t_ms": self._offset_ms()})
+        self.dirty = True
+
+    def add_tool(self, name: str, args: Dict[str, Any], ms: float, outcome: str) -> None:
+        self.tools.append({"tool": name, "args": args, "ms": round(ms, 1), "outcome": outcome,
+                           "t_ms": self._offset_ms()})
+        self.dirty = True
+
+    def _body(self, summary: Optional[Dict[str, Any]], max_bytes: int) -> Dict[str, Any]:
+        keep = len(self.turns)
+        while True:
+            doc: Dict[str, Any] = {"turns": self.turns[len(self.turns) - keep:], "tools": self.tools,
+                                   "summary": summary or {}}
+            if keep < len(self.turns):
+                doc["dropped_turns"] = len(self.turns) - keep
+            body = zlib.compress(json.dumps(doc, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8"))
+            # DynamoDB items are capped at 400 KB: keep only the most recent turns of an enormous call
+            if len(body) <= max_bytes or keep == 0:
+                return {"body": body, "dropped_turns": len(self.turns) - keep}
+            keep //= 2
+
+    def to_item(self, final: bool = False, summary: Optional[Dict[str, Any]] = None,
+                max_bytes: Optional[int] = None) -> Dict[str, Any]:
+        packed = self._body(summary, config.CALL_TRANSCRIPT_MAX_BYTES if max_bytes is None else max_bytes)
+        item: Dict[str, Any] = {
+            "client_id": self.client_id,
+            "sk": transcript_sk(self.call_sid),
+            "record_type": RECORD_TYPE,
+            "call_sid": self.call_sid,
+            "phone_number": self.phone_number or "unknown",
+            "status": "completed" if final else "in_progress",
+            "started_at": _utc_iso(self.started_at),
+            "ts": _utc_iso(self.started_at),
+            "updated_at": _utc_iso(time.time()),
+            "turn_count": len(self.turns),
+            "tool_count": len(self.tools),
+            "encoding": ENCODING,
+            "body": packed["body"],
+        }
+        if final:
+            item["ended_at"] = item["updated_at"]
+        if packed["dropped_turns"]:
+            item["dropped_turns"] = packed["dropped_turns"]
+        if summary and summary.get("duration_ms") is not None:
+            item["duration_ms"] = Decimal(str(summary["duration_ms"]))
+        self.dirty = False
+        self.checkpoints += 1
+        return item
+
+
+def decode_transcript(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Transcript item as stored -> plain dict with the body expanded (turns/tools/summary)."""
+    out = {k: v for k, v in item.items() if k != "body"}
+    body = item.get("body")
+    if body is None or item.get("encoding") != ENCODING:
+        return out
+    raw = getattr(body, "value", body)  # boto3 returns Binary
+    try:
+        out.update(json.loads(zlib.decompress(bytes(raw)).decode("utf-8")))
+    except Exception as e:
+        out["decode_error"] = repr(e)
+    return out
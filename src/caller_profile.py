@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from boto3.dynamodb.conditions import Key
+
+from . import config
+from . import metrics
+from .app_logging import get_logger
+from .aws_clients import dynamodb_table
+from .phone_utils import normalize_phone
+
+log = get_logger(__name__)
+
+# Who is calling, loaded while the call is still being accepted (CALLER_PROFILE_MODE):
+#   - the caller's most recent reservations: app-tasks GSI CALLER_TASKS_INDEX_NAME
+#     (caller_key = "<client_id>#<normalized phone>", created_at); required, without it nothing is loaded
+#   - the last call: newest app-logs items under "<phone>#" (call_summary is written last)
+# cache: reservations seed the call's tool cache (get_task by name needs no round trip)
+# inject: additionally appended to the accept instructions when ready within CALLER_PROFILE_TIMEOUT
+
+PROFILE_LATENCY = metrics.histogram("caller_profile_seconds", "Caller profile load time (reservations + last call)")
+PROFILE_LOADS = metrics.counter("caller_profile_total", "Caller profile loads by outcome (returning/new/error)")
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="caller-profile")
+
+
+def caller_attributes(client_id: str, phone_number: Any) -> Dict[str, str]:
+    """Attributes written next to phone_number for the caller GSI (empty when there is no number)."""
+    normalized = normalize_phone(str(phone_number)) if phone_number else None
+    return {"caller_key": f"{client_id}#{normalized}"} if normalized else {}
+
+
+class CallerProfile:
+    def __init__(self, phone_number: str, reservations: List[Dict[str, Any]], last_call: Optional[Dict[str, Any]]):
+        self.phone_number = phone_number
+        self.reservations = reservations
+        self.last_call = last_call
+
+    @property
+    def returning(self) -> bool:
+        return bool(self.reservations or self.last_call)
+
+    def instructions(self) -> str:
+        # Compact, for the system prompt; the model still confirms identity before using it
+        if not self.returning:
+            return ""
+        lines = ["## この電話番号の情報（自動取得・ご本人確認のうえで利用）"]
+        for item in self.reservations:
+            parts = [str(item.get("name") or ""), str(item.get("start_datetime") or "")]
+            request = str(item.get("request") or "")
+            if request:
+                parts.append(request[:40])
+            lines.append("- 予約: " + " / ".join(p for p in parts if p))
+        if self.last_call:
+            lines.append(f"- 前回のお電話: {str(self.last_call.get('ts') or '')[:10]}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"returning": self.returning, "reservations": len(self.reservations),
+                "last_call": (self.last_call or {}).get("ts")}
+
+
+def _reservations(client_id: str, phone: str) -> List[Dict[str, Any]]:
+    r = dynamodb_table(config.TASKS_TABLE_NAME).query(
+        IndexName=config.CALLER_TASKS_INDEX_NAME,
+        KeyConditionExpression=Key("caller_key").eq(f"{client_id}#{phone}"),
+        ScanIndexForward=False,
+        Limit=max(1, config.CALLER_PROFILE_MAX_RESERVATIONS),
+    )
+    return r.get("Items", [])
+
+
+def _last_call(client_id: str, phone: str) -> Optional[Dict[str, Any]]:
+    r = dynamodb_table(config.CALL_LOGS_TABLE_NAME).query(
+        KeyConditionExpression=Key("client_id").eq(client_id) & Key("sk").begins_with(f"{phone}#"),
+        ScanIndexForward=False,
+        Limit=5,
+        ProjectionExpression="ts, call_sid, record_type, #s",
+        ExpressionAttributeNames={"#s": "summary"},
+    )
+    items = r.get("Items", [])
+    for item in items:
+        if item.get("record_type") == "call_summary":
+            return item
+    return items[0] if items else None
+
+
+def load_caller_profile(client_id: str, phone_number: str) -> Optional[CallerProfile]:
+    phone = normalize_phone(phone_number)
+    if not phone or phone == "unknown":
+        return None
+    started = time.perf_counter()
+    try:
+        profile = CallerProfile(phone, _reservations(client_id, phone), _last_call(client_id, phone))
+        PROFILE_LOADS.inc(outcome="returning" if profile.returning else "new")
+        log.info("caller_profile", extra={"client_id": client_id, "ms": round((time.perf_counter() - started) * 1000, 1),
+                                          **profile.to_dict()})
+        return profile
+    except Exception:
+        PROFILE_LOADS.inc(outcome="error")
+        log.warning("caller_profile_failed", extra={"client_id": client_id}, exc_info=True)
+        return None
+    finally:
+        PROFILE_LATENCY.observe(time.perf_counter() - started)
+
+
+class CallerProfiles:
+    """Profile loads started by the webhook, handed to the call session by call_id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, "Future[Optional[CallerProfile]]"] = {}
+        self._warned = False
+
+    def prefetch(self, call_id: str, client_id: str, phone_number: Optional[str]) -> None:
+        if config.CALLER_PROFILE_MODE == "off" or not phone_number:
+            return
+        if not config.CALLER_TASKS_INDEX_NAME:
+            # Without the GSI every call would read the tenant's whole app-tasks partition
+            if not self._warned:
+                self._warned = True
+                log.warning("caller_profile_needs_index", extra={"mode": config.CALLER_PROFILE_MODE})
+            return
+        fut = _executor.submit(load_caller_profile, client_id, phone_number)
+        with self._lock:
+            self._pending[call_id] = fut
+
+    def take(self, call_id: str) -> "Optional[Future[Optional[CallerProfile]]]":
+        with self._lock:
+            return self._pending.pop(call_id, None)
+
+    def discard(self, call_id: str) -> None:
+        fut = self.take(call_id)
+        if fut is not None:
+            fut.cancel()
+
+
+caller_profiles = CallerProfiles()
@@ -1,10 +1,33 @@
 import os
+import json
+import logging
 from dotenv import load_dotenv
 from openai import OpenAI
 
 # Load environment variables
 load_dotenv()
 
+def _json_env(name: str, default):
+    raw = os.getenv(name)
+    if not raw:
+        return default
+    try:
+        return json.loads(raw)
+    except Exception:
+        # app_logging imports config, so this goes through the stdlib fallback handler
+        logging.getLogger("app.config").warning("invalid_json_env name=%s, using default", name)
+        return default
+
+# Logging (see app_logging): JSON lines via a queue listener thread, per-module levels
+# (LOG_LEVELS={"realtime_ws": "DEBUG"}), 1-in-N sampling of high-frequency events and
+# redaction of phone numbers / transcripts unless LOG_REDACT=0
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = _json_env("LOG_LEVELS", {})
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "50"))
+LOG_REDACT = os.getenv("LOG_REDACT", "1") not in ("0", "false", "False", "")
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", "10000"))
+
 # Client Identity (Tenant ID)
 CLIENT_ID = os.getenv("CLIENT_ID", "ueki")
 
@@ -22,8 +45,155 @@ FAQ_TABLE_NAME = os.getenv("FAQ_TABLE_NAME", "app-faq")
 CALL_LOGS_TABLE_NAME = os.getenv("CALL_LOGS_TABLE_NAME", "app-logs")
 TASKS_TABLE_NAME = os.getenv("TASKS_TABLE_NAME", "app-tasks")
 
+# Call-log read path (/admin/calls): GSIs on app-logs, projection ALL.
+# CALL_LOGS_CALL_SID_INDEX: call_sid (HASH) + ts (RANGE); CALL_LOGS_TS_INDEX: client_id (HASH) + ts (RANGE).
+# Empty index name -> partition query with a filter (reads the whole tenant partition).
+CALL_LOGS_CALL_SID_INDEX = os.getenv("CALL_LOGS_CALL_SID_INDEX", "call-sid-index")
+CALL_LOGS_TS_INDEX = os.getenv("CALL_LOGS_TS_INDEX", "client-ts-index")
+CALL_LOG_QUERY_PARALLELISM = int(os.getenv("CALL_LOG_QUERY_PARALLELISM", "4"))
+CALL_LOG_QUERY_PAGE_SIZE = int(os.getenv("CALL_LOG_QUERY_PAGE_SIZE", "1000"))
+# Bearer token for the /admin/* routes; unset disables them (404)
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+
 DEFAULT_PHONE_NUMBER = os.getenv("DEFAULT_PHONE_NUMBER")
+# Phone keys (normalize_phone): national = home-country numbers as "090..." (historical keys),
+# other countries as digits; e164 = "+8190...". PHONE_DEFAULT_COUNTRY_CODE applies to numbers
+# dialed with a trunk 0 and is the "home" country for the national form
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "81")
+PHONE_FORMAT = os.getenv("PHONE_FORMAT", "national")
 
 # OpenAI client and headers
 openai_client = OpenAI(webhook_secret=OPENAI_WEBHOOK_SECRET)
 AUTH_HEADER = {"Authorization": "Bearer " + (OPENAI_API_KEY or "")}
+
+# Call host (one event loop per worker process)
+MAX_CONCURRENT_CALLS = int(os.getenv("MAX_CONCURRENT_CALLS", "200"))
+CALL_DRAIN_TIMEOUT = float(os.getenv("CALL_DRAIN_TIMEOUT", "25"))
+
+# Admission control (see admission): new calls are shed past ADMISSION_MAX_ACTIVE_CALLS live
+# sessions or ADMISSION_MAX_LOOP_LAG_MS call host loop lag (0 disables the lag check).
+# ADMISSION_OVERLOAD_ACTION: reject (SIP ADMISSION_REJECT_STATUS) | refer (to ADMISSION_REFER_URI)
+# | callback (speak ADMISSION_CALLBACK_MESSAGE and hang up)
+ADMISSION_MAX_ACTIVE_CALLS = int(os.getenv("ADMISSION_MAX_ACTIVE_CALLS", str(MAX_CONCURRENT_CALLS)))
+ADMISSION_MAX_LOOP_LAG_MS = float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "250"))
+ADMISSION_OVERLOAD_ACTION = os.getenv("ADMISSION_OVERLOAD_ACTION", "reject")
+ADMISSION_REJECT_STATUS = int(os.getenv("ADMISSION_REJECT_STATUS", "486"))
+ADMISSION_REFER_URI = os.getenv("ADMISSION_REFER_URI", "")
+ADMISSION_CALLBACK_MESSAGE = os.getenv(
+    "ADMISSION_CALLBACK_MESSAGE", "ただいま電話が大変混み合っております。恐れ入りますが、しばらくしてからおかけ直しください。")
+ADMISSION_CALLBACK_TIMEOUT = float(os.getenv("ADMISSION_CALLBACK_TIMEOUT", "15"))
+
+# Call log pipeline (background batch writer)
+CALL_LOG_QUEUE_MAX = int(os.getenv("CALL_LOG_QUEUE_MAX", "10000"))
+CALL_LOG_BACKPRESSURE = os.getenv("CALL_LOG_BACKPRESSURE", "drop_oldest")  # block | drop_oldest | spill
+CALL_LOG_SPILL_PATH = os.getenv("CALL_LOG_SPILL_PATH", "call_logs_spill.jsonl")
+CALL_LOG_BLOCK_TIMEOUT = float(os.getenv("CALL_LOG_BLOCK_TIMEOUT", "1.0"))
+CALL_LOG_FLUSH_TIMEOUT = float(os.getenv("CALL_LOG_FLUSH_TIMEOUT", "5.0"))
+# items: one item per utterance (default) / transcript: one compressed document per call
+# (sk=call#<call_sid>) / both
+CALL_LOG_MODE = os.getenv("CALL_LOG_MODE", "items")
+CALL_TRANSCRIPT_CHECKPOINT_SECONDS = float(os.getenv("CALL_TRANSCRIPT_CHECKPOINT_SECONDS", "60"))
+CALL_TRANSCRIPT_MAX_BYTES = int(os.getenv("CALL_TRANSCRIPT_MAX_BYTES", "350000"))
+
+# Tool execution (bounded executor + per-tool timeouts, e.g. TOOL_TIMEOUTS={"list_tasks": 5})
+TOOLS_MAX_WORKERS = int(os.getenv("TOOLS_MAX_WORKERS", "16"))
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "8"))
+TOOL_TIMEOUTS = _json_env("TOOL_TIMEOUTS", {})
+# Per-call read-through cache for reservation lookups (writes invalidate);
+# TOOL_SHARED_LIST_TTL > 0 also shares list_tasks results per tenant across calls in a worker
+TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "60"))
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "64"))
+TOOL_SHARED_LIST_TTL = float(os.getenv("TOOL_SHARED_LIST_TTL", "0"))
+
+# function_call_output shaping: per-tool field projection (e.g. TOOL_RESULT_FIELDS=
+# {"list_tasks": ["name", "start_datetime"]}), byte budget and list_tasks page size
+TOOL_RESULT_MAX_BYTES = int(os.getenv("TOOL_RESULT_MAX_BYTES", "4096"))
+TOOL_RESULT_FIELDS = _json_env("TOOL_RESULT_FIELDS", {})
+TOOL_LIST_PAGE_SIZE = int(os.getenv("TOOL_LIST_PAGE_SIZE", "20"))
+
+# Availability (check_availability / find_free_slots). Reservations are point start times,
+# each occupying RESERVATION_SLOT_MINUTES; AVAILABILITY_INDEX_NAME is an optional GSI on
+# app-tasks (PK slot_date = "<client_id>#YYYY-MM-DD", SK slot_start) used for per-day reads
+BUSINESS_TIMEZONE = os.getenv("BUSINESS_TIMEZONE", "Asia/Tokyo")
+BUSINESS_HOURS = os.getenv("BUSINESS_HOURS", "11:00-22:00")
+RESERVATION_SLOT_MINUTES = int(os.getenv("RESERVATION_SLOT_MINUTES", "60"))
+RESERVATION_CAPACITY = int(os.getenv("RESERVATION_CAPACITY", "1"))
+AVAILABILITY_STEP_MINUTES = int(os.getenv("AVAILABILITY_STEP_MINUTES", "30"))
+AVAILABILITY_INDEX_NAME = os.getenv("AVAILABILITY_INDEX_NAME", "")
+AVAILABILITY_CACHE_TTL = float(os.getenv("AVAILABILITY_CACHE_TTL", "30"))
+
+# Caller profile, loaded at webhook time from the caller's number: off (default) / cache
+# (seed the call's tool cache) / inject (also add a short summary to the accept instructions
+# if it is ready within CALLER_PROFILE_TIMEOUT seconds). Needs CALLER_TASKS_INDEX_NAME, a GSI
+# on app-tasks (PK caller_key = "<client_id>#<normalized phone>", SK created_at, projection ALL)
+CALLER_PROFILE_MODE = os.getenv("CALLER_PROFILE_MODE", "off")
+CALLER_TASKS_INDEX_NAME = os.getenv("CALLER_TASKS_INDEX_NAME", "")
+CALLER_PROFILE_MAX_RESERVATIONS = int(os.getenv("CALLER_PROFILE_MAX_RESERVATIONS", "3"))
+CALLER_PROFILE_TIMEOUT = float(os.getenv("CALLER_PROFILE_TIMEOUT", "0.3"))
+
+# DynamoDB client pool (shared per worker; sized from call/tool concurrency)
+DYNAMODB_ENDPOINT_URL = os.getenv("DYNAMODB_ENDPOINT_URL")  # e.g. http://localhost:8000 for dynamodb-local
+DDB_MAX_POOL_CONNECTIONS = int(os.getenv(
+    "DDB_MAX_POOL_CONNECTIONS", str(max(10, min(MAX_CONCURRENT_CALLS, TOOLS_MAX_WORKERS) + 4))
+))
+DDB_CONNECT_TIMEOUT = float(os.getenv("DDB_CONNECT_TIMEOUT", "2"))
+DDB_READ_TIMEOUT = float(os.getenv("DDB_READ_TIMEOUT", "5"))
+
+# Prompt cache: cheap version check every PROMPT_VERSION_CHECK_INTERVAL, full rebuild after PROMPT_CACHE_TTL
+PROMPT_CACHE_TTL = float(os.getenv("PROMPT_CACHE_TTL", "300"))
+PROMPT_VERSION_CHECK_INTERVAL = float(os.getenv("PROMPT_VERSION_CHECK_INTERVAL", "30"))
+
+# FAQ in the prompt: full (inline whole KB) | hot (inline FAQ_HOT_N most-hit entries) | none (search_faq tool only)
+FAQ_PROMPT_MODE = os.getenv("FAQ_PROMPT_MODE", "full")
+FAQ_HOT_N = int(os.getenv("FAQ_HOT_N", "10"))
+# Hot-mode hit counts halve every FAQ_HOT_HALF_LIFE_HOURS (0 = never decay)
+FAQ_HOT_HALF_LIFE_HOURS = float(os.getenv("FAQ_HOT_HALF_LIFE_HOURS", "24"))
+FAQ_SEARCH_TOP_K = int(os.getenv("FAQ_SEARCH_TOP_K", "3"))
+
+# Multi-tenant routing: per-call tenant from /t/<client_id>, dialed number
+# (TENANT_NUMBERS='{"0312345678": "ueki"}') or SIP X-Client-Id (TENANT_ALLOWLIST ids only);
+# CLIENT_ID is the fallback tenant.
+TENANT_NUMBERS = _json_env("TENANT_NUMBERS", {})
+TENANT_ALLOWLIST = [t.strip() for t in os.getenv("TENANT_ALLOWLIST", "").split(",") if t.strip()]
+TENANT_CACHE_SIZE = int(os.getenv("TENANT_CACHE_SIZE", "64"))
+DEFAULT_GREETING = os.getenv("DEFAULT_GREETING", "お電話ありがとうございます。ご予約ですか？それともご質問でしょうか？")
+
+# Realtime call-control HTTP (accept etc.): pooled keep-alive client on the call host loop
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
+OPENAI_REALTIME_WS_URL = os.getenv("OPENAI_REALTIME_WS_URL", "wss://api.openai.com/v1/realtime")
+CALL_CONTROL_TIMEOUT = float(os.getenv("CALL_CONTROL_TIMEOUT", "5"))
+CALL_CONTROL_CONNECT_TIMEOUT = float(os.getenv("CALL_CONTROL_CONNECT_TIMEOUT", "2"))
+CALL_CONTROL_MAX_RETRIES = int(os.getenv("CALL_CONTROL_MAX_RETRIES", "2"))
+CALL_CONTROL_MAX_CONNECTIONS = int(os.getenv("CALL_CONTROL_MAX_CONNECTIONS", "20"))
+
+# Realtime WS resilience: keepalive pings detect a stalled socket within roughly
+# interval + timeout; a dropped socket is reopened for the same call_id with
+# exponential backoff (base * 2^n, capped, jittered) up to WS_RECONNECT_MAX_ATTEMPTS times
+WS_PING_INTERVAL = float(os.getenv("WS_PING_INTERVAL", "5"))
+WS_PING_TIMEOUT = float(os.getenv("WS_PING_TIMEOUT", "5"))
+WS_RECONNECT_MAX_ATTEMPTS = int(os.getenv("WS_RECONNECT_MAX_ATTEMPTS", "5"))
+WS_RECONNECT_BASE_DELAY = float(os.getenv("WS_RECONNECT_BASE_DELAY", "0.2"))
+WS_RECONNECT_MAX_DELAY = float(os.getenv("WS_RECONNECT_MAX_DELAY", "5"))
+# Open the Realtime WS while /accept is in flight; session.update and the greeting go out
+# as soon as both are done (a socket that raced ahead of the accept is simply reopened)
+WS_CONNECT_WITH_ACCEPT = os.getenv("WS_CONNECT_WITH_ACCEPT", "1") not in ("0", "false", "False", "")
+
+# Session registry: which worker (node) owns which live call, shared across containers.
+# memory (this worker only) / dynamodb (SESSION_REGISTRY_TABLE_NAME: PK pk, SK sk, TTL on
+# expires_at) / redis (SESSION_REGISTRY_REDIS_URL, needs requirements-redis.txt). Nodes heartbeat
+# every SESSION_HEARTBEAT_SECONDS; a call's lease lapses SESSION_LEASE_SECONDS after its
+# node stops renewing it. Node id = NODE_NAME (default: hostname) + ":" + worker pid
+SESSION_REGISTRY_BACKEND = os.getenv("SESSION_REGISTRY_BACKEND", "memory")
+SESSION_REGISTRY_TABLE_NAME = os.getenv("SESSION_REGISTRY_TABLE_NAME", "app-sessions")
+SESSION_REGISTRY_REDIS_URL = os.getenv("SESSION_REGISTRY_REDIS_URL", "redis://localhost:6379/0")
+SESSION_HEARTBEAT_SECONDS = float(os.getenv("SESSION_HEARTBEAT_SECONDS", "5"))
+SESSION_LEASE_SECONDS = float(os.getenv("SESSION_LEASE_SECONDS", "20"))
+NODE_NAME = os.getenv("NODE_NAME", "")
+# Routed call actions (/admin/sessions/<call_id>/...): owners check their mailbox every
+# SESSION_INBOX_POLL_SECONDS, backing off to SESSION_INBOX_POLL_MAX_SECONDS while it stays empty
+# (keep it well under SESSION_ROUTE_TIMEOUT, the callers' wait for the answer);
+# the transcript tail keeps the last SESSION_TAIL_TURNS turns of each live call
+SESSION_INBOX_POLL_SECONDS = float(os.getenv("SESSION_INBOX_POLL_SECONDS", "0.5"))
+SESSION_INBOX_POLL_MAX_SECONDS = float(os.getenv("SESSION_INBOX_POLL_MAX_SECONDS", "2"))
+SESSION_ROUTE_TIMEOUT = float(os.getenv("SESSION_ROUTE_TIMEOUT", "5"))
+SESSION_TAIL_TURNS = int(os.getenv("SESSION_TAIL_TURNS", "50"))
@@ -1,76 +1,134 @@
+import atexit
 import json
-from typing import Optional
+import queue
+import threading
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 try:
     import boto3
-    from boto3.dynamodb.conditions import Key
+    from boto3.dynamodb.conditions import Attr, Key
     from botocore.exceptions import BotoCoreError, ClientError
 except Exception:
     boto3 = None
 
 from datetime import datetime, timezone
 from . import config
+from . import aws_clients
+from .app_logging import get_logger
 from .phone_utils import normalize_phone
+from .tenants import current_client_id
+from .call_log_writer import CallLogWriter
+from .call_transcript import RECORD_TYPE, CallTranscript, decode_transcript
+from .tool_results import decode_cursor, encode_cursor
 
-_ddb = None
+log = get_logger(__name__)
 
 def dynamo_resource():
-    global _ddb
-    if _ddb is None:
-        if boto3 is None:
-            return None
-        try:
-            print("Init DynamoDB resource, region:", config.AWS_REGION)
-            _ddb = boto3.resource("dynamodb", region_name=config.AWS_REGION)
-        except Exception as _e:
-            print("DynamoDB resource init failed:", _e)
-            _ddb = None
-    return _ddb
+    # Shared, pooled resource (see aws_clients); None when boto3 is unavailable
+    try:
+        return aws_clients.dynamodb_resource()
+    except Exception:
+        log.error("dynamodb_init_failed", exc_info=True)
+        return None
+
+_log_writer = CallLogWriter(
+    dynamo_resource,
+    max_queue=config.CALL_LOG_QUEUE_MAX,
+    policy=config.CALL_LOG_BACKPRESSURE,
+    spill_path=config.CALL_LOG_SPILL_PATH,
+    block_timeout=config.CALL_LOG_BLOCK_TIMEOUT,
+)
+atexit.register(lambda: _log_writer.flush(config.CALL_LOG_FLUSH_TIMEOUT))
+
+def call_log_writer() -> CallLogWriter:
+    return _log_writer
+
+def flush_call_logs(timeout: Optional[float] = None) -> bool:
+    # Call-end hook: wait until this worker's queued log items are written
+    return _log_writer.flush(config.CALL_LOG_FLUSH_TIMEOUT if timeout is None else timeout)
+
+async def flush_call_logs_for(call_sid: str, timeout: Optional[float] = None) -> bool:
+    # Call-end hook: wait until this call's own queued items are written (no executor thread)
+    return await _log_writer.wait_for(call_sid, config.CALL_LOG_FLUSH_TIMEOUT if timeout is None else timeout)
 
 def to_iso8601_utc_micro() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="microseconds")
 
 def write_call_log(phone_number: Optional[str] = None, user_text: Optional[str] = None,
                    assistant_text: Optional[str] = None, call_sid: Optional[str] = None,
-                   ts: Optional[str] = None) -> None:
-    ddb = dynamo_resource()
-    if not ddb:
-        print("[log] no ddb")
-        return
+                   ts: Optional[str] = None, client_id: Optional[str] = None) -> None:
     try:
-        table = ddb.Table(config.CALL_LOGS_TABLE_NAME)
         normalized = normalize_phone(phone_number) if phone_number else "unknown"
         timestamp = ts or to_iso8601_utc_micro()
         
         # New Schema: PK=client_id, SK=phone#ts
         item = {
-            "client_id": config.CLIENT_ID,
+            "client_id": client_id or current_client_id(),
             "sk": f"{normalized}#{timestamp}",
             "phone_number": normalized,
             "ts": timestamp,
         }
         if user_text is not None:
-            print("[log] user_text:", user_text)
             item["user_text"] = user_text
         if assistant_text is not None:
-            print("[log] assistant_text:", assistant_text)
             item["assistant_text"] = assistant_text
         if call_sid:
             item["call_sid"] = call_sid
             
-        print("[log] put_item:", item)
-        table.put_item(Item=item)
-    except Exception as _e:
-        print("Call log write failed:", _e)
+        log.debug("call_log_enqueue", extra={"item": item, "sample": "call_log_enqueue"})
+        _log_writer.enqueue(config.CALL_LOGS_TABLE_NAME, item)
+    except Exception:
+        log.error("call_log_write_failed", exc_info=True)
+
+def _to_dynamo(value):
+    # boto3 rejects float; round-trip through JSON to turn floats into Decimal
+    return json.loads(json.dumps(value, ensure_ascii=False), parse_float=Decimal)
+
+def write_call_summary(summary: Dict, phone_number: Optional[str] = None, call_sid: Optional[str] = None,
+                       client_id: Optional[str] = None) -> None:
+    # One record per call, next to the utterance items (same PK/SK scheme, record_type=call_summary)
+    try:
+        normalized = normalize_phone(phone_number) if phone_number else "unknown"
+        timestamp = to_iso8601_utc_micro()
+        item = {
+            "client_id": client_id or current_client_id(),
+            "sk": f"{normalized}#{timestamp}",
+            "phone_number": normalized,
+            "ts": timestamp,
+            "record_type": "call_summary",
+            "summary": _to_dynamo(summary),
+        }
+        if call_sid:
+            item["call_sid"] = call_sid
+        log.info("call_summary", extra={"summary": summary, "call_sid": call_sid})
+        _log_writer.enqueue(config.CALL_LOGS_TABLE_NAME, item)
+    except Exception:
+        log.error("call_summary_write_failed", exc_info=True)
+
+def new_call_transcript(call_sid: str, phone_number: Optional[str] = None,
+                        client_id: Optional[str] = None) -> CallTranscript:
+    normalized = normalize_phone(phone_number) if phone_number else "unknown"
+    return CallTranscript(call_sid, phone_number=normalized, client_id=client_id or current_client_id())
+
+def write_call_transcript(transcript: CallTranscript, final: bool = False, summary: Optional[Dict] = None) -> None:
+    # One item per call (sk=call#<call_sid>); checkpoints overwrite it until the final write
+    try:
+        item = transcript.to_item(final=final, summary=summary)
+        log.debug("call_transcript_enqueue", extra={"call_sid": transcript.call_sid, "final": final,
+                                                    "turns": item["turn_count"], "bytes": len(item["body"])})
+        _log_writer.enqueue(config.CALL_LOGS_TABLE_NAME, item)
+    except Exception:
+        log.error("call_transcript_write_failed", exc_info=True)
 
-def load_system_prompt_from_dynamo(table_name: str) -> Optional[str]:
+def load_system_prompt_from_dynamo(table_name: str, item_id: str = "system") -> Optional[str]:
     ddb = dynamo_resource()
     if not ddb:
         return None
     try:
         table = ddb.Table(table_name)
         # New Schema: PK=client_id, SK=id
-        res = table.get_item(Key={"client_id": config.CLIENT_ID, "id": "system"})
+        res = table.get_item(Key={"client_id": current_client_id(), "id": item_id})
         item = res.get("Item")
         if not item:
             return None
@@ -78,11 +136,32 @@ def load_system_prompt_from_dynamo(table_name: str) -> Optional[str]:
         if isinstance(content, str) and content.strip():
             return content
         return None
-    except (BotoCoreError, ClientError, Exception) as _e:
-        print("load_system_prompt_from_dynamo failed:", _e)
+    except (BotoCoreError, ClientError, Exception):
+        log.warning("load_system_prompt_from_dynamo_failed", extra={"table": table_name}, exc_info=True)
         return None
 
-def load_faq_kb_from_dynamo(table_name: str, limit: int = 200) -> Optional[str]:
+def load_prompt_version_from_dynamo(table_name: str) -> Optional[str]:
+    # Cheap change check: only the version markers of the system prompt item
+    ddb = dynamo_resource()
+    if not ddb:
+        return None
+    try:
+        table = ddb.Table(table_name)
+        res = table.get_item(
+            Key={"client_id": current_client_id(), "id": "system"},
+            ProjectionExpression="#v, updated_at",
+            ExpressionAttributeNames={"#v": "version"},
+        )
+        item = res.get("Item")
+        if not item:
+            return None
+        marker = item.get("version") or item.get("updated_at")
+        return str(marker) if marker is not None else None
+    except (BotoCoreError, ClientError, Exception):
+        log.warning("load_prompt_version_from_dynamo_failed", extra={"table": table_name}, exc_info=True)
+        return None
+
+def load_faq_entries_from_dynamo(table_name: str, limit: int = 200) -> Optional[List[Dict[str, str]]]:
     ddb = dynamo_resource()
     if not ddb:
         return None
@@ -91,7 +170,7 @@ def load_faq_kb_from_dynamo(table_name: str, limit: int = 200) -> Optional[str]:
         # Use Query instead of Scan for tenant isolation
         # Schema: PK=client_id, SK=question
         kwargs = {
-            "KeyConditionExpression": Key("client_id").eq(config.CLIENT_ID),
+            "KeyConditionExpression": Key("client_id").eq(current_client_id()),
             "Limit": limit
         }
         
@@ -113,9 +192,191 @@ def load_faq_kb_from_dynamo(table_name: str, limit: int = 200) -> Optional[str]:
             a = it.get("answer")
             if isinstance(q, str) and isinstance(a, str):
                 kb.append({"question": q, "answer": a})
-        if not kb:
-            return None
-        return json.dumps(kb, ensure_ascii=False)
-    except (BotoCoreError, ClientError, Exception) as _e:
-        print("load_faq_kb_from_dynamo failed:", _e)
+        return kb or None
+    except (BotoCoreError, ClientError, Exception):
+        log.warning("load_faq_entries_from_dynamo_failed", extra={"table": table_name}, exc_info=True)
+        return None
+
+def load_faq_kb_from_dynamo(table_name: str, limit: int = 200) -> Optional[str]:
+    kb = load_faq_entries_from_dynamo(table_name, limit)
+    if not kb:
+        return None
+    return json.dumps(kb, ensure_ascii=False)
+
+# ---- call-log read path (GET /admin/calls...) ----
+
+_SENTINEL = object()
+
+def parse_log_time(value: Optional[str]) -> Optional[datetime]:
+    """ISO date or datetime (naive = UTC) -> aware UTC datetime; None when empty. Raises ValueError."""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+def _ts_bound(dt: datetime) -> str:
+    # Same shape as the stored ts (to_iso8601_utc_micro) so string order == time order
+    return dt.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+def _log_table():
+    return aws_clients.dynamodb_table(config.CALL_LOGS_TABLE_NAME)
+
+def _query_pages(kwargs: Dict) -> Iterator[List[Dict]]:
+    table = _log_table()
+    kwargs = dict(kwargs)
+    while True:
+        res = table.query(**kwargs)
+        yield res.get("Items", [])
+        if "LastEvaluatedKey" not in res:
+            return
+        kwargs["ExclusiveStartKey"] = res["LastEvaluatedKey"]
+
+def public_log_item(item: Dict) -> Dict:
+    # Transcript documents are stored compressed; everything else is returned as is
+    if item.get("record_type") == RECORD_TYPE:
+        return decode_transcript(item)
+    return item
+
+def get_call_logs(call_sid: str, client_id: Optional[str] = None) -> Optional[Dict]:
+    """All app-logs items of one call (utterances, summary, transcript document), in ts order."""
+    cid = client_id or current_client_id()
+    if config.CALL_LOGS_CALL_SID_INDEX:
+        kwargs = {"IndexName": config.CALL_LOGS_CALL_SID_INDEX, "KeyConditionExpression": Key("call_sid").eq(call_sid)}
+    else:
+        kwargs = {"KeyConditionExpression": Key("client_id").eq(cid), "FilterExpression": Attr("call_sid").eq(call_sid)}
+    # The index spans tenants: keep only this tenant's items
+    items = [it for page in _query_pages(kwargs) for it in page if it.get("client_id") == cid]
+    if not items:
         return None
+    items.sort(key=lambda it: str(it.get("ts", "")))
+    out: Dict = {"call_sid": call_sid, "client_id": cid, "items": []}
+    for it in items:
+        if it.get("record_type") == RECORD_TYPE:
+            out["transcript"] = decode_transcript(it)
+        else:
+            out["items"].append(it)
+    return out
+
+def _time_slices(start: datetime, end: datetime, n: int) -> List[Tuple[str, str]]:
+    n = max(1, n)
+    step = (end - start) / n
+    bounds = [start + step * i for i in range(n)] + [end]
+    return [(_ts_bound(bounds[i]), _ts_bound(bounds[i + 1])) for i in range(n) if bounds[i] < bounds[i + 1]]
+
+def _put(out: "queue.Queue", value: Any, stop: threading.Event) -> bool:
+    # Bounded put that gives up once the consumer is gone (stop set), so no reader blocks forever
+    while not stop.is_set():
+        try:
+            out.put(value, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _read_slice(kwargs: Dict, out: "queue.Queue", stop: threading.Event) -> None:
+    # Producer for one time slice: pages go into a small bounded queue (back-pressure from the consumer)
+    try:
+        for page in _query_pages(kwargs):
+            if not _put(out, page, stop):
+                return
+        _put(out, _SENTINEL, stop)
+    except Exception as e:
+        _put(out, e, stop)
+
+def iter_call_logs(start: datetime, end: datetime, client_id: Optional[str] = None,
+                   parallelism: Optional[int] = None, page_size: Optional[int] = None,
+                   after_sk: Optional[str] = None) -> Iterator[Dict]:
+    """Stream a tenant's app-logs items with start <= ts < end.
+
+    With CALL_LOGS_TS_INDEX the range is split into `parallelism` time slices queried
+    concurrently; items still come out in ts order and at most two pages per slice are
+    held in memory. Without the index the tenant partition is read with a filter
+    (sk order, one reader), resuming after `after_sk` when given.
+    """
+    cid = client_id or current_client_id()
+    limit = page_size or config.CALL_LOG_QUERY_PAGE_SIZE
+    if config.CALL_LOGS_TS_INDEX:
+        slices = _time_slices(start, end, parallelism or config.CALL_LOG_QUERY_PARALLELISM)
+        jobs = [{
+            "IndexName": config.CALL_LOGS_TS_INDEX,
+            "KeyConditionExpression": Key("client_id").eq(cid) & Key("ts").between(lo, hi),
+            "Limit": limit,
+        } for lo, hi in slices]
+    else:
+        slices = [(_ts_bound(start), _ts_bound(end))]
+        jobs = [{
+            "KeyConditionExpression": Key("client_id").eq(cid),
+            "FilterExpression": Attr("ts").between(*slices[0]),
+            "Limit": limit,
+        }]
+        if after_sk:
+            jobs[0]["ExclusiveStartKey"] = {"client_id": cid, "sk": after_sk}
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=2) for _ in jobs]
+    threads = [threading.Thread(target=_read_slice, args=(job, q, stop), name="call-log-reader", daemon=True)
+               for job, q in zip(jobs, queues)]
+    for t in threads:
+        t.start()
+    try:
+        for (_, hi), q in zip(slices, queues):
+            while True:
+                page = q.get()
+                if page is _SENTINEL:
+                    break
+                if isinstance(page, Exception):
+                    raise page
+                for it in page:
+                    # between() is inclusive; the upper bound belongs to the next slice
+                    if str(it.get("ts", "")) < hi:
+                        yield it
+    finally:
+        # Consumer done or gone (client disconnected): let the readers exit
+        stop.set()
+
+def list_call_logs(start: datetime, end: datetime, client_id: Optional[str] = None, limit: int = 100,
+                   cursor: Optional[str] = None) -> Dict:
+    """One page of iter_call_logs; next_cursor resumes after the last returned item.
+
+    The cursor follows the read order: ts (+ sks seen at that ts) with CALL_LOGS_TS_INDEX,
+    the last sk without it (the partition is read in sk = phone#ts order, so a ts cursor
+    would skip earlier calls of later numbers).
+    """
+    after = decode_cursor(cursor) or {}
+    page_size = min(max(limit, 25), config.CALL_LOG_QUERY_PAGE_SIZE)
+    if not config.CALL_LOGS_TS_INDEX:
+        items: List[Dict] = []
+        last_sk = None
+        it = iter_call_logs(start, end, client_id, page_size=page_size, after_sk=after.get("sk"))
+        try:
+            for item in it:
+                last_sk = item.get("sk")
+                items.append(public_log_item(item))
+                if len(items) >= limit:
+                    break
+            else:
+                return {"items": items}
+        finally:
+            it.close()
+        return {"items": items, "next_cursor": encode_cursor({"sk": last_sk})}
+    if after.get("ts"):
+        start = max(start, parse_log_time(after["ts"]) or start)
+    seen = set(after.get("sks") or ())
+    items = []
+    it = iter_call_logs(start, end, client_id, page_size=page_size)
+    try:
+        for item in it:
+            ts = str(item.get("ts", ""))
+            if ts == after.get("ts") and item.get("sk") in seen:
+                continue
+            items.append(public_log_item(item))
+            if len(items) >= limit:
+                break
+        else:
+            return {"items": items}
+    finally:
+        it.close()
+    last_ts = str(items[-1].get("ts", ""))
+    sks = [i.get("sk") for i in items if str(i.get("ts", "")) == last_ts]
+    if last_ts == after.get("ts"):
+        sks = list(seen) + sks
+    return {"items": items, "next_cursor": encode_cursor({"ts": last_ts, "sks": sks})}
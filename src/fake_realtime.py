@@ -0,0 +1,309 @@
+import asyncio
+import itertools
+import json
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import websockets
+
+# Local stand-in for the OpenAI Realtime SIP API, for load tests and the simulator.
+#  - HTTP: POST /v1/realtime/calls/{call_id}/{accept|reject|hangup|refer} -> 200 {}
+#          (hangup also closes that call's WS, like the real API)
+#  - WS:   /v1/realtime?call_id=... speaks the server events realtime_ws consumes
+#
+# A script is a list of steps, replayed after the client's greeting response.create:
+#   {"user": "text"}                 committed + input_audio_transcription.completed
+#   {"say": "text"}                  response.created, audio/transcript deltas, done, response.done
+#   {"tool": "get_task", "args": {}} function_call_arguments.delta/.done, then waits for
+#                                    function_call_output + response.create and answers with "say"
+#   {"event": {...}}                 any raw server event (recorded sessions)
+#   {"pause_ms": 500}                idle time
+#   {"drop": true}                   abort the socket (no close frame), like a network drop
+# Every step may carry "after_ms"; all delays are divided by the speed factor. A "tool" step
+# with "drop": true aborts right after the call's response.done, before the output arrives.
+# A reconnect with the same call_id resumes the script after the drop (no second greeting);
+# a dropped tool call is still answered once its function_call_output is replayed.
+
+_ids = itertools.count(1)
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{next(_ids)}"
+
+
+def synthetic_script(turns: int = 4, with_tools: bool = True, think_ms: int = 300,
+                     drops: bool = False) -> List[Dict[str, Any]]:
+    # drops: the socket is aborted once mid tool call (first tool turn) and once between turns
+    steps: List[Dict[str, Any]] = []
+    for i in range(turns):
+        if drops and i == 1:
+            steps.append({"drop": True})
+        steps.append({"user": f"予約の確認をお願いします {i}", "after_ms": think_ms})
+        if with_tools and i % 2 == 0:
+            steps.append({"tool": "list_tasks", "args": {"limit": 5}, "say": "ご予約を確認しました。",
+                          "drop": drops and i == 0})
+        elif with_tools:
+            steps.append({"tool": "get_task", "args": {"name": f"LOAD-{i}"}, "say": "お調べしました。"})
+        else:
+            steps.append({"say": "かしこまりました。"})
+    return steps
+
+
+def load_script(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("steps", data) if isinstance(data, dict) else data
+
+
+class FakeRealtimeServer:
+    def __init__(self, script: Optional[List[Dict[str, Any]]] = None, speed: float = 1.0,
+                 host: str = "127.0.0.1", audio_deltas: int = 5, tool_wait_timeout: float = 30.0,
+                 accept_delay_ms: float = 0.0, handshake_delay_ms: float = 0.0):
+        self.script = script if script is not None else synthetic_script()
+        self.speed = max(speed, 1e-6)
+        self.host = host
+        self.audio_deltas = audio_deltas
+        self.tool_wait_timeout = tool_wait_timeout
+        # Simulated API round trips (not divided by speed): /accept and the WS opening handshake
+        self.accept_delay_ms = accept_delay_ms
+        self.handshake_delay_ms = handshake_delay_ms
+        self.ws_port: Optional[int] = None
+        self.http_port: Optional[int] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"http_requests": 0, "sessions": 0, "active": 0, "max_active": 0,
+                      "events_sent": 0, "client_events": 0, "tool_outputs": 0, "tool_timeouts": 0, "drops": 0, "resumes": 0}
+        # call_id -> {"next": step index, "tool": (tool_call_id, step) awaiting output} after a drop
+        self._progress: Dict[str, Dict[str, Any]] = {}
+        # call_id -> open WS, for hangup
+        self._live: Dict[str, Any] = {}
+        # call_id -> call-control actions received (accept / reject / refer / hangup), in order
+        self.actions: Dict[str, List[str]] = {}
+        # tool call_id -> function_call_output frames received (a replay of an acked output shows as 2)
+        self.outputs: Dict[str, int] = {}
+
+    # ---- endpoints for the app under test ----
+    @property
+    def api_base(self) -> str:
+        return f"http://{self.host}:{self.http_port}/v1"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.ws_port}/v1/realtime"
+
+    # ---- lifecycle ----
+    async def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self._ws_server = await websockets.serve(self._session, self.host, 0, max_size=None,
+                                                 process_request=self._handshake)
+        self.ws_port = self._ws_server.sockets[0].getsockname()[1]
+        self._http_server = await asyncio.start_server(self._http_conn, self.host, 0)
+        self.http_port = self._http_server.sockets[0].getsockname()[1]
+
+    def start_in_thread(self) -> "FakeRealtimeServer":
+        ready = threading.Event()
+
+        def _run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=_run, name="fake-realtime", daemon=True).start()
+        ready.wait()
+        return self
+
+    async def _handshake(self, path, headers) -> None:
+        if self.handshake_delay_ms:
+            await asyncio.sleep(self.handshake_delay_ms / 1000.0)
+        return None
+
+    # ---- HTTP call control ----
+    async def _http_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                length = int(headers.get("content-length") or 0)
+                if length:
+                    await reader.readexactly(length)
+                self.stats["http_requests"] += 1
+                # Per action counts (accept / reject / refer / hangup)
+                parts = lines[0].split(" ")[1].rstrip("/").rsplit("/", 2) if " " in lines[0] else ["?"]
+                action = parts[-1]
+                self.stats[action] = self.stats.get(action, 0) + 1
+                if len(parts) == 3:
+                    self.actions.setdefault(parts[1], []).append(action)
+                if action == "hangup" and len(parts) == 3 and parts[1] in self._live:
+                    asyncio.ensure_future(self._live[parts[1]].close())
+                if self.accept_delay_ms:
+                    await asyncio.sleep(self.accept_delay_ms / 1000.0)
+                body = b"{}"
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    # ---- WS session ----
+    async def _session(self, ws, path: Optional[str] = None) -> None:
+        path = path or getattr(ws, "path", "")
+        call_id = (parse_qs(urlparse(path).query).get("call_id") or ["?"])[0]
+        self.stats["sessions"] += 1
+        self.stats["active"] += 1
+        self.stats["max_active"] = max(self.stats["max_active"], self.stats["active"])
+        inbox: asyncio.Queue = asyncio.Queue()
+        self._live[call_id] = ws
+        reader = asyncio.create_task(self._read_client(ws, inbox))
+        try:
+            resume = self._progress.pop(call_id, None)
+            if resume is None:
+                await self._wait_for(inbox, "response.create")
+                await self._say(ws, "お電話ありがとうございます。")
+                start = 0
+            else:
+                self.stats["resumes"] += 1
+                start = resume["next"]
+                if resume.get("tool"):
+                    tool_call_id, step = resume["tool"]
+                    await self._tool_output(ws, inbox, tool_call_id, step)
+            for n in range(start, len(self.script)):
+                step = self.script[n]
+                await self._sleep(step.get("after_ms", 0))
+                if step.get("drop") and "tool" not in step:
+                    await self._drop(ws, call_id, n + 1)
+                    return
+                tool_call_id = await self._step(ws, inbox, step, call_id)
+                if tool_call_id:
+                    await self._drop(ws, call_id, n + 1, (tool_call_id, step))
+                    return
+            await ws.close()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            reader.cancel()
+            if self._live.get(call_id) is ws:
+                del self._live[call_id]
+            self.stats["active"] -= 1
+
+    async def _drop(self, ws, call_id: str, next_step: int, tool: Optional[tuple] = None) -> None:
+        self.stats["drops"] += 1
+        self._progress[call_id] = {"next": next_step, "tool": tool}
+        ws.transport.abort()
+        # Let the protocol see the lost connection before the handler returns (no closing handshake)
+        await ws.wait_closed()
+
+    async def _read_client(self, ws, inbox: asyncio.Queue) -> None:
+        try:
+            async for raw in ws:
+                self.stats["client_events"] += 1
+                try:
+                    evt = json.loads(raw)
+                except Exception:
+                    continue
+                item = evt.get("item") or {}
+                if item.get("type") == "function_call_output":
+                    self.outputs[item.get("call_id")] = self.outputs.get(item.get("call_id"), 0) + 1
+                await inbox.put(evt)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def _wait_for(self, inbox: asyncio.Queue, evt_type: str, call_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        while True:
+            evt = await inbox.get()
+            if evt.get("type") == "session.update":
+                continue
+            if evt.get("type") != evt_type:
+                continue
+            if call_id and (evt.get("item") or {}).get("call_id") != call_id:
+                continue
+            return evt
+
+    async def _sleep(self, ms: float) -> None:
+        if ms:
+            await asyncio.sleep(ms / 1000.0 / self.speed)
+
+    async def _send(self, ws, evt: Dict[str, Any]) -> None:
+        await ws.send(json.dumps(evt, ensure_ascii=False))
+        self.stats["events_sent"] += 1
+
+    async def _say(self, ws, text: str) -> None:
+        response_id = _new_id("resp")
+        item_id = _new_id("item")
+        await self._send(ws, {"type": "response.created", "response": {"id": response_id}})
+        chunks = [text[i:i + 4] for i in range(0, len(text), 4)] or [""]
+        for i in range(max(self.audio_deltas, len(chunks))):
+            if i < self.audio_deltas:
+                await self._send(ws, {"type": "response.output_audio.delta", "response_id": response_id,
+                                      "item_id": item_id, "delta": "AAAA"})
+            if i < len(chunks):
+                await self._send(ws, {"type": "response.output_audio_transcript.delta", "response_id": response_id,
+                                      "item_id": item_id, "delta": chunks[i]})
+            await self._sleep(20)
+        await self._send(ws, {"type": "response.output_audio_transcript.done", "response_id": response_id,
+                              "item_id": item_id, "transcript": text})
+        await self._send(ws, {"type": "response.done", "response": {"id": response_id, "status": "completed"}})
+
+    async def _step(self, ws, inbox: asyncio.Queue, step: Dict[str, Any], call_id: str) -> Optional[str]:
+        # Returns the tool call id when a "tool" step asks to drop before its output
+        if "event" in step:
+            await self._send(ws, step["event"])
+        elif "user" in step:
+            item_id = _new_id("item")
+            await self._send(ws, {"type": "input_audio_buffer.speech_started", "item_id": item_id})
+            await self._sleep(step.get("speech_ms", 800))
+            await self._send(ws, {"type": "input_audio_buffer.speech_stopped", "item_id": item_id})
+            await self._send(ws, {"type": "input_audio_buffer.committed", "item_id": item_id})
+            text = step["user"]
+            for i in range(0, len(text), 6):
+                await self._send(ws, {"type": "conversation.item.input_audio_transcription.delta",
+                                      "item_id": item_id, "delta": text[i:i + 6]})
+            await self._send(ws, {"type": "conversation.item.input_audio_transcription.completed",
+                                  "item_id": item_id, "transcript": text})
+            if "tool" not in step and "say" in step:
+                await self._say(ws, step["say"])
+        elif "tool" in step:
+            return await self._tool(ws, inbox, step)
+        elif "say" in step:
+            await self._say(ws, step["say"])
+        elif "pause_ms" in step:
+            await self._sleep(step["pause_ms"])
+
+    async def _tool(self, ws, inbox: asyncio.Queue, step: Dict[str, Any]) -> Optional[str]:
+        response_id = _new_id("resp")
+        tool_call_id = _new_id("call")
+        args = json.dumps(step.get("args") or {}, ensure_ascii=False)
+        await self._send(ws, {"type": "response.created", "response": {"id": response_id}})
+        await self._send(ws, {"type": "response.output_item.added", "response_id": response_id,
+                              "item": {"type": "function_call", "call_id": tool_call_id, "name": step["tool"]}})
+        for i in range(0, len(args), 8):
+            await self._send(ws, {"type": "response.function_call_arguments.delta", "response_id": response_id,
+                                  "call_id": tool_call_id, "delta": args[i:i + 8]})
+            await self._sleep(10)
+        await self._send(ws, {"type": "response.function_call_arguments.done", "response_id": response_id,
+                              "call_id": tool_call_id, "name": step["tool"], "arguments": args})
+        await self._send(ws, {"type": "response.done", "response": {"id": response_id, "status": "completed"}})
+        if step.get("drop"):
+            return tool_call_id
+        await self._tool_output(ws, inbox, tool_call_id, step)
+        return None
+
+    async def _tool_output(self, ws, inbox: asyncio.Queue, tool_call_id: str, step: Dict[str, Any]) -> None:
+        try:
+            await asyncio.wait_for(self._wait_for(inbox, "conversation.item.create", tool_call_id), self.tool_wait_timeout)
+            self.stats["tool_outputs"] += 1
+            await asyncio.wait_for(self._wait_for(inbox, "response.create"), self.tool_wait_timeout)
+        except asyncio.TimeoutError:
+            self.stats["tool_timeouts"] += 1
+            return
+        await self._say(ws, step.get("say") or "承知しました。")
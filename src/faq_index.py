@@ -0,0 +1,128 @@
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+
+# Character n-gram BM25 over FAQ question/answer pairs. Works for Japanese
+# without a tokenizer: text is NFKC-normalized and split into overlapping bigrams.
+
+NGRAM = 2
+K1 = 1.2
+B = 0.75
+QUESTION_WEIGHT = 2  # question n-grams count twice as much as answer n-grams
+HIT_RATIO = 0.5  # a result counts as a hit for hot mode only when it scores this close to the best one
+
+_STRIP = re.compile(r"[\s　、。，．,.!?！？「」『』（）()\[\]【】・:：;；\"'“”‘’]+")
+
+
+def _normalize(text: str) -> str:
+    return _STRIP.sub("", unicodedata.normalize("NFKC", text or "").lower())
+
+
+def ngrams(text: str, n: int = NGRAM) -> List[str]:
+    s = _normalize(text)
+    if not s:
+        return []
+    if len(s) <= n:
+        return [s]
+    return [s[i:i + n] for i in range(len(s) - n + 1)]
+
+
+class FaqIndex:
+    def __init__(self, entries: Optional[List[Dict[str, str]]] = None, half_life: Optional[float] = None):
+        self._lock = threading.Lock()
+        # question -> (hit score, time of the last hit); scores halve every half_life seconds, so
+        # entries inlined by hot mode (answered from the prompt, no longer searched) fade out
+        # and the entries callers now search for take their place
+        self._hits: Dict[str, Tuple[float, float]] = {}
+        self.half_life = config.FAQ_HOT_HALF_LIFE_HOURS * 3600 if half_life is None else half_life
+        self._state: Dict[str, Any] = self._build([])
+        if entries:
+            self.replace(entries)
+
+    @staticmethod
+    def _build(entries: List[Dict[str, str]]) -> Dict[str, Any]:
+        docs: List[Counter] = []
+        postings: Dict[str, List[int]] = {}
+        for i, e in enumerate(entries):
+            tf = Counter()
+            for g in ngrams(e.get("question", "")):
+                tf[g] += QUESTION_WEIGHT
+            for g in ngrams(e.get("answer", "")):
+                tf[g] += 1
+            docs.append(tf)
+            for g in tf:
+                postings.setdefault(g, []).append(i)
+        lengths = [sum(tf.values()) for tf in docs]
+        n = len(entries)
+        idf = {g: math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5)) for g, ids in postings.items()}
+        return {
+            "entries": entries,
+            "docs": docs,
+            "postings": postings,
+            "idf": idf,
+            "lengths": lengths,
+            "avgdl": (sum(lengths) / n) if n else 0.0,
+        }
+
+    def replace(self, entries: List[Dict[str, str]]) -> None:
+        """Rebuild from fresh rows and swap in atomically; hit counts (keyed by question) are kept."""
+        clean = [
+            {"question": e["question"], "answer": e["answer"]}
+            for e in entries
+            if isinstance(e, dict) and isinstance(e.get("question"), str) and isinstance(e.get("answer"), str)
+        ]
+        state = self._build(clean)
+        with self._lock:
+            self._state = state
+
+    def __len__(self) -> int:
+        return len(self._state["entries"])
+
+    def search(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
+        st = self._state
+        if not st["entries"]:
+            return []
+        scores: Dict[int, float] = {}
+        avgdl = st["avgdl"] or 1.0
+        for g in set(ngrams(query)):
+            ids = st["postings"].get(g)
+            if not ids:
+                continue
+            idf = st["idf"][g]
+            for i in ids:
+                tf = st["docs"][i][g]
+                dl = st["lengths"][i]
+                scores[i] = scores.get(i, 0.0) + idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * dl / avgdl))
+        top = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:max(1, k)]
+        out = []
+        now = time.monotonic()
+        with self._lock:
+            best = top[0][1] if top else 0.0
+            for i, score in top:
+                e = st["entries"][i]
+                # Lower results often share a bigram or two with the query and nothing else
+                if score >= best * HIT_RATIO:
+                    self._hits[e["question"]] = (self._score(e["question"], now) + 1.0, now)
+                out.append({"question": e["question"], "answer": e["answer"], "score": round(score, 3)})
+        return out
+
+    def _score(self, question: str, now: float) -> float:
+        score, at = self._hits.get(question, (0.0, now))
+        if self.half_life > 0:
+            score *= 0.5 ** ((now - at) / self.half_life)
+        return score
+
+    def hot_entries(self, n: int) -> List[Dict[str, str]]:
+        """Most-hit entries first (recent hits weigh more); entries never hit keep their source order."""
+        st = self._state
+        now = time.monotonic()
+        with self._lock:
+            scores = [self._score(e["question"], now) for e in st["entries"]]
+        order = sorted(range(len(st["entries"])), key=lambda i: (-scores[i], i))
+        return [st["entries"][i] for i in order[:max(0, n)]]
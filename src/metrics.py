@@ -0,0 +1,185 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[LabelKey, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+
+class Gauge(Counter):
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        # Sampled at scrape time (e.g. active calls, queue depth)
+        self._fn = fn
+
+    def samples(self) -> List[Tuple[LabelKey, float]]:
+        if self._fn is not None:
+            try:
+                return [((), float(self._fn()))]
+            except Exception:
+                return []
+        return super().samples()
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label key -> [bucket counts..., +Inf count], sum, count
+        self._series: Dict[LabelKey, Dict[str, object]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._series[key] = s
+            counts = s["counts"]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            s["sum"] += value
+            s["count"] += 1
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Bucket-interpolated quantile estimate (same approach as histogram_quantile)."""
+        with self._lock:
+            s = self._series.get(_label_key(labels))
+            if not s or not s["count"]:
+                return None
+            counts = list(s["counts"])
+            total = s["count"]
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for i, b in enumerate(self.buckets):
+            if cumulative + counts[i] >= rank:
+                if counts[i] == 0:
+                    return b
+                return lower + (b - lower) * (rank - cumulative) / counts[i]
+            cumulative += counts[i]
+            lower = b
+        return self.buckets[-1]
+
+    def summary(self, **labels) -> Dict[str, Optional[float]]:
+        with self._lock:
+            s = self._series.get(_label_key(labels))
+            count = s["count"] if s else 0
+            total = s["sum"] if s else 0.0
+        return {
+            "count": count,
+            "avg": (total / count) if count else None,
+            "p50": self.quantile(0.5, **labels),
+            "p99": self.quantile(0.99, **labels),
+        }
+
+    def series(self) -> List[Tuple[LabelKey, List[int], float, int]]:
+        with self._lock:
+            return [(k, list(s["counts"]), s["sum"], s["count"]) for k, s in self._series.items()]
+
+
+_registry_lock = threading.Lock()
+REGISTRY: Dict[str, object] = {}
+
+
+def _register(metric):
+    with _registry_lock:
+        existing = REGISTRY.get(metric.name)
+        if existing is not None:
+            return existing
+        REGISTRY[metric.name] = metric
+        return metric
+
+
+def counter(name: str, help_text: str) -> Counter:
+    return _register(Counter(name, help_text))
+
+
+def gauge(name: str, help_text: str) -> Gauge:
+    return _register(Gauge(name, help_text))
+
+
+def histogram(name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help_text, buckets))
+
+
+def _fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join('%s="%s"' % (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition (format 0.0.4) of everything in REGISTRY."""
+    with _registry_lock:
+        metrics = list(REGISTRY.values())
+    lines: List[str] = []
+    for m in metrics:
+        if isinstance(m, Histogram):
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} histogram")
+            for key, counts, total, count in m.series():
+                cumulative = 0
+                for b, c in zip(m.buckets, counts):
+                    cumulative += c
+                    lines.append(f"{m.name}_bucket{_fmt_labels(key, ('le', _fmt_value(b)))} {cumulative}")
+                lines.append(f"{m.name}_bucket{_fmt_labels(key, ('le', '+Inf'))} {count}")
+                lines.append(f"{m.name}_sum{_fmt_labels(key)} {_fmt_value(total)}")
+                lines.append(f"{m.name}_count{_fmt_labels(key)} {count}")
+        else:
+            kind = "gauge" if isinstance(m, Gauge) else "counter"
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {kind}")
+            for key, value in m.samples():
+                lines.append(f"{m.name}{_fmt_labels(key)} {_fmt_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Union
+
+import httpx
+
+from . import config
+from . import metrics
+from .app_logging import get_logger
+
+log = get_logger(__name__)
+
+# Pooled keep-alive client for Realtime call-control requests (accept, ...).
+# Lives on the call host loop, so the TLS handshake to the API is paid once per worker.
+_client: Optional[httpx.AsyncClient] = None
+
+ACCEPT_LATENCY = metrics.histogram("call_accept_seconds", "Realtime /accept latency including retries, by outcome")
+CALL_CONTROL_REQUESTS = metrics.counter("call_control_requests_total", "Realtime call-control HTTP attempts by action and status")
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def _http() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=config.OPENAI_API_BASE,
+            headers={**config.AUTH_HEADER, "Content-Type": "application/json"},
+            timeout=httpx.Timeout(config.CALL_CONTROL_TIMEOUT, connect=config.CALL_CONTROL_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=config.CALL_CONTROL_MAX_CONNECTIONS,
+                max_keepalive_connections=config.CALL_CONTROL_MAX_CONNECTIONS,
+                keepalive_expiry=60.0,
+            ),
+        )
+    return _client
+
+
+async def call_control(call_id: str, action: str, payload: Optional[Union[Dict[str, Any], bytes]] = None,
+                       max_retries: Optional[int] = None) -> Optional[httpx.Response]:
+    """POST /realtime/calls/{call_id}/{action} with bounded retries on network errors, 429 and 5xx.
+
+    payload may be pre-serialized JSON bytes (see TenantAssets.accept_body)."""
+    retries = config.CALL_CONTROL_MAX_RETRIES if max_retries is None else max_retries
+    path = f"/realtime/calls/{call_id}/{action}"
+    res: Optional[httpx.Response] = None
+    for attempt in range(retries + 1):
+        try:
+            if isinstance(payload, bytes):
+                res = await _http().post(path, content=payload)
+            else:
+                res = await _http().post(path, json=payload or {})
+            CALL_CONTROL_REQUESTS.inc(action=action, status=res.status_code)
+            if res.status_code not in RETRY_STATUS:
+                return res
+            log.warning("call_control_retry", extra={"action": action, "status": res.status_code,
+                                                     "attempt": attempt + 1, "body": res.text[:200]})
+        except httpx.HTTPError as e:
+            CALL_CONTROL_REQUESTS.inc(action=action, status="error")
+            log.warning("call_control_error", extra={"action": action, "attempt": attempt + 1, "error": repr(e)})
+            res = None
+        if attempt < retries:
+            await asyncio.sleep(min(2.0, 0.2 * (2 ** attempt)))
+    return res
+
+
+async def accept_call(call_id: str, call_accept: Union[Dict[str, Any], bytes]) -> bool:
+    started = time.perf_counter()
+    res = await call_control(call_id, "accept", call_accept)
+    ok = res is not None and res.is_success
+    ACCEPT_LATENCY.observe(time.perf_counter() - started, outcome="ok" if ok else "failed")
+    if not ok:
+        log.error("accept_failed", extra={"call_id": call_id,
+                                          "status": res.status_code if res is not None else None})
+    return ok
@@ -0,0 +1,102 @@
+import json
+from typing import Any, Dict, List, Optional
+
+_WS = " \t\r\n"
+
+
+class PartialJsonObject:
+    """Incremental scanner for a streamed JSON object (function call arguments).
+
+    feed() takes the next chunk and returns the top-level keys whose scalar value
+    became complete with it, so a caller can act on {"name": "..."} long before the
+    closing brace arrives. Nested objects/arrays are skipped, not decoded.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.closed = False
+        self.broken = False
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._tok: Optional[List[str]] = None
+        self._scalar: Optional[List[str]] = None
+        self._key: Optional[str] = None
+        self._expect = "key"
+
+    def feed(self, chunk: str) -> List[str]:
+        done: List[str] = []
+        if self.closed or self.broken:
+            return done
+        for c in chunk:
+            if self._in_str:
+                if self._tok is not None:
+                    self._tok.append(c)
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                    if self._tok is not None:
+                        self._string_done(done)
+                continue
+            if c == '"':
+                self._in_str = True
+                self._tok = ['"'] if self._depth == 1 else None
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 1 and c != "{":
+                    self.broken = True
+                    return done
+            elif c in "}]":
+                if self._depth == 1:
+                    self._scalar_done(done)
+                self._depth -= 1
+                if self._depth == 1:
+                    self._expect = "comma"
+                elif self._depth == 0:
+                    self.closed = True
+                    return done
+            elif self._depth == 1:
+                if c == ":":
+                    self._expect = "value"
+                elif c == ",":
+                    self._scalar_done(done)
+                    self._expect = "key"
+                elif c in _WS:
+                    self._scalar_done(done)
+                elif self._expect == "value":
+                    if self._scalar is None:
+                        self._scalar = []
+                    self._scalar.append(c)
+        return done
+
+    def _string_done(self, done: List[str]) -> None:
+        try:
+            value = json.loads("".join(self._tok or ()))
+        except Exception:
+            self.broken = True
+            return
+        self._tok = None
+        if self._expect == "key":
+            self._key = value
+            self._expect = "colon"
+        elif self._expect == "value" and self._key is not None:
+            self.fields[self._key] = value
+            done.append(self._key)
+            self._expect = "comma"
+
+    def _scalar_done(self, done: List[str]) -> None:
+        if self._scalar is None:
+            return
+        raw = "".join(self._scalar)
+        self._scalar = None
+        try:
+            value = json.loads(raw)
+        except Exception:
+            return
+        if self._key is not None:
+            self.fields[self._key] = value
+            done.append(self._key)
+            self._expect = "comma"
@@ -1,79 +1,217 @@
 import re
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from flask import Request
 from . import config
+from .app_logging import get_logger
+
+log = get_logger(__name__)
+
+# Visual separators allowed inside a dialable number ("090-1234-5678", "+81 (0)90 1234 5678")
+_SEPARATORS = re.compile(r"[\s\-.()/]")
+_DIALABLE = re.compile(r"^\+?\d+$")
+# user part of a sip:/sips:/tel: URI, e.g. "Alice" <sip:+819012345678@pbx;user=phone>;tag=1
+_URI_USER = re.compile(r"(?:sips?|tel):([^@;>?\s]+)", re.IGNORECASE)
+# Fallback for bare values: first digit run, separators allowed inside
+_NUMBER_RUN = re.compile(r"\+?\d[\d\s\-.()]*\d|\+?\d")
+# Trunk prefix "(0)" written inside an international number
+_TRUNK_IN_INTL = re.compile(r"^\+(\d{1,3})\s*\(0\)")
+# International call prefixes that mean "+", by home country code (PHONE_DEFAULT_COUNTRY_CODE).
+# Only the home country's prefixes apply: "010..." is Japan's international prefix but a
+# Beijing number in China, "011..." a NANP international call
+_INTL_PREFIXES: Dict[str, Tuple[str, ...]] = {"81": ("010", "00"), "1": ("011",), "61": ("0011",)}
+_DEFAULT_INTL_PREFIXES = ("00",)
+
+
+def to_e164(num: str, default_cc: Optional[str] = None) -> Optional[str]:
+    """'+<cc><number>' for dialable input, or None when it is not a full number.
+
+    National numbers (trunk prefix 0) take default_cc (PHONE_DEFAULT_COUNTRY_CODE);
+    the home country's international prefix ('010' / '00' for 81, '011' for 1, else '00')
+    becomes '+'; a '(0)' after the country code is dropped.
+    """
+    if not isinstance(num, str):
+        return None
+    cc = default_cc or config.PHONE_DEFAULT_COUNTRY_CODE
+    compact = _TRUNK_IN_INTL.sub(r"+\1", num.strip())
+    compact = _SEPARATORS.sub("", compact)
+    if not _DIALABLE.match(compact):
+        return None
+    if compact.startswith("+"):
+        digits = compact[1:]
+        # "+81 090..." style: trunk 0 written after the country code
+        if cc and digits.startswith(cc + "0"):
+            digits = cc + digits[len(cc) + 1:]
+    else:
+        for prefix in _INTL_PREFIXES.get(cc or "", _DEFAULT_INTL_PREFIXES):
+            if compact.startswith(prefix) and len(compact) - len(prefix) >= 8:
+                digits = compact[len(prefix):]
+                break
+        else:
+            if not (compact.startswith("0") and cc):
+                return None
+            digits = cc + compact[1:]
+    # E.164: at most 15 digits; anything under 8 is an extension or short code
+    if not 8 <= len(digits) <= 15:
+        return None
+    return "+" + digits
+
 
 def normalize_phone(num: str) -> Optional[str]:
+    # Canonical form used as the app-logs / app-tasks key. PHONE_FORMAT=national (default):
+    # home-country numbers in national form ("09012345678"), others as digits without "+";
+    # PHONE_FORMAT=e164: "+819012345678". Non-dialable input falls back to its digits.
     if not isinstance(num, str):
         return None
-    digits = "".join(ch for ch in num if ch.isdigit() or ch == "+")
-    if digits.startswith("+81"):
-        rest = digits[3:]
-        if rest and rest[0] != "0":
-            return "0" + rest
-        return rest if rest else None
-    return "".join(ch for ch in digits if ch.isdigit())
-
-def extract_phone_from_event_or_request(event, request: Request) -> Optional[str]:
+    e164 = to_e164(num)
+    if e164 is None:
+        return "".join(ch for ch in num if ch.isdigit())
+    if config.PHONE_FORMAT == "e164":
+        return e164
+    cc = config.PHONE_DEFAULT_COUNTRY_CODE
+    if cc and e164.startswith("+" + cc):
+        return "0" + e164[1 + len(cc):]
+    return e164[1:]
+
+
+def number_from_uri(value: Optional[str]) -> Optional[str]:
+    """Dialable number in a SIP From/To/P-Asserted-Identity value ('<sip:+8190...@host>;tag=..')."""
+    if not value:
+        return None
+    m = _URI_USER.search(value)
+    if m:
+        user = _SEPARATORS.sub("", m.group(1))
+        # sip:anonymous@..., sip:alice@...: no number
+        return user if _DIALABLE.match(user) else None
+    m = _NUMBER_RUN.search(value)
+    return m.group(0) if m else None
+
+
+class SipHeaders:
+    """event.data.sip_headers read once: case-insensitive map (first non-empty value per name)."""
+
+    __slots__ = ("map",)
+
+    CALL_SID_NAMES = ("x-twilio-callsid", "twilio-callsid")
+    CALLER_NAMES = ("from", "p-asserted-identity", "remote-party-id")
+    DIALED_NAMES = ("to",)
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None):
+        self.map: Dict[str, str] = headers or {}
+
+    @classmethod
+    def from_event(cls, event) -> "SipHeaders":
+        out: Dict[str, str] = {}
+        try:
+            data = getattr(event, "data", None)
+            if isinstance(data, dict):
+                sip_headers = data.get("sip_headers")
+            else:
+                sip_headers = getattr(data, "sip_headers", None)
+            for h in sip_headers or ():
+                if isinstance(h, dict):
+                    name, value = h.get("name"), h.get("value")
+                else:
+                    name, value = getattr(h, "name", None), getattr(h, "value", None)
+                if name and value:
+                    key = name.lower()
+                    if key not in out:
+                        value = str(value).strip()
+                        if value:
+                            out[key] = value
+        except Exception:
+            log.warning("sip_headers_parse_failed", exc_info=True)
+        return cls(out)
+
+    def get(self, *names: str) -> Optional[str]:
+        for name in names:
+            value = self.map.get(name.lower())
+            if value:
+                return value
+        return None
+
+    def _number(self, names) -> Optional[str]:
+        for name in names:
+            number = number_from_uri(self.map.get(name))
+            if number:
+                return normalize_phone(number)
+        return None
+
+    @property
+    def caller(self) -> Optional[str]:
+        return self._number(self.CALLER_NAMES)
+
+    @property
+    def dialed(self) -> Optional[str]:
+        return self._number(self.DIALED_NAMES)
+
+    @property
+    def call_sid(self) -> Optional[str]:
+        return self.get(*self.CALL_SID_NAMES)
+
+    @property
+    def custom(self) -> Dict[str, str]:
+        # X-* headers other than the carrier's own (X-Twilio-*)
+        return {k: v for k, v in self.map.items() if k.startswith("x-") and not k.startswith("x-twilio-")}
+
+
+def get_sip_header(event, *names: str) -> Optional[str]:
+    # First non-empty value among the given SIP header names (case-insensitive)
+    return SipHeaders.from_event(event).get(*names)
+
+def extract_caller_phone(event, request: Request, sip: Optional[SipHeaders] = None) -> Tuple[Optional[str], str]:
+    """(number, source); source is header / query / sip / form / json / event / default / none.
+
+    "default" means DEFAULT_PHONE_NUMBER stood in: not the caller's own number.
+    Pass the event's SipHeaders when the caller already parsed them (webhook).
+    """
     # 1) HTTP headers
     for key in ["X-Phone-Number", "X-Caller-Number", "From", "x-phone-number", "x-caller-number"]:
         if key in request.headers and request.headers.get(key):
-            return normalize_phone(request.headers.get(key))
+            return normalize_phone(request.headers.get(key)), "header"
     # 2) Query
     try:
         q = request.args or {}
         for key in ["phone", "phone_number", "from", "From"]:
             if key in q and q.get(key):
-                return normalize_phone(q.get(key))
+                return normalize_phone(q.get(key)), "query"
     except Exception:
         pass
-    # 3) Form
+    # 3) SIP From / P-Asserted-Identity in event.data (Realtime SIP calls; checked before the body parse)
+    number = (sip if sip is not None else SipHeaders.from_event(event)).caller
+    if number:
+        return number, "sip"
+    # 4) Form
     try:
         form = request.form or {}
         for key in ["From", "phone", "phone_number"]:
             if key in form and form.get(key):
-                return normalize_phone(form.get(key))
+                return normalize_phone(form.get(key)), "form"
     except Exception:
         pass
-    # 4) JSON body
+    # 5) JSON body
     try:
         body = request.get_json(silent=True) or {}
         for key in ["phone", "phone_number", "from", "From"]:
             if key in body and body.get(key):
-                return normalize_phone(body.get(key))
+                return normalize_phone(body.get(key)), "json"
     except Exception:
         pass
-    # 5) SIP headers in event.data
-    try:
-        data = getattr(event, "data", None)
-        sip_headers = None
-        if data is not None:
-            if isinstance(data, dict):
-                sip_headers = data.get("sip_headers")
-            else:
-                sip_headers = getattr(data, "sip_headers", None)
-        if sip_headers:
-            for h in sip_headers:
-                name = h.get("name") if isinstance(h, dict) else getattr(h, "name", None)
-                value = h.get("value") if isinstance(h, dict) else getattr(h, "value", None)
-                if name and name.lower() == "from" and value:
-                    m = re.search(r"\+?\d+", value)
-                    if m:
-                        return normalize_phone(m.group(0))
-    except Exception as _e:
-        print("Failed to extract phone from sip_headers:", _e)
     # 6) Other attributes
     try:
         data = getattr(event, "data", None)
         if data is not None:
             for attr in ["phone_number", "from_number", "caller", "from"]:
                 if hasattr(data, attr):
-                    return normalize_phone(getattr(data, attr))
+                    return normalize_phone(getattr(data, attr)), "event"
     except Exception:
         pass
     # 7) Fallback from env
     if config.DEFAULT_PHONE_NUMBER:
-        return normalize_phone(config.DEFAULT_PHONE_NUMBER)
-    return None
+        return normalize_phone(config.DEFAULT_PHONE_NUMBER), "default"
+    return None, "none"
+
+
+def extract_phone_from_event_or_request(event, request: Request, sip: Optional[SipHeaders] = None) -> Optional[str]:
+    return extract_caller_phone(event, request, sip)[0]
 
 
@@ -1,7 +1,21 @@
+import hashlib
 import json
-from typing import Optional
+import threading
+import time
+from typing import Callable, Dict, List, Optional
 from . import config
-from .dynamo_utils import load_system_prompt_from_dynamo, load_faq_kb_from_dynamo
+from . import metrics
+from .app_logging import get_logger
+from .dynamo_utils import load_system_prompt_from_dynamo, load_faq_entries_from_dynamo, load_prompt_version_from_dynamo
+from .faq_index import FaqIndex
+from .tenants import use_tenant
+
+log = get_logger(__name__)
+
+PROMPT_CACHE_HITS = metrics.counter("prompt_cache_hits_total", "Prompt lookups served from the cache")
+PROMPT_CACHE_MISSES = metrics.counter("prompt_cache_misses_total", "Prompt lookups with no cached prompt")
+PROMPT_REFRESH_SECONDS = metrics.histogram("prompt_refresh_seconds", "Prompt/FAQ refresh latency by kind")
+PROMPT_REFRESHES = metrics.counter("prompt_refresh_total", "Prompt refreshes by kind and outcome")
 
 def _load_text_file(path: str) -> Optional[str]:
     try:
@@ -10,7 +24,13 @@ def _load_text_file(path: str) -> Optional[str]:
     except Exception:
         return None
 
-def build_system_prompt() -> str:
+def build_system_prompt(client_id: Optional[str] = None, faq_index: Optional[FaqIndex] = None) -> str:
+    # Dynamo reads below are keyed by the given tenant (default: current / CLIENT_ID)
+    if client_id:
+        with use_tenant(client_id):
+            return build_system_prompt(None, faq_index)
+    if faq_index is None:
+        faq_index = FaqIndex()
     # Start with default (from file if provided) then override by Dynamo if available
     # 1) Dynamo (PROMPTS_TABLE_NAME)
     system_prompt = None
@@ -26,19 +46,142 @@ def build_system_prompt() -> str:
     # 3) If still None, fallback to empty
     if not system_prompt:
         system_prompt = ""
-    print("system_prompt: ", system_prompt)
-    # Inject FAQ KB payload
+    # Prompt text only at DEBUG (and redacted unless LOG_REDACT=0)
+    log.debug("system_prompt_built", extra={"prompt": system_prompt, "chars": len(system_prompt)})
+    # Inject FAQ KB payload (and rebuild the search_faq index from the same rows)
     _faq_payload = None
+    _faq_entries = None
     if config.FAQ_TABLE_NAME:
-        _faq_payload = load_faq_kb_from_dynamo(config.FAQ_TABLE_NAME)
+        _faq_entries = load_faq_entries_from_dynamo(config.FAQ_TABLE_NAME)
+        if _faq_entries:
+            _faq_payload = json.dumps(_faq_entries, ensure_ascii=False)
     if not _faq_payload and config.FAQ_KB_PATH:
         _kb = _load_text_file(config.FAQ_KB_PATH)
-        print("faq_kb: ", _kb)
         if _kb:
             _faq_payload = _kb
-    print("faq_payload: ", _faq_payload)
+            _faq_entries = _parse_faq_entries(_kb)
+    if _faq_entries:
+        faq_index.replace(_faq_entries)
+    log.debug("faq_payload", extra={"chars": len(_faq_payload or ""), "entries": len(_faq_entries or [])})
     if _faq_payload:
-        system_prompt = system_prompt.replace("{FAQ_KB}", _faq_payload)
+        system_prompt = system_prompt.replace("{FAQ_KB}", _faq_prompt_section(_faq_payload, faq_index))
     return system_prompt
 
+def _parse_faq_entries(text: str) -> Optional[List[Dict[str, str]]]:
+    try:
+        data = json.loads(text)
+    except Exception:
+        return None
+    return data if isinstance(data, list) else None
+
+FAQ_SEARCH_NOTE = "（ここに無い質問は search_faq ツールで検索し、その結果に基づいて回答してください）"
+
+def _faq_prompt_section(payload: str, faq_index: FaqIndex) -> str:
+    # full: whole KB inline (default) / hot: only the FAQ_HOT_N most-hit entries / none: search tool only
+    mode = config.FAQ_PROMPT_MODE
+    if mode == "hot" and len(faq_index):
+        hot = faq_index.hot_entries(config.FAQ_HOT_N)
+        return json.dumps(hot, ensure_ascii=False) + "\n" + FAQ_SEARCH_NOTE
+    if mode == "none" and len(faq_index):
+        return FAQ_SEARCH_NOTE
+    return payload
+
+
+class PromptSnapshot:
+    def __init__(self, prompt: str, source_version: Optional[str]):
+        self.prompt = prompt
+        self.source_version = source_version
+        # Content version: changes only when the assembled prompt text changes
+        self.version = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        self.loaded_at = time.time()
+
+
+class PromptCache:
+    """Assembled system prompt, refreshed in the background and swapped atomically.
 
+    Readers (webhooks) only ever take the current snapshot; Dynamo reads happen on the
+    refresher thread (see tenant_cache), which calls maybe_refresh() periodically.
+    """
+
+    def __init__(self, builder: Callable[[], str] = build_system_prompt,
+                 version_reader: Optional[Callable[[], Optional[str]]] = None,
+                 ttl: float = 300.0, check_interval: float = 30.0):
+        self._builder = builder
+        self._version_reader = version_reader
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._snapshot: Optional[PromptSnapshot] = None
+        self._lock = threading.Lock()
+        # Set on a cold read so the refresher retries ahead of schedule
+        self._wake = threading.Event()
+
+    def get(self) -> PromptSnapshot:
+        snap = self._snapshot
+        if snap is not None:
+            PROMPT_CACHE_HITS.inc()
+            return snap
+        # Cold cache (priming failed): serve the file-based prompt, never read Dynamo here
+        PROMPT_CACHE_MISSES.inc()
+        self._wake.set()
+        return PromptSnapshot(_file_only_prompt(), None)
+
+    def refresh(self, kind: str = "full") -> bool:
+        """Rebuild the prompt; returns True when the content version changed."""
+        started = time.perf_counter()
+        try:
+            source_version = self._version_reader() if self._version_reader else None
+            snap = PromptSnapshot(self._builder(), source_version)
+        except Exception:
+            PROMPT_REFRESHES.inc(kind=kind, outcome="error")
+            log.warning("prompt_refresh_failed", extra={"kind": kind}, exc_info=True)
+            return False
+        finally:
+            PROMPT_REFRESH_SECONDS.observe(time.perf_counter() - started, kind=kind)
+        with self._lock:
+            old = self._snapshot
+            self._snapshot = snap
+        changed = old is None or old.version != snap.version
+        PROMPT_REFRESHES.inc(kind=kind, outcome="changed" if changed else "unchanged")
+        if changed:
+            log.info("prompt_version", extra={"version": snap.version, "source_version": snap.source_version})
+        return changed
+
+    def check_version(self) -> bool:
+        """Cheap read of the source version marker; rebuilds only if it moved."""
+        snap = self._snapshot
+        if snap is None or self._version_reader is None:
+            return self.refresh("full")
+        started = time.perf_counter()
+        current = self._version_reader()
+        PROMPT_REFRESH_SECONDS.observe(time.perf_counter() - started, kind="version_check")
+        if current is not None and current != snap.source_version:
+            return self.refresh("version_changed")
+        return False
+
+    def maybe_refresh(self) -> bool:
+        """One refresher tick: full rebuild past the TTL, otherwise a cheap version check."""
+        snap = self._snapshot
+        if snap is None or time.time() - snap.loaded_at >= self.ttl:
+            return self.refresh("ttl")
+        return self.check_version()
+
+    def wants_refresh(self) -> bool:
+        if self._wake.is_set():
+            self._wake.clear()
+            return True
+        return False
+
+
+def _file_only_prompt() -> str:
+    prompt = _load_text_file(config.SYSTEM_PROMPT_PATH) if config.SYSTEM_PROMPT_PATH else None
+    prompt = prompt or ""
+    kb = _load_text_file(config.FAQ_KB_PATH) if config.FAQ_KB_PATH else None
+    if kb:
+        prompt = prompt.replace("{FAQ_KB}", kb)
+    return prompt
+
+
+def read_prompt_version() -> Optional[str]:
+    if not config.PROMPTS_TABLE_NAME:
+        return None
+    return load_prompt_version_from_dynamo(config.PROMPTS_TABLE_NAME)
@@ -1,169 +1,518 @@
 import asyncio
+import functools
 import json
+import random
+import time
 import websockets
 from typing import Optional, Dict, Any
 from . import config
-from .dynamo_utils import write_call_log
-from .tools_impl import TOOLS_SCHEMA, TOOLS_IMPL
-import pprint
+from .app_logging import bind_call, get_logger, unbind_call
+from .dynamo_utils import (write_call_log, write_call_summary, write_call_transcript, new_call_transcript,
+                           flush_call_logs_for)
+from .call_transcript import CallTranscript
+from .tools_impl import TOOLS_SCHEMA
+from .tool_cache import CallToolCache
+from .tool_results import shape_result
+from .partial_json import PartialJsonObject
+from .tenants import use_tenant
+from .tenant_cache import tenant_registry
+from .openai_http import accept_call
+from .call_metrics import WS_RECONNECTS, CallMetrics
+from .caller_profile import CallerProfile, caller_profiles
+from .call_host import call_host
+from .session_registry import LiveCall, session_node
+from .ws_dispatch import EventDispatcher
 
-async def websocket_task(call_id: str, phone_number: Optional[str], response_create: Dict[str, Any], twilio_call_sid: Optional[str] = None) -> None:
+log = get_logger(__name__)
+
+async def accept_and_run_call(call_id: str, call_accept: Dict[str, Any], client_id: str,
+                              phone_number: Optional[str], twilio_call_sid: Optional[str] = None,
+                              received_at: Optional[float] = None) -> None:
+    # Runs on the call host after the webhook has already returned 200.
+    # Lease on call_id in the session registry: a webhook redelivered to another node loses
+    if not await session_node.claim(call_id, client_id):
+        pending = caller_profiles.take(call_id)
+        if pending is not None:
+            pending.cancel()
+        return
+    try:
+        await _accept_and_run(call_id, call_accept, client_id, phone_number, twilio_call_sid, received_at)
+    finally:
+        await session_node.release(call_id)
+
+async def _accept_and_run(call_id: str, call_accept: Dict[str, Any], client_id: str, phone_number: Optional[str],
+                          twilio_call_sid: Optional[str], received_at: Optional[float]) -> None:
+    call_metrics = CallMetrics(call_id, received_at)
+    tenant = tenant_registry.peek(client_id)
+    if tenant is None:
+        # First call for this tenant in this worker: load it off-loop
+        tenant = await asyncio.get_running_loop().run_in_executor(None, tenant_registry.get, client_id)
+    # Caller profile started by the webhook (None when off or the number is unknown)
+    pending = caller_profiles.take(call_id)
+    caller_profile = asyncio.wrap_future(pending) if pending is not None else None
+    extra = ""
+    if caller_profile is not None and config.CALLER_PROFILE_MODE == "inject":
+        extra = await _profile_instructions(call_id, caller_profile)
+    call_metrics.accept_started()
+    # TCP/TLS + WS handshake overlap the /accept round trip
+    ws_open = asyncio.ensure_future(_connect(call_id)) if config.WS_CONNECT_WITH_ACCEPT else None
+    if not await accept_call(call_id, tenant.accept_body(call_accept, extra)):
+        if ws_open is not None:
+            await _discard(ws_open)
+        if caller_profile is not None:
+            caller_profile.cancel()
+        call_metrics.finish("accept_failed")
+        return
+    call_metrics.accepted()
+    await websocket_task(
+        call_id,
+        phone_number=phone_number,
+        response_create=tenant.response_create(),
+        twilio_call_sid=twilio_call_sid,
+        client_id=client_id,
+        call_metrics=call_metrics,
+        greeting_frame=tenant.response_create_frame(),
+        ws_open=ws_open,
+        caller_profile=caller_profile,
+    )
+
+async def _profile_instructions(call_id: str, caller_profile: "asyncio.Future") -> str:
+    # The accept waits at most CALLER_PROFILE_TIMEOUT; a slower profile still seeds the tool cache
+    try:
+        profile = await asyncio.wait_for(asyncio.shield(caller_profile), config.CALLER_PROFILE_TIMEOUT)
+    except asyncio.TimeoutError:
+        log.info("caller_profile_late", extra={"call_id": call_id})
+        return ""
+    return profile.instructions() if profile is not None else ""
+
+async def websocket_task(call_id: str, phone_number: Optional[str], response_create: Dict[str, Any], twilio_call_sid: Optional[str] = None,
+                         client_id: Optional[str] = None, call_metrics: Optional[CallMetrics] = None,
+                         greeting_frame: Optional[str] = None, ws_open: Optional["asyncio.Future"] = None,
+                         caller_profile: Optional["asyncio.Future"] = None) -> None:
+    # Tenant and call_id context for this call task: tool calls, log writes and log records inherit it
+    token = bind_call(call_id)
     try:
-        async with websockets.connect(
-            "wss://api.openai.com/v1/realtime?call_id=" + call_id,
-            extra_headers=config.AUTH_HEADER,
-        ) as websocket:
-            # Enable server-side transcription via session.update
+        with use_tenant(client_id):
+            await _websocket_session(call_id, phone_number, response_create, twilio_call_sid,
+                                     call_metrics or CallMetrics(call_id), greeting_frame, ws_open, caller_profile)
+    finally:
+        unbind_call(token)
+
+def _connect(call_id: str):
+    return websockets.connect(
+        config.OPENAI_REALTIME_WS_URL + "?call_id=" + call_id,
+        extra_headers=config.AUTH_HEADER,
+        ping_interval=config.WS_PING_INTERVAL or None,
+        ping_timeout=config.WS_PING_TIMEOUT or None,
+    )
+
+async def _discard(ws_open: "asyncio.Future") -> None:
+    # Early socket of a call that was not accepted
+    if not ws_open.done():
+        ws_open.cancel()
+    try:
+        websocket = await ws_open
+        await websocket.close()
+    except BaseException:
+        pass
+
+@functools.lru_cache(maxsize=1)
+def _session_update_frame() -> str:
+    # Same tools and transcription config for every call: serialized once per process
+    # (TOOLS_SCHEMA is fixed at import, so the process is the tool-schema version)
+    return json.dumps(_session_update())
+
+def _seed_caller_profile(fut: "asyncio.Future", tool_cache: CallToolCache, call_metrics: CallMetrics) -> None:
+    # The caller's reservations answer get_task(name) for this call without a DynamoDB read
+    if fut.cancelled() or fut.exception() is not None:
+        return
+    profile: Optional[CallerProfile] = fut.result()
+    if profile is None:
+        return
+    seeded = sum(tool_cache.seed("get_task", {"name": item["name"]}, {"item": item})
+                 for item in profile.reservations if item.get("name"))
+    call_metrics.caller_profile = {**profile.to_dict(), "seeded": seeded}
+
+def _record_turn(transcript: Optional[CallTranscript], live: Optional[LiveCall], phone_number: Optional[str],
+                 call_sid: str, role: str, text: str) -> None:
+    # CALL_LOG_MODE: items -> one app-logs item per utterance; transcript -> buffered for the
+    # per-call document; both -> both. The live tail is kept either way
+    if live is not None:
+        live.add_turn(role, text)
+    if transcript is not None:
+        transcript.add_turn(role, text)
+    if config.CALL_LOG_MODE != "transcript":
+        if role == "user":
+            write_call_log(phone_number=phone_number, user_text=text, call_sid=call_sid)
+        else:
+            write_call_log(phone_number=phone_number, assistant_text=text, call_sid=call_sid)
+
+async def _checkpoint_transcript(transcript: CallTranscript, interval: float) -> None:
+    # Crash safety: rewrite the in-progress document now and then while the call is live
+    while True:
+        await asyncio.sleep(interval)
+        if transcript.dirty:
+            write_call_transcript(transcript, final=False)
+
+def _session_update() -> Dict[str, Any]:
+    # Enable server-side transcription and expose the tools
+    return {
+        "type": "session.update",
+        "session": {
+            "type": "realtime",
+            "tools": TOOLS_SCHEMA,
+            "audio": {
+                "input": {
+                    "transcription": {
+                        "model": "whisper-1",
+                        "language": "ja"
+                    }
+                }
+            }
+        }
+    }
+
+async def _websocket_session(call_id: str, phone_number: Optional[str], response_create: Dict[str, Any], twilio_call_sid: Optional[str],
+                             call_metrics: CallMetrics, greeting_frame: Optional[str] = None,
+                             ws_open: Optional["asyncio.Future"] = None,
+                             caller_profile: Optional["asyncio.Future"] = None) -> None:
+    outcome = "ok"
+    log_sid = twilio_call_sid or call_id
+    call_transcript = (new_call_transcript(log_sid, phone_number)
+                       if config.CALL_LOG_MODE in ("transcript", "both") else None)
+    checkpoints: Optional[asyncio.Task] = None
+    # Per-call state lives outside the socket so it survives a reconnect
+    conn: Dict[str, Any] = {"ws": None}
+    # function_call_output frames not yet followed by a response.created, by tool call id
+    unacked: Dict[str, str] = {}
+    assistant_text_chunks = []
+    # Accumulate tool call arguments by call_id
+    tool_args_buf: Dict[str, str] = {}
+    # Remember tool name by call_id (some done events may omit name)
+    tool_name_by_id: Dict[str, str] = {}
+    # Incremental parse of the streamed arguments, for speculative prefetch
+    tool_args_scan: Dict[str, PartialJsonObject] = {}
+    tool_cache = CallToolCache()
+    # What routed actions (status / transcript tail / hangup) see of this call
+    live = LiveCall(call_id, lambda: {
+        "connected": conn["ws"] is not None,
+        "response_active": state["response_active"],
+        "pending_tools": [tool_name_by_id.get(i, "") for i in pending_tools],
+        "tool_args_streaming": len(tool_args_buf),
+        "reconnects": len(call_metrics.reconnect_gaps),
+        "events": call_metrics.events,
+        "turns": len(live.turns),
+    })
+    call_host.attach(call_id, live=live)
+    if caller_profile is not None:
+        caller_profile.add_done_callback(lambda f: _seed_caller_profile(f, tool_cache, call_metrics))
+    # Tool calls in flight; several calls from one response run concurrently
+    pending_tools: Dict[str, asyncio.Task] = {}
+    # response.create is only sent once the response that issued the calls is done
+    state = {"response_active": False, "needs_continue": False}
+
+    async def _send(frame: Dict[str, Any], ack_key: Optional[str] = None) -> bool:
+        # Frames with an ack_key (function_call_output) are kept until the server starts a
+        # response after them and are replayed on a reconnect; a send into a socket that is
+        # already dying "succeeds" locally but never arrives
+        data = json.dumps(frame)
+        if ack_key:
+            unacked[ack_key] = data
+        ws = conn["ws"]
+        if ws is None:
+            return False
+        try:
+            await ws.send(data)
+            return True
+        except websockets.exceptions.ConnectionClosed:
+            return False
+
+    async def _continue_if_ready() -> None:
+        if state["needs_continue"] and not pending_tools and not state["response_active"]:
+            # Left pending while disconnected; _resync() retries after the reconnect
+            if await _send({"type": "response.create"}):
+                state["needs_continue"] = False
+
+    async def _resync(websocket) -> None:
+        # After a reconnect: the response in flight is gone; replay outputs, then continue
+        state["response_active"] = False
+        if unacked:
+            for data in list(unacked.values()):
+                await websocket.send(data)
+            state["needs_continue"] = True
+        await _continue_if_ready()
+
+    async def _run_tool_call(tool_call_id: str, tool_name: Optional[str], args: Dict[str, Any]) -> None:
+        try:
+            started = time.monotonic()
+            result = await tool_cache.run(tool_name or "", args)
+            tool_outcome = "ok"
+            if isinstance(result, dict) and "error" in result:
+                tool_outcome = "timeout" if result.get("error") == "timeout" else "error"
+            call_metrics.tool_done(tool_name or "", time.monotonic() - started, tool_outcome)
+            if call_transcript is not None:
+                call_transcript.add_tool(tool_name or "", args, (time.monotonic() - started) * 1000, tool_outcome)
             try:
-                await websocket.send(json.dumps({
-                    "type": "session.update",
-                    "session": {
-                        "type": "realtime",
-                        "tools": TOOLS_SCHEMA,
-                        "audio": {
-                            "input": {
-                                "transcription": {
-                                    "model": "whisper-1",
-                                    "language": "ja"
-                                }
-                            }
-                        }
+                sent = await _send({
+                    "type": "conversation.item.create",
+                    "item": {
+                        "type": "function_call_output",
+                        "call_id": tool_call_id,
+                        "output": shape_result(tool_name or "", result)
                     }
-                }))
-            except Exception as _e:
-                print("session.update (enable transcription) failed:", _e)
+                }, ack_key=tool_call_id)
+                if sent:
+                    call_metrics.tool_output_sent(tool_name or "")
+            except Exception:
+                log.error("function_call_output_failed", extra={"tool": tool_name}, exc_info=True)
+            state["needs_continue"] = True
+        finally:
+            pending_tools.pop(tool_call_id, None)
+            # Kept until here so the live status can name the tools still running
+            tool_name_by_id.pop(tool_call_id, None)
+        # Ask the model to continue the response
+        try:
+            await _continue_if_ready()
+        except Exception:
+            log.error("response_create_after_tool_failed", exc_info=True)
 
-            # Send initial greeting response and log it
-            await websocket.send(json.dumps(response_create))
+    # Event handlers, one subscription per concern; unsubscribed types are never parsed
+    dispatcher = EventDispatcher()
+    dispatcher.observe(call_metrics.on_event)
+
+    @dispatcher.on("error")
+    def _on_error(evt):
+        log.error("realtime_error", extra={"error": evt.get("error")})
+
+    @dispatcher.on("input_audio_buffer.committed")
+    def _on_committed(evt):
+        log.debug("input_audio_buffer_committed", extra={"sample": "input_audio_buffer_committed"})
+
+    # Response lifecycle (gates the response.create after tool calls)
+    @dispatcher.on("response.created")
+    def _on_response_created(evt):
+        state["response_active"] = True
+        unacked.clear()
+
+    @dispatcher.on("response.done")
+    async def _on_response_done(evt):
+        state["response_active"] = False
+        await _continue_if_ready()
+
+    # Assistant outputs
+    @dispatcher.on("response.output_text.delta")
+    def _on_text_delta(evt):
+        delta = evt.get("delta") or {}
+        for c in delta.get("content", []):
+            if c.get("type") == "output_text":
+                txt = c.get("text") or ""
+                if txt:
+                    assistant_text_chunks.append(txt)
+
+    @dispatcher.on("response.output_audio_transcript.delta")
+    def _on_transcript_delta(evt):
+        delta_txt = evt.get("delta")
+        if isinstance(delta_txt, str) and delta_txt:
+            assistant_text_chunks.append(delta_txt)
+
+    @dispatcher.on("response.output_audio_transcript.done")
+    def _on_transcript_done(evt):
+        transcript = evt.get("transcript")
+        if isinstance(transcript, str) and transcript.strip():
+            _record_turn(call_transcript, live, phone_number, log_sid, "assistant", transcript.strip())
+        assistant_text_chunks.clear()
+
+    @dispatcher.on("response.output_text.done", "response.completed")
+    def _on_text_done(evt):
+        if assistant_text_chunks:
+            full_text = "".join(assistant_text_chunks).strip()
+            if full_text:
+                _record_turn(call_transcript, live, phone_number, log_sid, "assistant", full_text)
+            assistant_text_chunks.clear()
+
+    # Tool calling (function calling) - the name arrives with the output item
+    @dispatcher.on("response.output_item.added")
+    def _on_output_item(evt):
+        item = evt.get("item") or {}
+        if item.get("type") == "function_call" and item.get("call_id") and item.get("name"):
+            tool_name_by_id[item["call_id"]] = item["name"]
+
+    # Arguments streaming: start read-only lookups as soon as their key fields are complete
+    @dispatcher.on("response.function_call_arguments.delta", "response.tool_call.delta")
+    def _on_tool_args_delta(evt):
+        tool_call_id = evt.get("call_id")
+        tool_name = evt.get("name")
+        delta = evt.get("delta") or evt.get("arguments_delta") or ""
+        if not isinstance(delta, str):
+            delta = ""
+        if tool_call_id:
+            tool_args_buf[tool_call_id] = tool_args_buf.get(tool_call_id, "") + delta
+            if tool_name:
+                tool_name_by_id[tool_call_id] = tool_name
+            scan = tool_args_scan.setdefault(tool_call_id, PartialJsonObject())
+            if scan.feed(delta):
+                tool_cache.prefetch(tool_name_by_id.get(tool_call_id), scan.fields)
+
+    @dispatcher.on("response.function_call_arguments.done", "response.tool_call.done")
+    def _on_tool_args_done(evt):
+        tool_call_id = evt.get("call_id")
+        tool_name = evt.get("name") or (tool_call_id and tool_name_by_id.get(tool_call_id))
+        args_json = evt.get("arguments") or (tool_call_id and tool_args_buf.get(tool_call_id, "")) or ""
+        # Parse args
+        args = {}
+        try:
+            if args_json:
+                args = json.loads(args_json)
+        except Exception:
+            args = {}
+        log.info("tool_call", extra={"tool": tool_name, "tool_call_id": tool_call_id, "arguments": args})
+        if not tool_call_id:
+            log.error("tool_call_without_call_id", extra={"tool": tool_name})
+        else:
+            # Execute tool off-loop; the receive loop keeps handling events meanwhile
+            pending_tools[tool_call_id] = asyncio.create_task(
+                _run_tool_call(tool_call_id, tool_name, args)
+            )
+        # Clear buffer for this call id (the name goes when the tool task finishes)
+        tool_args_buf.pop(tool_call_id, None)
+        if tool_call_id not in pending_tools:
+            tool_name_by_id.pop(tool_call_id, None)
+        tool_args_scan.pop(tool_call_id, None)
+
+    # User transcript (final)
+    @dispatcher.on("conversation.item.input_audio_transcription.completed", "input_audio_transcription.completed")
+    def _on_user_transcript(evt):
+        transcript = evt.get("transcript")
+        if not transcript:
+            tr = evt.get("transcription") or {}
+            transcript = tr.get("text")
+        log.debug("user_transcript", extra={"event_type": evt.get("type"), "transcript": transcript})
+        if isinstance(transcript, str) and transcript.strip():
+            _record_turn(call_transcript, live, phone_number, log_sid, "user", transcript.strip())
+
+    # User transcript (delta)
+    @dispatcher.on("conversation.item.input_audio_transcription.delta")
+    def _on_user_transcript_delta(evt):
+        # Several per utterance: sampled, and only at DEBUG
+        log.debug("user_transcript_delta", extra={"delta": evt.get("delta"), "sample": "user_transcript_delta"})
+
+    @dispatcher.on("conversation.item.input_audio_transcription.failed")
+    def _on_user_transcript_failed(evt):
+        log.warning("transcription_failed", extra={"error": evt.get("error")})
+
+    # Fallback user transcript
+    @dispatcher.on("conversation.item.added", "conversation.item.done")
+    def _on_item(evt):
+        item = evt.get("item") or {}
+        if item.get("role") == "user":
+            for c in item.get("content", []):
+                if c.get("type") == "input_audio":
+                    tr = c.get("transcript")
+                    if isinstance(tr, str) and tr.strip():
+                        _record_turn(call_transcript, live, phone_number, log_sid, "user", tr.strip())
+
+    try:
+        if call_transcript is not None and config.CALL_TRANSCRIPT_CHECKPOINT_SECONDS > 0:
+            checkpoints = asyncio.create_task(
+                _checkpoint_transcript(call_transcript, config.CALL_TRANSCRIPT_CHECKPOINT_SECONDS))
+        attempt = 0
+        dropped_at: Optional[float] = None
+        while True:
             try:
-                greeting = response_create.get("response", {}).get("instructions")
-                if greeting:
-                    write_call_log(phone_number=phone_number, assistant_text=greeting, call_sid=(twilio_call_sid or call_id))
-            except Exception as _e:
-                print("Greeting log failed:", _e)
-
-            assistant_text_chunks = []
-            # Accumulate tool call arguments by call_id
-            tool_args_buf: Dict[str, str] = {}
-            # Remember tool name by call_id (some done events may omit name)
-            tool_name_by_id: Dict[str, str] = {}
-
-            while True:
-                raw_message = await websocket.recv()
+                if ws_open is not None:
+                    early, ws_open = ws_open, None
+                    try:
+                        websocket = await early
+                    except Exception as e:
+                        # Raced ahead of /accept: connect again now that the call is accepted
+                        log.info("ws_early_connect_failed", extra={"error": repr(e)})
+                        websocket = await _connect(call_id)
+                else:
+                    websocket = await _connect(call_id)
                 try:
-                    evt = json.loads(raw_message)
-                    evt_type = evt.get("type")
-                    if evt_type == "error":
-                        print("[WS ERROR]", json.dumps(evt, ensure_ascii=False))
-                    if isinstance(evt_type, str) and "input_audio_transcription" in evt_type:
-                        print("[WS TRANSCRIPTION EVT]", evt_type, json.dumps(evt, ensure_ascii=False))
-                    if evt_type == "input_audio_buffer.committed":
-                        print("input_audio_buffer committed; waiting for transcription events...")
-
-                    # Assistant outputs
-                    if evt_type == "response.output_text.delta":
-                        delta = evt.get("delta") or {}
-                        for c in delta.get("content", []):
-                            if c.get("type") == "output_text":
-                                txt = c.get("text") or ""
-                                if txt:
-                                    assistant_text_chunks.append(txt)
-                    elif evt_type == "response.output_audio_transcript.delta":
-                        delta_txt = evt.get("delta")
-                        if isinstance(delta_txt, str) and delta_txt:
-                            assistant_text_chunks.append(delta_txt)
-                    elif evt_type == "response.output_audio_transcript.done":
-                        transcript = evt.get("transcript")
-                        if isinstance(transcript, str) and transcript.strip():
-                            write_call_log(phone_number=phone_number, assistant_text=transcript.strip(), call_sid=(twilio_call_sid or call_id))
-                        assistant_text_chunks = []
-                    elif evt_type in ("response.output_text.done", "response.completed"):
-                        if assistant_text_chunks:
-                            full_text = "".join(assistant_text_chunks).strip()
-                            if full_text:
-                                write_call_log(phone_number=phone_number, assistant_text=full_text, call_sid=(twilio_call_sid or call_id))
-                            assistant_text_chunks = []
-                    # Tool calling (function calling) - arguments streaming
-                    elif evt_type in ("response.function_call_arguments.delta", "response.tool_call.delta"):
-                        tool_call_id = evt.get("call_id")
-                        tool_name = evt.get("name")
-                        delta = evt.get("arguments_delta") or ""
-                        if not isinstance(delta, str):
-                            delta = ""
-                        if tool_call_id:
-                            tool_args_buf[tool_call_id] = tool_args_buf.get(tool_call_id, "") + delta
-                            if tool_name:
-                                tool_name_by_id[tool_call_id] = tool_name
-                    elif evt_type in ("response.function_call_arguments.done", "response.tool_call.done"):
-                        print("response.function_call_arguments.done or response.tool_call.done")
-                        pprint.pprint(evt)
-                        tool_call_id = evt.get("call_id")
-                        tool_name = evt.get("name") or (tool_call_id and tool_name_by_id.get(tool_call_id))
-                        # args_json = tool_call_id and tool_args_buf.get(tool_call_id, "") or ""
-                        args_json = evt.get("arguments") or ""
-                        # Parse args
-                        args = {}
+                    conn["ws"] = websocket
+                    first = "ws_open" not in call_metrics.marks
+                    if first:
+                        call_metrics.ws_opened()
+                    else:
+                        call_metrics.ws_reconnected(time.monotonic() - dropped_at)
+                        log.info("ws_reconnected", extra={"attempt": attempt, "replay": len(unacked),
+                                                          "gap_ms": round((time.monotonic() - dropped_at) * 1000, 1)})
+                    attempt = 0
+                    dropped_at = None
+                    # Tools and transcription config (re-sent on every connection)
+                    await websocket.send(_session_update_frame())
+
+                    if first:
+                        # Send initial greeting response and log it
+                        await websocket.send(greeting_frame or json.dumps(response_create))
+                        call_metrics.greeting_sent()
                         try:
-                            if args_json:
-                                args = json.loads(args_json)
+                            greeting = response_create.get("response", {}).get("instructions")
+                            if greeting:
+                                _record_turn(call_transcript, live, phone_number, log_sid, "assistant", greeting)
                         except Exception:
-                            args = {}
-                        print("[tool call]", tool_name, "args=", args)
-                        # Execute tool
-                        result: Any = {"error": "unknown tool"}
-                        impl = TOOLS_IMPL.get(tool_name or "")
-                        if impl:
-                            try:
-                                result = impl(args)
-                            except Exception as e:
-                                result = {"error": str(e)}
-                        if not tool_call_id:
-                            print("[WS ERROR] function_call_arguments.done without call_id")
-                        else:
-                            # Send function_call_output back to Realtime
-                            try:
-                                await websocket.send(json.dumps({
-                                    "type": "conversation.item.create",
-                                    "item": {
-                                        "type": "function_call_output",
-                                        "call_id": tool_call_id,
-                                        "output": json.dumps(result, ensure_ascii=False)
-                                    }
-                                }))
-                            except Exception as _e:
-                                print("[WS ERROR] send function_call_output failed:", _e)
-                        # Clear buffer for this call id
-                        if tool_call_id and tool_call_id in tool_args_buf:
-                            del tool_args_buf[tool_call_id]
-                        if tool_call_id and tool_call_id in tool_name_by_id:
-                            del tool_name_by_id[tool_call_id]
-                        # Ask the model to continue the response
-                        await websocket.send(json.dumps({"type": "response.create"}))
-                    # User transcript (final)
-                    elif evt_type in ("conversation.item.input_audio_transcription.completed", "input_audio_transcription.completed"):
-                        transcript = evt.get("transcript")
-                        if not transcript:
-                            tr = evt.get("transcription") or {}
-                            transcript = tr.get("text")
-                        print("[user transcription]", evt_type, repr(transcript))
-                        if isinstance(transcript, str) and transcript.strip():
-                            write_call_log(phone_number=phone_number, user_text=transcript.strip(), call_sid=(twilio_call_sid or call_id))
-                    # User transcript (delta)
-                    elif evt_type == "conversation.item.input_audio_transcription.delta":
-                        delta_txt = evt.get("delta")
-                        print("[user transcription delta]", repr(delta_txt))
-                    # Fallback user transcript
-                    elif evt_type in ("conversation.item.added", "conversation.item.done"):
-                        item = evt.get("item") or {}
-                        if item.get("role") == "user":
-                            for c in item.get("content", []):
-                                if c.get("type") == "input_audio":
-                                    tr = c.get("transcript")
-                                    if isinstance(tr, str) and tr.strip():
-                                        write_call_log(phone_number=phone_number, user_text=tr.strip(), call_sid=(twilio_call_sid or call_id))
-                except Exception:
-                    pass
-    except Exception as e:
-        print(f"WebSocket error: {e}")
+                            log.warning("greeting_log_failed", exc_info=True)
+                    else:
+                        await _resync(websocket)
+
+                    while True:
+                        await dispatcher.dispatch(await websocket.recv())
+                finally:
+                    conn["ws"] = None
+                    await websocket.close()
+            except websockets.exceptions.ConnectionClosedOK:
+                # Normal close: the call is over
+                raise
+            except (websockets.exceptions.ConnectionClosedError, websockets.exceptions.InvalidHandshake,
+                    OSError, asyncio.TimeoutError) as e:
+                status = getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+                if status is not None and 400 <= int(status) < 500 and int(status) != 429:
+                    # The call is gone (or we are not allowed to attach): nothing to resume
+                    raise
+                if dropped_at is None:
+                    dropped_at = time.monotonic()
+                attempt += 1
+                if attempt > config.WS_RECONNECT_MAX_ATTEMPTS:
+                    WS_RECONNECTS.inc(outcome="gave_up")
+                    raise
+                delay = min(config.WS_RECONNECT_MAX_DELAY, config.WS_RECONNECT_BASE_DELAY * (2 ** (attempt - 1)))
+                delay *= 0.5 + random.random() / 2
+                log.warning("ws_dropped", extra={"attempt": attempt, "retry_in_ms": round(delay * 1000),
+                                                 "error": repr(e), "pending_tools": len(pending_tools)})
+                await asyncio.sleep(delay)
+    except websockets.exceptions.ConnectionClosedOK:
+        log.info("ws_closed")
+    except Exception:
+        outcome = "ws_error"
+        log.error("ws_error", exc_info=True)
+    finally:
+        if ws_open is not None:
+            await _discard(ws_open)
+        if checkpoints is not None:
+            checkpoints.cancel()
+        for task in list(pending_tools.values()):
+            task.cancel()
+        if unacked:
+            log.warning("tool_outputs_unacked", extra={"count": len(unacked)})
+        if caller_profile is not None:
+            caller_profile.cancel()
+        call_metrics.tool_cache = tool_cache.stats
+        tool_cache.close()
+        if live.hangup_requested and outcome == "ok":
+            outcome = "hangup"
+        try:
+            summary = call_metrics.finish(outcome)
+            if call_transcript is not None:
+                write_call_transcript(call_transcript, final=True, summary=summary)
+            if config.CALL_LOG_MODE != "transcript":
+                write_call_summary(summary, phone_number=phone_number, call_sid=log_sid)
+        except Exception:
+            log.error("call_summary_failed", exc_info=True)
+        # Call ended: wait for this call's queued log items only, without parking a pool thread
+        try:
+            await flush_call_logs_for(log_sid)
+        except Exception:
+            log.error("call_log_flush_failed", exc_info=True)
 
 
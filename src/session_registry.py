@@ -0,0 +1,565 @@
+import abc
+import asyncio
+import collections
+import json
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Attr, Key
+
+from . import config
+from . import metrics
+from .app_logging import get_logger
+from .aws_clients import dynamodb_table
+from .call_host import CallHost, call_host
+from .openai_http import call_control
+
+log = get_logger(__name__)
+
+# Which worker owns which live call, across containers (SESSION_REGISTRY_BACKEND):
+#   memory   -> this process only (default; one worker, local runs)
+#   dynamodb -> SESSION_REGISTRY_TABLE_NAME (PK pk, SK sk; TTL attribute expires_at)
+#   redis    -> SESSION_REGISTRY_REDIS_URL (needs the redis package)
+# Every worker is a node: it heartbeats and holds a lease on each call it runs, renewed
+# with the heartbeat, so a dead worker's calls drop out after SESSION_LEASE_SECONDS.
+# Operator actions on a call (/admin/sessions/<call_id>/...) are routed to the owner via
+# its mailbox in the registry: gunicorn workers share one port and App Runner instances
+# are not addressable, so the registry is the one path that reaches a given worker.
+
+HEARTBEATS = metrics.counter("session_registry_heartbeats_total", "Node heartbeats by outcome (ok/error)")
+REGISTRY_ERRORS = metrics.counter("session_registry_errors_total", "Session registry calls that failed, by operation")
+LEASES_LOST = metrics.counter("session_leases_lost_total", "Call leases found held by another node on renewal")
+ROUTES = metrics.counter("session_routes_total", "Routed call actions by action and path (local/remote/not_found/timeout)")
+ROUTE_LATENCY = metrics.histogram("session_route_seconds", "Routed call action latency, by path")
+
+ACTIONS = ("status", "transcript", "hangup")
+# Mailbox messages and replies nobody picked up are dropped after this long
+_MESSAGE_TTL = 60.0
+# route() polls for the owner's reply starting at _REPLY_POLL and doubling up to _REPLY_POLL_MAX
+_REPLY_POLL = 0.05
+_REPLY_POLL_MAX = 0.5
+
+
+class SessionRegistry(abc.ABC):
+    """Backend interface. Records are plain dicts with node_id / call_id, expires_at and info.
+
+    Calls are blocking; SessionNode runs them off the call host loop.
+    """
+
+    @abc.abstractmethod
+    def heartbeat(self, node_id: str, info: Dict[str, Any], ttl: float) -> None:
+        ...
+
+    @abc.abstractmethod
+    def nodes(self) -> List[Dict[str, Any]]:
+        ...
+
+    @abc.abstractmethod
+    def claim(self, call_id: str, node_id: str, info: Dict[str, Any], ttl: float) -> bool:
+        """Take or extend the lease on call_id; False while another node holds a live lease."""
+
+    def renew(self, calls: Dict[str, Dict[str, Any]], node_id: str, ttl: float) -> List[str]:
+        """Extend the leases on this node's calls; returns the call_ids now owned elsewhere."""
+        return [call_id for call_id, info in calls.items() if not self.claim(call_id, node_id, info, ttl)]
+
+    @abc.abstractmethod
+    def release(self, call_id: str, node_id: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def owner(self, call_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abc.abstractmethod
+    def calls(self) -> List[Dict[str, Any]]:
+        ...
+
+    @abc.abstractmethod
+    def post(self, node_id: str, message: Dict[str, Any]) -> None:
+        ...
+
+    @abc.abstractmethod
+    def fetch(self, node_id: str) -> List[Dict[str, Any]]:
+        """Take every message waiting in node_id's mailbox."""
+
+    @abc.abstractmethod
+    def reply(self, request_id: str, payload: Dict[str, Any]) -> None:
+        ...
+
+    @abc.abstractmethod
+    def take_reply(self, request_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+
+def _live(record: Optional[Dict[str, Any]], now: Optional[float] = None) -> bool:
+    return record is not None and float(record.get("expires_at") or 0) >= (now or time.time())
+
+
+class MemoryRegistry(SessionRegistry):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        self._calls: Dict[str, Dict[str, Any]] = {}
+        self._inbox: Dict[str, List[Dict[str, Any]]] = collections.defaultdict(list)
+        self._replies: Dict[str, Dict[str, Any]] = {}
+
+    def heartbeat(self, node_id, info, ttl):
+        with self._lock:
+            self._nodes[node_id] = {"node_id": node_id, "expires_at": time.time() + ttl, "info": info}
+
+    def nodes(self):
+        now = time.time()
+        with self._lock:
+            return [dict(r) for r in self._nodes.values() if _live(r, now)]
+
+    def claim(self, call_id, node_id, info, ttl):
+        with self._lock:
+            current = self._calls.get(call_id)
+            if _live(current) and current["node_id"] != node_id:
+                return False
+            self._calls[call_id] = {"call_id": call_id, "node_id": node_id, "expires_at": time.time() + ttl, "info": info}
+            return True
+
+    def release(self, call_id, node_id):
+        with self._lock:
+            if (self._calls.get(call_id) or {}).get("node_id") == node_id:
+                del self._calls[call_id]
+
+    def owner(self, call_id):
+        with self._lock:
+            record = self._calls.get(call_id)
+            return dict(record) if _live(record) else None
+
+    def calls(self):
+        now = time.time()
+        with self._lock:
+            return [dict(r) for r in self._calls.values() if _live(r, now)]
+
+    def post(self, node_id, message):
+        with self._lock:
+            self._inbox[node_id].append(message)
+
+    def fetch(self, node_id):
+        with self._lock:
+            return self._inbox.pop(node_id, [])
+
+    def reply(self, request_id, payload):
+        with self._lock:
+            self._replies[request_id] = payload
+
+    def take_reply(self, request_id):
+        with self._lock:
+            return self._replies.pop(request_id, None)
+
+
+class DynamoRegistry(SessionRegistry):
+    # pk: "node" | "call" | "inbox#<node_id>" | "reply"; sk: node_id / call_id / message id / request id
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+
+    @property
+    def _table(self):
+        return dynamodb_table(self.table_name)
+
+    @staticmethod
+    def _expires(ttl: float) -> int:
+        # Whole epoch seconds: also usable as the table's TTL attribute
+        return int(math.ceil(time.time() + ttl))
+
+    @staticmethod
+    def _record(item: Dict[str, Any], id_attr: str) -> Dict[str, Any]:
+        record = {id_attr: item["sk"], "expires_at": int(item.get("expires_at") or 0), "info": json.loads(item.get("info") or "{}")}
+        if item.get("node_id"):
+            record["node_id"] = item["node_id"]
+        return record
+
+    def _query(self, pk: str) -> List[Dict[str, Any]]:
+        kwargs: Dict[str, Any] = {"KeyConditionExpression": Key("pk").eq(pk), "ConsistentRead": True}
+        items: List[Dict[str, Any]] = []
+        while True:
+            r = self._table.query(**kwargs)
+            items.extend(r.get("Items", []))
+            if not r.get("LastEvaluatedKey"):
+                return items
+            kwargs["ExclusiveStartKey"] = r["LastEvaluatedKey"]
+
+    def heartbeat(self, node_id, info, ttl):
+        self._table.put_item(Item={"pk": "node", "sk": node_id, "node_id": node_id,
+                                   "expires_at": self._expires(ttl), "info": json.dumps(info)})
+
+    def nodes(self):
+        now = time.time()
+        return [r for r in (self._record(it, "node_id") for it in self._query("node")) if _live(r, now)]
+
+    def claim(self, call_id, node_id, info, ttl):
+        try:
+            self._table.put_item(
+                Item={"pk": "call", "sk": call_id, "node_id": node_id, "expires_at": self._expires(ttl),
+                      "info": json.dumps(info)},
+                # Lapsed once now >= expires_at, the same test _live() applies to records read back
+                ConditionExpression=Attr("sk").not_exists() | Attr("expires_at").lte(int(time.time()))
+                                    | Attr("node_id").eq(node_id),
+            )
+            return True
+        except Exception as e:
+            if _conditional_failed(e):
+                return False
+            raise
+
+    def release(self, call_id, node_id):
+        try:
+            self._table.delete_item(Key={"pk": "call", "sk": call_id}, ConditionExpression=Attr("node_id").eq(node_id))
+        except Exception as e:
+            if not _conditional_failed(e):
+                raise
+
+    def owner(self, call_id):
+        item = self._table.get_item(Key={"pk": "call", "sk": call_id}, ConsistentRead=True).get("Item")
+        record = self._record(item, "call_id") if item else None
+        return record if _live(record) else None
+
+    def calls(self):
+        now = time.time()
+        return [r for r in (self._record(it, "call_id") for it in self._query("call")) if _live(r, now)]
+
+    def post(self, node_id, message):
+        self._table.put_item(Item={"pk": f"inbox#{node_id}", "sk": f"{time.time_ns():020d}#{message['id']}",
+                                   "expires_at": self._expires(_MESSAGE_TTL), "message": json.dumps(message)})
+
+    def fetch(self, node_id):
+        items = self._query(f"inbox#{node_id}")
+        if not items:
+            return []
+        with self._table.batch_writer() as batch:
+            for it in items:
+                batch.delete_item(Key={"pk": it["pk"], "sk": it["sk"]})
+        now = time.time()
+        return [json.loads(it["message"]) for it in items if int(it.get("expires_at") or 0) >= now]
+
+    def reply(self, request_id, payload):
+        self._table.put_item(Item={"pk": "reply", "sk": request_id, "expires_at": self._expires(_MESSAGE_TTL),
+                                   "payload": json.dumps(payload, default=str)})
+
+    def take_reply(self, request_id):
+        item = self._table.get_item(Key={"pk": "reply", "sk": request_id}, ConsistentRead=True).get("Item")
+        if not item:
+            return None
+        self._table.delete_item(Key={"pk": "reply", "sk": request_id})
+        return json.loads(item["payload"])
+
+
+def _conditional_failed(e: Exception) -> bool:
+    return getattr(e, "response", {}).get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+
+# Lease compare-and-set, atomic on the server. KEYS: call key, calls index.
+# claim ARGV: node_id, record JSON, ttl ms, expires_at, call_id -> 1 when this node holds the lease
+_CLAIM_LUA = """
+local current = redis.call('GET', KEYS[1])
+if current and cjson.decode(current)['node_id'] ~= ARGV[1] then
+  return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[5])
+return 1
+"""
+# release ARGV: node_id, call_id -> 1 when this node's lease was deleted
+_RELEASE_LUA = """
+local current = redis.call('GET', KEYS[1])
+if not current or cjson.decode(current)['node_id'] ~= ARGV[1] then
+  return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[2])
+return 1
+"""
+
+
+class RedisRegistry(SessionRegistry):
+    # <prefix>node:<id> / <prefix>call:<id> hold JSON records with a PX expiry; the sorted sets
+    # <prefix>nodes / <prefix>calls (score = expires_at) list them without a keyspace scan.
+    # Call leases change only through the Lua scripts above (no GET-then-SET race between nodes)
+    def __init__(self, url: str, prefix: str = "rtsess:"):
+        try:
+            import redis  # type: ignore
+        except ImportError as e:
+            raise RuntimeError("SESSION_REGISTRY_BACKEND=redis needs the redis package "
+                               "(pip install -r requirements-redis.txt)") from e
+        self._r = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._claim = self._r.register_script(_CLAIM_LUA)
+        self._release = self._r.register_script(_RELEASE_LUA)
+
+    def _put(self, kind: str, id_: str, record: Dict[str, Any], ttl: float) -> None:
+        pipe = self._r.pipeline()
+        pipe.set(f"{self.prefix}{kind}:{id_}", json.dumps(record), px=max(1, int(ttl * 1000)))
+        pipe.zadd(f"{self.prefix}{kind}s", {id_: record["expires_at"]})
+        pipe.execute()
+
+    def _list(self, kind: str) -> List[Dict[str, Any]]:
+        index = f"{self.prefix}{kind}s"
+        now = time.time()
+        self._r.zremrangebyscore(index, "-inf", now)
+        ids = self._r.zrangebyscore(index, now, "+inf")
+        if not ids:
+            return []
+        return [json.loads(v) for v in self._r.mget([f"{self.prefix}{kind}:{i}" for i in ids]) if v]
+
+    def heartbeat(self, node_id, info, ttl):
+        self._put("node", node_id, {"node_id": node_id, "expires_at": time.time() + ttl, "info": info}, ttl)
+
+    def nodes(self):
+        return self._list("node")
+
+    def claim(self, call_id, node_id, info, ttl):
+        record = {"call_id": call_id, "node_id": node_id, "expires_at": time.time() + ttl, "info": info}
+        keys = [f"{self.prefix}call:{call_id}", f"{self.prefix}calls"]
+        return bool(self._claim(keys=keys, args=[node_id, json.dumps(record), max(1, int(ttl * 1000)),
+                                                 record["expires_at"], call_id]))
+
+    def release(self, call_id, node_id):
+        self._release(keys=[f"{self.prefix}call:{call_id}", f"{self.prefix}calls"], args=[node_id, call_id])
+
+    def owner(self, call_id):
+        raw = self._r.get(f"{self.prefix}call:{call_id}")
+        return json.loads(raw) if raw else None
+
+    def calls(self):
+        return self._list("call")
+
+    def post(self, node_id, message):
+        key = f"{self.prefix}inbox:{node_id}"
+        pipe = self._r.pipeline()
+        pipe.rpush(key, json.dumps(message))
+        pipe.pexpire(key, int(_MESSAGE_TTL * 1000))
+        pipe.execute()
+
+    def fetch(self, node_id):
+        key = f"{self.prefix}inbox:{node_id}"
+        pipe = self._r.pipeline(transaction=True)
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        raw, _ = pipe.execute()
+        return [json.loads(m) for m in raw]
+
+    def reply(self, request_id, payload):
+        self._r.set(f"{self.prefix}reply:{request_id}", json.dumps(payload, default=str), px=int(_MESSAGE_TTL * 1000))
+
+    def take_reply(self, request_id):
+        key = f"{self.prefix}reply:{request_id}"
+        pipe = self._r.pipeline(transaction=True)
+        pipe.get(key)
+        pipe.delete(key)
+        raw, _ = pipe.execute()
+        return json.loads(raw) if raw else None
+
+
+def make_registry(backend: Optional[str] = None) -> SessionRegistry:
+    backend = (backend or config.SESSION_REGISTRY_BACKEND).lower()
+    if backend == "dynamodb":
+        return DynamoRegistry(config.SESSION_REGISTRY_TABLE_NAME)
+    if backend == "redis":
+        return RedisRegistry(config.SESSION_REGISTRY_REDIS_URL)
+    return MemoryRegistry()
+
+
+class LiveCall:
+    """The part of a running call that routed actions can read or act on."""
+
+    def __init__(self, call_id: str, status: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.call_id = call_id
+        self.turns: Deque[Dict[str, Any]] = collections.deque(maxlen=max(1, config.SESSION_TAIL_TURNS))
+        self.status = status or dict
+        self.hangup_requested = False
+
+    def add_turn(self, role: str, text: str) -> None:
+        self.turns.append({"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                           "role": role, "text": text})
+
+    def tail(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        turns = list(self.turns)
+        return turns[-n:] if n else turns
+
+
+class SessionNode:
+    """This worker in the session registry: heartbeat, call leases, and the routed actions it serves."""
+
+    def __init__(self, host: CallHost, registry: Optional[SessionRegistry] = None, node_id: Optional[str] = None):
+        self.host = host
+        self._registry = registry
+        self._node_id = node_id
+        self._lock = threading.Lock()
+        self._tasks: List[Any] = []
+        self.started_at = time.time()
+
+    @property
+    def node_id(self) -> str:
+        # Resolved after the fork: every worker process is its own node
+        if self._node_id is None:
+            self._node_id = f"{config.NODE_NAME or socket.gethostname()}:{os.getpid()}"
+        return self._node_id
+
+    @property
+    def registry(self) -> SessionRegistry:
+        if self._registry is None:
+            self._registry = make_registry()
+        return self._registry
+
+    def start(self) -> None:
+        with self._lock:
+            if self._tasks:
+                return
+            self._tasks = [self.host.run_coroutine(self._heartbeat()), self.host.run_coroutine(self._serve_mailbox())]
+            log.info("session_node_started", extra={"node_id": self.node_id, "backend": config.SESSION_REGISTRY_BACKEND})
+
+    def stop(self) -> None:
+        with self._lock:
+            for task in self._tasks:
+                task.cancel()
+            self._tasks = []
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    # ---- heartbeat and leases ----
+    async def _heartbeat(self) -> None:
+        while True:
+            try:
+                await self.beat()
+                HEARTBEATS.inc(outcome="ok")
+            except Exception as e:
+                HEARTBEATS.inc(outcome="error")
+                log.warning("session_heartbeat_failed", extra={"node_id": self.node_id, "error": repr(e)})
+            await asyncio.sleep(config.SESSION_HEARTBEAT_SECONDS)
+
+    async def beat(self) -> None:
+        sessions = self.host.sessions()
+        info = {"active_calls": len(sessions), "max_active_calls": self.host.max_concurrent_calls,
+                "draining": self.host.draining, "started_at": self.started_at}
+        await self._run(self.registry.heartbeat, self.node_id, info, config.SESSION_LEASE_SECONDS)
+        calls = {s["call_id"]: _lease_info(s.get("client_id"), s["started_at"]) for s in sessions}
+        for call_id in await self._run(self.registry.renew, calls, self.node_id, config.SESSION_LEASE_SECONDS):
+            LEASES_LOST.inc()
+            log.warning("call_lease_lost", extra={"call_id": call_id, "node_id": self.node_id})
+
+    async def claim(self, call_id: str, client_id: Optional[str]) -> bool:
+        """Lease call_id for this node; False when another node already runs it (redelivered webhook)."""
+        self.start()
+        try:
+            ok = await self._run(self.registry.claim, call_id, self.node_id, _lease_info(client_id, time.time()),
+                                 config.SESSION_LEASE_SECONDS)
+        except Exception as e:
+            # Registry unavailable: the call still runs, other nodes just cannot see it
+            REGISTRY_ERRORS.inc(op="claim")
+            log.warning("call_claim_failed", extra={"call_id": call_id, "error": repr(e)})
+            return True
+        if not ok:
+            log.warning("call_owned_elsewhere", extra={"call_id": call_id})
+        return ok
+
+    async def release(self, call_id: str) -> None:
+        try:
+            await self._run(self.registry.release, call_id, self.node_id)
+        except Exception as e:
+            REGISTRY_ERRORS.inc(op="release")
+            log.warning("call_release_failed", extra={"call_id": call_id, "error": repr(e)})
+
+    def cluster(self) -> Dict[str, Any]:
+        return {"node_id": self.node_id, "backend": config.SESSION_REGISTRY_BACKEND,
+                "nodes": self.registry.nodes(), "calls": self.registry.calls()}
+
+    # ---- routed actions ----
+    async def _serve_mailbox(self) -> None:
+        # Each poll is a registry read (a DynamoDB query): an idle mailbox is polled less and
+        # less often, up to SESSION_INBOX_POLL_MAX_SECONDS; a message resets the interval
+        delay = config.SESSION_INBOX_POLL_SECONDS
+        while True:
+            try:
+                messages = await self._run(self.registry.fetch, self.node_id)
+                for message in messages:
+                    asyncio.ensure_future(self._answer(message))
+                if messages:
+                    delay = config.SESSION_INBOX_POLL_SECONDS
+                else:
+                    delay = min(delay * 2, max(config.SESSION_INBOX_POLL_SECONDS, config.SESSION_INBOX_POLL_MAX_SECONDS))
+            except Exception as e:
+                REGISTRY_ERRORS.inc(op="fetch")
+                log.warning("session_mailbox_failed", extra={"node_id": self.node_id, "error": repr(e)})
+            await asyncio.sleep(delay)
+
+    async def _answer(self, message: Dict[str, Any]) -> None:
+        try:
+            status, body = await self.execute(message.get("call_id", ""), message.get("action", ""), message.get("args") or {})
+            await self._run(self.registry.reply, message["id"], {"status": status, "body": body})
+        except Exception:
+            REGISTRY_ERRORS.inc(op="reply")
+            log.error("session_action_failed", extra={"action": message.get("action")}, exc_info=True)
+
+    async def execute(self, call_id: str, action: str, args: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Run an action against a call on this worker."""
+        entry = self.host.get_session(call_id)
+        live: Optional[LiveCall] = (entry or {}).get("live")
+        if live is None:
+            return 404, {"error": "not found", "call_id": call_id, "node_id": self.node_id}
+        out: Dict[str, Any] = {"call_id": call_id, "node_id": self.node_id}
+        if action == "status":
+            return 200, {**out, "age_seconds": round(time.time() - entry["started_at"], 3), **live.status()}
+        if action == "transcript":
+            return 200, {**out, "turns": live.tail(args.get("tail"))}
+        if action == "hangup":
+            live.hangup_requested = True
+            res = await call_control(call_id, "hangup", max_retries=1)
+            ok = res is not None and res.is_success
+            log.info("call_hangup_requested", extra={"call_id": call_id, "ok": ok})
+            return (200 if ok else 502), {**out, "hangup": ok}
+        return 400, {**out, "error": f"unknown action: {action}"}
+
+    async def route(self, call_id: str, action: str, args: Optional[Dict[str, Any]] = None,
+                    timeout: Optional[float] = None) -> Tuple[int, Dict[str, Any]]:
+        """Run an action on whichever node owns call_id (locally when it is this worker)."""
+        started = time.perf_counter()
+        args = args or {}
+        if self.host.get_session(call_id) is not None:
+            path = "local"
+            status, body = await self.execute(call_id, action, args)
+        else:
+            owner = await self._run(self.registry.owner, call_id)
+            if owner is None:
+                path = "not_found"
+                status, body = 404, {"error": "not found", "call_id": call_id}
+            else:
+                status, body, path = await self._remote(owner["node_id"], call_id, action, args,
+                                                        config.SESSION_ROUTE_TIMEOUT if timeout is None else timeout)
+        ROUTES.inc(action=action, path=path)
+        ROUTE_LATENCY.observe(time.perf_counter() - started, path=path)
+        return status, body
+
+    async def _remote(self, node_id: str, call_id: str, action: str, args: Dict[str, Any],
+                      timeout: float) -> Tuple[int, Dict[str, Any], str]:
+        request_id = uuid.uuid4().hex
+        await self._run(self.registry.post, node_id, {"id": request_id, "call_id": call_id, "action": action,
+                                                      "args": args, "from": self.node_id})
+        deadline = time.monotonic() + timeout
+        poll = _REPLY_POLL
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(poll, max(0.0, deadline - time.monotonic())))
+            reply = await self._run(self.registry.take_reply, request_id)
+            if reply is not None:
+                return reply.get("status", 200), reply.get("body") or {}, "remote"
+            poll = min(poll * 2, _REPLY_POLL_MAX)
+        log.warning("session_route_timeout", extra={"call_id": call_id, "action": action, "owner": node_id})
+        return 504, {"error": "owner did not answer", "call_id": call_id, "node_id": node_id}, "timeout"
+
+
+def _lease_info(client_id: Optional[str], started_at: float) -> Dict[str, Any]:
+    # No caller number here: the registry is shared infrastructure
+    return {"client_id": client_id, "started_at": started_at}
+
+
+session_node = SessionNode(call_host)
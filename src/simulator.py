@@ -0,0 +1,123 @@
+import asyncio
+import contextlib
+import io
+import logging
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from . import app_logging
+from . import config
+from .call_metrics import CallMetrics
+from .dynamo_utils import call_log_writer, flush_call_logs
+from .fake_realtime import FakeRealtimeServer, load_script, synthetic_script
+from .tenant_cache import tenant_registry
+
+# Audio-free call simulator: N websocket_task sessions against the fake Realtime server
+# and a local DynamoDB, with scripted transcripts and tool calls. Entry point:
+#
+#   python -m src.tools_impl simulate --sessions 100 --concurrency 20 --speed 4
+
+
+def _pct(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def _use_local_dynamo(endpoint_url: Optional[str]) -> str:
+    # Never simulate against the configured (production) tables
+    try:
+        from bench import local_dynamo
+    except Exception as e:
+        raise SystemExit("simulate needs the bench package (run from the repository root): %s" % e)
+    return local_dynamo.start(endpoint_url)
+
+
+async def _run_sessions(sessions: int, concurrency: int, client_id: str) -> List[CallMetrics]:
+    # Imported here so the fake server URL/config is in place first
+    from .realtime_ws import websocket_task
+
+    tenant = await asyncio.get_running_loop().run_in_executor(None, tenant_registry.get, client_id)
+    sem = asyncio.Semaphore(max(1, concurrency))
+    results: List[CallMetrics] = []
+
+    async def _one(n: int) -> None:
+        async with sem:
+            cm = CallMetrics(f"rtc_sim_{n}", time.monotonic())
+            cm.accepted()
+            await websocket_task(
+                f"rtc_sim_{n}",
+                phone_number=f"+8190{n:08d}",
+                response_create=tenant.response_create(),
+                twilio_call_sid=f"CASIM{n:030d}",
+                client_id=client_id,
+                call_metrics=cm,
+            )
+            results.append(cm)
+
+    await asyncio.gather(*(_one(n) for n in range(sessions)))
+    return results
+
+
+def simulate(sessions: int = 20, concurrency: int = 10, speed: float = 4.0, turns: int = 4,
+             with_tools: bool = True, script_path: Optional[str] = None, endpoint_url: Optional[str] = None,
+             verbose: bool = False, log_mode: Optional[str] = None, drops: bool = False) -> Dict[str, Any]:
+    # stdout carries only the JSON report (pipeable into json.tool / jq); app logs go to stderr
+    app_logging.configure(force=True, stream=sys.stderr)
+    if not verbose:
+        logging.getLogger("app").setLevel(logging.WARNING)
+    script = load_script(script_path) if script_path else synthetic_script(turns, with_tools, drops=drops)
+    fake = FakeRealtimeServer(script, speed=speed).start_in_thread()
+    config.OPENAI_REALTIME_WS_URL = fake.ws_url
+    config.OPENAI_API_BASE = fake.api_base
+    if log_mode:
+        config.CALL_LOG_MODE = log_mode
+    _use_local_dynamo(endpoint_url)
+
+    from . import tools_impl
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        tools_impl.TOOLS_DEBUG = verbose
+        for i in range(turns):
+            tools_impl.create_task({"name": f"LOAD-{i}", "start_datetime": f"2025-12-24 {11 + i:02d}:00"})
+        base = dict(call_log_writer().stats)
+        started = time.perf_counter()
+        calls = asyncio.run(_run_sessions(sessions, concurrency, config.CLIENT_ID))
+        elapsed = time.perf_counter() - started
+        flush_call_logs(timeout=30)
+    logs = {k: v - base.get(k, 0) for k, v in call_log_writer().stats.items()}
+
+    tool_ms: Dict[str, List[float]] = {}
+    turn_ms: List[float] = []
+    outcomes: Dict[str, int] = {}
+    events = 0
+    gaps: List[float] = []
+    for cm in calls:
+        events += cm.events
+        gaps.extend(round(g * 1000, 1) for g in cm.reconnect_gaps)
+        turn_ms.extend(round(t * 1000, 1) for t in cm.turn_latencies)
+        for t in cm.tool_timings:
+            tool_ms.setdefault(t["tool"], []).append(t["ms"])
+            outcomes[t["outcome"]] = outcomes.get(t["outcome"], 0) + 1
+        if cm.outcome != "ok":
+            outcomes["session_" + str(cm.outcome)] = outcomes.get("session_" + str(cm.outcome), 0) + 1
+    return {
+        "sessions": len(calls),
+        "concurrency": concurrency,
+        "call_log_mode": config.CALL_LOG_MODE,
+        "elapsed_s": round(elapsed, 2),
+        "sessions_per_s": round(len(calls) / elapsed, 2) if elapsed else None,
+        "events_per_s": round(events / elapsed, 1) if elapsed else None,
+        "turn_latency_ms": {"p50": _pct(turn_ms, 0.5), "p99": _pct(turn_ms, 0.99)},
+        "tools": {
+            name: {"n": len(v), "p50": _pct(v, 0.5), "p90": _pct(v, 0.9), "p99": _pct(v, 0.99), "max": max(v)}
+            for name, v in sorted(tool_ms.items())
+        },
+        "tool_outcomes": outcomes,
+        "reconnects": {"n": len(gaps), "gap_ms_p50": _pct(gaps, 0.5), "gap_ms_max": max(gaps) if gaps else None},
+        "log_writes": {k: logs.get(k, 0) for k in ("enqueued", "written", "batches", "retries", "dropped", "failed",
+                                                           "coalesced", "write_units")},
+        "fake_server": dict(fake.stats),
+    }
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from . import config
+from . import metrics
+from .app_logging import get_logger
+from .dynamo_utils import load_system_prompt_from_dynamo
+from .faq_index import FaqIndex
+from .prompt_loader import PromptCache, build_system_prompt, read_prompt_version
+from .tenants import use_tenant
+
+log = get_logger(__name__)
+
+TENANT_CACHE_LOADS = metrics.counter("tenant_cache_loads_total", "Tenants loaded into the per-worker cache")
+TENANT_CACHE_EVICTIONS = metrics.counter("tenant_cache_evictions_total", "Tenants evicted from the per-worker cache")
+
+
+class TenantAssets:
+    """Everything a call needs from one tenant's configuration: prompt, FAQ index and greeting."""
+
+    def __init__(self, client_id: str):
+        self.client_id = client_id
+        self.faq = FaqIndex()
+        self.prompt = PromptCache(
+            lambda: build_system_prompt(client_id, self.faq),
+            version_reader=self._read_version,
+            ttl=config.PROMPT_CACHE_TTL,
+            check_interval=config.PROMPT_VERSION_CHECK_INTERVAL,
+        )
+        self.greeting = config.DEFAULT_GREETING
+        self.greeting_loaded_at = 0.0
+        self.last_checked = 0.0
+        # Serialized per-call payloads, rebuilt only when the prompt version / greeting changes
+        self._accept_body: Optional[Tuple[Tuple[str, str], bytes]] = None
+        self._greeting_frame: Optional[Tuple[str, str]] = None
+
+    def _read_version(self) -> Optional[str]:
+        with use_tenant(self.client_id):
+            return read_prompt_version()
+
+    def load(self) -> None:
+        self.prompt.refresh("boot")
+        self.refresh_greeting()
+        self.last_checked = time.time()
+
+    def refresh_greeting(self) -> None:
+        if not config.PROMPTS_TABLE_NAME:
+            return
+        with use_tenant(self.client_id):
+            greeting = load_system_prompt_from_dynamo(config.PROMPTS_TABLE_NAME, item_id="greeting")
+        self.greeting = greeting.strip() if greeting else config.DEFAULT_GREETING
+        self.greeting_loaded_at = time.time()
+
+    def tick(self) -> None:
+        changed = self.prompt.maybe_refresh()
+        if changed or time.time() - self.greeting_loaded_at >= self.prompt.ttl:
+            self.refresh_greeting()
+        self.last_checked = time.time()
+
+    def response_create(self) -> Dict[str, object]:
+        return {"type": "response.create", "response": {"instructions": self.greeting}}
+
+    def response_create_frame(self) -> str:
+        # Text frame: websockets sends bytes as binary frames, which the Realtime API rejects
+        cached = self._greeting_frame
+        if cached is None or cached[0] != self.greeting:
+            cached = (self.greeting, json.dumps(self.response_create()))
+            self._greeting_frame = cached
+        return cached[1]
+
+    def accept_body(self, call_accept: Dict[str, Any], extra_instructions: str = "") -> bytes:
+        """/accept request body (call_accept + current prompt) as JSON bytes, cached per prompt version."""
+        snap = self.prompt.get()
+        if extra_instructions:
+            # Per-call addition (caller profile): built fresh, never cached
+            body = {**call_accept, "instructions": snap.prompt + "\n\n" + extra_instructions}
+            return json.dumps(body).encode("utf-8")
+        key = (snap.version, json.dumps(call_accept, sort_keys=True))
+        cached = self._accept_body
+        if cached is None or cached[0] != key:
+            cached = (key, json.dumps({**call_accept, "instructions": snap.prompt}).encode("utf-8"))
+            self._accept_body = cached
+        return cached[1]
+
+
+class TenantRegistry:
+    """Lazily loaded, LRU-evicted per-tenant assets shared by every call in this worker."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max(1, max_size)
+        self._lock = threading.Lock()
+        self._tenants: "OrderedDict[str, TenantAssets]" = OrderedDict()
+        self._loading: Dict[str, threading.Event] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self, client_id: str) -> TenantAssets:
+        while True:
+            with self._lock:
+                assets = self._tenants.get(client_id)
+                if assets is not None:
+                    self._tenants.move_to_end(client_id)
+                    return assets
+                pending = self._loading.get(client_id)
+                if pending is None:
+                    pending = threading.Event()
+                    self._loading[client_id] = pending
+                    break
+            # Another thread is loading this tenant; share its result
+            pending.wait(30)
+        try:
+            assets = TenantAssets(client_id)
+            assets.load()
+            TENANT_CACHE_LOADS.inc()
+            log.info("tenant_loaded", extra={"client_id": client_id})
+            with self._lock:
+                self._tenants[client_id] = assets
+                while len(self._tenants) > self.max_size:
+                    evicted, _ = self._tenants.popitem(last=False)
+                    TENANT_CACHE_EVICTIONS.inc()
+                    log.info("tenant_evicted", extra={"evicted": evicted})
+            return assets
+        finally:
+            with self._lock:
+                self._loading.pop(client_id, None)
+            pending.set()
+
+    def peek(self, client_id: str) -> Optional[TenantAssets]:
+        with self._lock:
+            return self._tenants.get(client_id)
+
+    def tenants(self):
+        with self._lock:
+            return list(self._tenants.keys())
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="tenant-refresh", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        # Single refresher for all cached tenants (no thread per tenant)
+        while True:
+            time.sleep(1.0)
+            with self._lock:
+                cached = list(self._tenants.values())
+            now = time.time()
+            for assets in cached:
+                try:
+                    if assets.prompt.wants_refresh() or now - assets.last_checked >= assets.prompt.check_interval:
+                        assets.tick()
+                except Exception:
+                    log.warning("tenant_refresh_failed", extra={"client_id": assets.client_id}, exc_info=True)
+
+
+tenant_registry = TenantRegistry(config.TENANT_CACHE_SIZE)
@@ -0,0 +1,77 @@
+import contextvars
+import re
+from contextlib import contextmanager
+from typing import Optional
+
+from . import config
+from .phone_utils import SipHeaders, normalize_phone
+
+# Tenant of the call being handled. Set once per call task; tool executor threads
+# and log writes inherit it through the copied context.
+_current_client_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("client_id", default=None)
+
+_VALID_CLIENT_ID = re.compile(r"^[A-Za-z0-9_.\-]{1,64}$")
+
+TENANT_HEADER_NAMES = ("x-client-id", "x-tenant-id")
+
+
+def current_client_id() -> str:
+    return _current_client_id.get() or config.CLIENT_ID
+
+
+@contextmanager
+def use_tenant(client_id: Optional[str]):
+    token = _current_client_id.set(client_id or config.CLIENT_ID)
+    try:
+        yield
+    finally:
+        _current_client_id.reset(token)
+
+
+def _valid(client_id: Optional[str]) -> Optional[str]:
+    if client_id and _VALID_CLIENT_ID.match(client_id):
+        if not config.TENANT_ALLOWLIST or client_id in config.TENANT_ALLOWLIST:
+            return client_id
+    return None
+
+
+def _allowlisted(client_id: Optional[str]) -> Optional[str]:
+    # SIP headers can be set by whoever reaches the trunk: only explicitly allowlisted ids count
+    if client_id and _VALID_CLIENT_ID.match(client_id) and client_id in config.TENANT_ALLOWLIST:
+        return client_id
+    return None
+
+
+def dialed_number(event, sip: Optional[SipHeaders] = None) -> Optional[str]:
+    return (sip if sip is not None else SipHeaders.from_event(event)).dialed
+
+
+_tenant_numbers = None
+
+
+def _number_map():
+    global _tenant_numbers
+    if _tenant_numbers is None:
+        _tenant_numbers = {normalize_phone(str(k)): str(v) for k, v in (config.TENANT_NUMBERS or {}).items()}
+    return _tenant_numbers
+
+
+def resolve_client_id(event, path_client_id: Optional[str] = None, sip: Optional[SipHeaders] = None) -> str:
+    """Per-call tenant: webhook path, then dialed number, then an allowlisted SIP X-Client-Id/X-Tenant-Id, then CLIENT_ID.
+
+    Unknown ids never get through, so nothing unconfigured is loaded into the tenant cache.
+    """
+    cid = _valid(path_client_id)
+    if cid:
+        return cid
+    if sip is None:
+        sip = SipHeaders.from_event(event)
+    number = dialed_number(event, sip)
+    if number:
+        cid = _valid(_number_map().get(number))
+        if cid:
+            return cid
+    cid = _allowlisted(sip.get(*TENANT_HEADER_NAMES))
+    if cid:
+        return cid
+    return config.CLIENT_ID
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from . import config
+from . import metrics
+from .tenants import current_client_id
+from .tool_runner import run_tool
+from .tools_impl import TOOLS_CACHEABLE, TOOLS_PREFETCH, TOOLS_WRITES
+
+TOOL_PREFETCH = metrics.counter("tool_prefetch_total", "Speculative tool prefetches by tool and outcome (started/hit/unused)")
+TOOL_CACHE = metrics.counter("tool_cache_total", "Tool cache lookups by tool and outcome (hit/shared_hit/miss)")
+
+
+def _args_key(name: str, args: Dict[str, Any]) -> Tuple:
+    return (name, json.dumps(args, sort_keys=True, ensure_ascii=False, default=str))
+
+
+def _cacheable_result(result: Any) -> bool:
+    return isinstance(result, dict) and "error" not in result
+
+
+class SharedListCache:
+    """list_tasks results per tenant, shared by every call in this worker for a short TTL.
+
+    Writes made from this worker invalidate the tenant; writes from other workers are
+    only bounded by the TTL, which is why it is off unless TOOL_SHARED_LIST_TTL is set.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple, Tuple[float, Any]] = {}
+
+    def get(self, client_id: str, key: Tuple) -> Optional[Any]:
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get((client_id,) + key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, client_id: str, key: Tuple, result: Any) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[(client_id,) + key] = (time.monotonic() + self.ttl, result)
+
+    def invalidate(self, client_id: str) -> None:
+        with self._lock:
+            for k in [k for k in self._entries if k[0] == client_id]:
+                del self._entries[k]
+
+
+shared_list_cache = SharedListCache(config.TOOL_SHARED_LIST_TTL)
+
+
+class CallToolCache:
+    """Per-call read-through cache in front of run_tool.
+
+    Reads (TOOLS_CACHEABLE) are served from a small TTL/LRU map or joined to an identical
+    lookup already in flight, including prefetches started while the arguments still
+    stream (TOOLS_PREFETCH). Writes (TOOLS_WRITES) go straight through and invalidate.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = config.TOOL_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max(1, config.TOOL_CACHE_MAX_ENTRIES if max_entries is None else max_entries)
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple, "asyncio.Task[Any]"] = {}
+        self._prefetched: set = set()
+        self._generation = 0
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.prefetch_stats = {"prefetched": 0, "prefetch_hits": 0}
+
+    def _count(self, name: str, outcome: str) -> None:
+        per_tool = self.stats.setdefault(name, {"hit": 0, "miss": 0})
+        per_tool[outcome if outcome == "miss" else "hit"] += 1
+        TOOL_CACHE.inc(tool=name, outcome=outcome)
+
+    def _get(self, key: Tuple) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put(self, key: Tuple, result: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _start(self, name: str, args: Dict[str, Any]) -> "asyncio.Task[Any]":
+        key = _args_key(name, args)
+        generation = self._generation
+
+        async def _load() -> Any:
+            try:
+                result = await run_tool(name, args)
+                # A write finished meanwhile: the result may predate it, so don't keep it
+                if generation == self._generation and _cacheable_result(result):
+                    self._put(key, result)
+                    if name == "list_tasks":
+                        shared_list_cache.put(current_client_id(), key, result)
+                return result
+            finally:
+                # Prefetches stay put until the real call consumes them (errors included)
+                if self._inflight.get(key) is task and key not in self._prefetched:
+                    del self._inflight[key]
+
+        task = asyncio.create_task(_load())
+        self._inflight[key] = task
+        return task
+
+    def prefetch(self, name: Optional[str], fields: Dict[str, Any]) -> bool:
+        keys = TOOLS_PREFETCH.get(name or "")
+        if not keys or any(fields.get(f) in (None, "") for f in keys):
+            return False
+        args = {f: fields[f] for f in keys}
+        key = _args_key(name, args)
+        if key in self._inflight or self._get(key) is not None:
+            return False
+        self._start(name, args)
+        self._prefetched.add(key)
+        self.prefetch_stats["prefetched"] += 1
+        TOOL_PREFETCH.inc(tool=name, outcome="started")
+        return True
+
+    async def run(self, name: str, args: Dict[str, Any]) -> Any:
+        if name in TOOLS_WRITES:
+            return await self._write(name, args)
+        if name not in TOOLS_CACHEABLE:
+            return await run_tool(name, args)
+        key = _args_key(name, args)
+        if key in self._prefetched:
+            self._prefetched.discard(key)
+            task = self._inflight.pop(key, None)
+            if task is not None:
+                self.prefetch_stats["prefetch_hits"] += 1
+                TOOL_PREFETCH.inc(tool=name, outcome="hit")
+                return await task
+        cached = self._get(key)
+        if cached is not None:
+            self._count(name, "hit")
+            return cached
+        task = self._inflight.get(key)
+        if task is not None:
+            self._count(name, "hit")
+            return await task
+        if name == "list_tasks":
+            shared = shared_list_cache.get(current_client_id(), key)
+            if shared is not None:
+                self._count(name, "shared_hit")
+                self._put(key, shared)
+                return shared
+        self._count(name, "miss")
+        return await self._start(name, args)
+
+    async def _write(self, name: str, args: Dict[str, Any]) -> Any:
+        self.invalidate(args.get("name"))
+        result = await run_tool(name, args)
+        self.invalidate(args.get("name"))
+        # The write returned the new record: later get_task calls in this call can use it
+        item = result.get("item") if isinstance(result, dict) else None
+        if isinstance(item, dict) and item.get("name"):
+            self._put(_args_key("get_task", {"name": item["name"]}), {"item": item})
+        return result
+
+    def seed(self, name: str, args: Dict[str, Any], result: Any) -> bool:
+        # A result loaded outside the call (caller profile); skipped once the call has written
+        key = _args_key(name, args)
+        if self._generation or key in self._entries or key in self._inflight or not _cacheable_result(result):
+            return False
+        self._put(key, result)
+        return True
+
+    def invalidate(self, task_name: Optional[str] = None) -> None:
+        self._generation += 1
+        get_key = _args_key("get_task", {"name": task_name}) if task_name else None
+        for key in list(self._entries):
+            if key[0] == "list_tasks" or task_name is None or key == get_key:
+                del self._entries[key]
+        # In-flight reads keep running for their current waiters, but new calls refetch
+        for key in list(self._inflight):
+            if key[0] == "list_tasks" or task_name is None or key == get_key:
+                del self._inflight[key]
+                self._prefetched.discard(key)
+        shared_list_cache.invalidate(current_client_id())
+
+    def hit_rates(self) -> Dict[str, float]:
+        return {name: round(s["hit"] / (s["hit"] + s["miss"]), 3)
+                for name, s in self.stats.items() if s["hit"] + s["miss"]}
+
+    def close(self) -> None:
+        for key in self._prefetched:
+            TOOL_PREFETCH.inc(tool=key[0], outcome="unused")
+        for task in self._inflight.values():
+            task.cancel()
+        self._prefetched.clear()
+        self._inflight.clear()
+        self._entries.clear()
+
+
+def tool_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Worker-wide hit rate per cacheable tool (how many DynamoDB reads the cache saved)."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for name in TOOLS_CACHEABLE:
+        hits = TOOL_CACHE.value(tool=name, outcome="hit") + TOOL_CACHE.value(tool=name, outcome="shared_hit")
+        misses = TOOL_CACHE.value(tool=name, outcome="miss")
+        total = hits + misses
+        out[name] = {"hits": int(hits), "misses": int(misses), "hit_rate": round(hits / total, 3) if total else None}
+    return out
@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+from . import metrics
+
+# What the realtime model gets back as function_call_output. Raw tool results (boto3
+# items with Decimals and bookkeeping attributes) stay as they are for caches; only the
+# copy sent to the model is projected, paginated and held to TOOL_RESULT_MAX_BYTES.
+
+TOOL_RESULT_BYTES = metrics.histogram(
+    "tool_result_bytes", "function_call_output size sent to the model, by tool",
+    buckets=(128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536),
+)
+TOOL_RESULT_TRUNCATED = metrics.counter("tool_result_truncated_total", "Tool results cut to the byte budget, by tool")
+
+_RESERVATION_FIELDS = ("name", "start_datetime", "request", "phone_number", "address")
+
+# list: key of the list in the result; item: key of a single record; fields: kept per record;
+# cursor: record field that resumes the listing (see encode_cursor)
+RESULT_SHAPES: Dict[str, Dict[str, Any]] = {
+    "list_tasks": {"list": "items", "fields": ("name", "start_datetime", "request"), "cursor": "name"},
+    "get_task": {"item": "item", "fields": _RESERVATION_FIELDS},
+    "create_task": {"item": "item", "fields": _RESERVATION_FIELDS},
+    "update_task": {"item": "item", "fields": _RESERVATION_FIELDS},
+    "search_faq": {"list": "results", "fields": ("question", "answer")},
+}
+for _name, _fields in config.TOOL_RESULT_FIELDS.items():
+    RESULT_SHAPES.setdefault(_name, {})["fields"] = tuple(_fields)
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=str)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (bytes, bytearray)):
+        return base64.b64encode(obj).decode()
+    return str(obj)
+
+
+def dumps(obj: Any) -> str:
+    """Compact, Decimal-safe JSON (boto3 returns numbers as Decimal)."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def encode_cursor(value: Any) -> str:
+    return base64.urlsafe_b64encode(dumps(value).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Any]:
+    if not token:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(str(token) + "=" * (-len(str(token)) % 4)))
+    except Exception:
+        return None
+
+
+def _project(record: Any, fields: Optional[Tuple[str, ...]]) -> Any:
+    if not fields or not isinstance(record, dict):
+        return record
+    return {k: record[k] for k in fields if record.get(k) not in (None, "")}
+
+
+def _truncate_strings(obj: Any, max_chars: int) -> Any:
+    if isinstance(obj, str):
+        return obj if len(obj) <= max_chars else obj[:max_chars] + "…"
+    if isinstance(obj, dict):
+        return {k: _truncate_strings(v, max_chars) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_truncate_strings(v, max_chars) for v in obj]
+    return obj
+
+
+def shape_result(name: str, result: Any, max_bytes: Optional[int] = None) -> str:
+    """Project, trim to the byte budget and serialize a tool result for function_call_output."""
+    budget = config.TOOL_RESULT_MAX_BYTES if max_bytes is None else max_bytes
+    shape = RESULT_SHAPES.get(name, {})
+    out = result
+    if isinstance(result, dict):
+        out = dict(result)
+        if shape.get("item") and isinstance(out.get(shape["item"]), dict):
+            out[shape["item"]] = _project(out[shape["item"]], shape.get("fields"))
+        if shape.get("list") and isinstance(out.get(shape["list"]), list):
+            out[shape["list"]] = [_project(r, shape.get("fields")) for r in out[shape["list"]]]
+    text = dumps(out)
+    if budget <= 0 or len(text.encode("utf-8")) <= budget:
+        TOOL_RESULT_BYTES.observe(len(text.encode("utf-8")), tool=name)
+        return text
+
+    TOOL_RESULT_TRUNCATED.inc(tool=name)
+    list_key = shape.get("list")
+    if isinstance(out, dict) and list_key and isinstance(out.get(list_key), list):
+        records: List[Any] = out[list_key]
+        # Largest prefix of records that fits, found by bisection on the serialized size
+        lo, hi = 0, len(records)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            trial = {**out, list_key: records[:mid], "truncated": True, "next_cursor": "x" * 48}
+            if len(dumps(trial).encode("utf-8")) <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        # When not even one whole record fits, keep the first and shorten its strings below
+        kept = max(lo, 1) if records else 0
+        if kept < len(records):
+            # The page's own next_cursor would skip the records dropped here
+            out = {k: v for k, v in out.items() if k != "next_cursor"}
+            out.update({list_key: records[:kept], "truncated": True})
+            cursor_field = shape.get("cursor")
+            last = records[kept - 1] if kept else None
+            if cursor_field and isinstance(last, dict) and last.get(cursor_field):
+                out["next_cursor"] = encode_cursor({cursor_field: last[cursor_field]})
+            text = dumps(out)
+    if len(text.encode("utf-8")) > budget:
+        for max_chars in (400, 200, 100, 50):
+            text = dumps(_truncate_strings(out, max_chars))
+            if len(text.encode("utf-8")) <= budget:
+                break
+        else:
+            text = dumps({"error": "result too large", "tool": name})
+    TOOL_RESULT_BYTES.observe(len(text.encode("utf-8")), tool=name)
+    return text
@@ -0,0 +1,63 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from . import config
+from . import metrics
+from .app_logging import get_logger
+from .tools_impl import TOOLS_IMPL
+
+log = get_logger(__name__)
+
+# Blocking (boto3) tools run here so a slow DynamoDB call never stalls the call host loop
+_executor = ThreadPoolExecutor(max_workers=config.TOOLS_MAX_WORKERS, thread_name_prefix="tool")
+
+TOOL_LATENCY = metrics.histogram("tool_latency_seconds", "Tool execution time by tool name")
+TOOL_CALLS = metrics.counter("tool_calls_total", "Tool calls by tool name and outcome")
+
+
+def tool_timeout(name: str) -> float:
+    return float(config.TOOL_TIMEOUTS.get(name, config.TOOL_TIMEOUT_SECONDS))
+
+
+async def run_tool(name: str, args: Dict[str, Any]) -> Any:
+    """Execute a TOOLS_IMPL entry off-loop with a per-tool timeout; always returns a JSON-able result."""
+    impl = TOOLS_IMPL.get(name or "")
+    if not impl:
+        TOOL_CALLS.inc(tool=name or "", outcome="unknown")
+        return {"error": "unknown tool"}
+    timeout = tool_timeout(name)
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        if asyncio.iscoroutinefunction(impl):
+            result = await asyncio.wait_for(impl(args), timeout)
+        else:
+            ctx = contextvars.copy_context()
+            fut = asyncio.get_running_loop().run_in_executor(_executor, ctx.run, impl, args)
+            result = await asyncio.wait_for(fut, timeout)
+        if isinstance(result, dict) and "error" in result:
+            outcome = "error"
+        return result
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        log.warning("tool_timeout", extra={"tool": name, "timeout_seconds": timeout})
+        return {
+            "error": "timeout",
+            "tool": name,
+            "timeout_seconds": timeout,
+            "message": "The tool did not respond in time. Tell the caller and offer to try again.",
+        }
+    except Exception as e:
+        outcome = "error"
+        log.warning("tool_failed", extra={"tool": name}, exc_info=True)
+        return {"error": str(e)}
+    finally:
+        TOOL_LATENCY.observe(time.perf_counter() - started, tool=name)
+        TOOL_CALLS.inc(tool=name, outcome=outcome)
+
+
+def tool_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: TOOL_LATENCY.summary(tool=name) for name in TOOLS_IMPL}
@@ -1,43 +1,58 @@
+import logging
 import os
-from typing import Any, Dict, List, Optional
-from datetime import datetime, timezone
+from typing import Any, Dict, List
+from datetime import datetime, timedelta, timezone
 from boto3.dynamodb.conditions import Key
 from . import config
+from . import aws_clients
+from .app_logging import get_logger
+from .tenants import current_client_id
+from .tenant_cache import tenant_registry
+from .tool_results import decode_cursor, encode_cursor
+from .availability import (availability_cache, now_local, parse_date, parse_datetime, parse_time_of_day, slot_attributes,
+                           within_business_hours)
+from .caller_profile import caller_attributes
 
 try:
     import boto3
-    from botocore.exceptions import BotoCoreError, ClientError
 except Exception:
     boto3 = None
 
 TASKS_TABLE_NAME = os.getenv("TASKS_TABLE_NAME", "app-tasks")
-TOOLS_DEBUG = os.getenv("TOOLS_DEBUG", "1") not in ("0", "false", "False", "")
+TOOLS_DEBUG = os.getenv("TOOLS_DEBUG", "0") not in ("0", "false", "False", "")
+
+log = get_logger(__name__)
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
-def _log(*args, **kwargs):
-    if TOOLS_DEBUG:
-        print("[tools_impl]", *args, **kwargs)
+def _log(event: str, data: Any = None) -> None:
+    # Tool args/results: DEBUG normally, INFO with TOOLS_DEBUG=1 (personal fields are redacted either way)
+    log.log(logging.INFO if TOOLS_DEBUG else logging.DEBUG, event, extra={"data": data})
 
 def _ddb_table():
     if boto3 is None:
         raise RuntimeError("boto3 not available")
-    region = config.AWS_REGION
-    _log("ddb.init", {"region": region, "table": TASKS_TABLE_NAME})
-    ddb = boto3.resource("dynamodb", region_name=region)
-    return ddb.Table(TASKS_TABLE_NAME)
+    # Cached handle on the shared, pooled resource (no per-call client setup)
+    return aws_clients.dynamodb_table(TASKS_TABLE_NAME)
 
 def list_tasks(args: Dict[str, Any]) -> Dict[str, Any]:
     _log("list_tasks.args", args)
     try:
         table = _ddb_table()
-        # Use Query instead of Scan for tenant isolation
-        r = table.query(
-            KeyConditionExpression=Key("client_id").eq(config.CLIENT_ID),
-            Limit=int(args.get("limit") or 200)
-        )
-        out = {"items": r.get("Items", [])}
+        # Use Query instead of Scan for tenant isolation; one page per call, resumed by cursor
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key("client_id").eq(current_client_id()),
+            "Limit": max(1, min(int(args.get("limit") or config.TOOL_LIST_PAGE_SIZE), 200)),
+        }
+        start = decode_cursor(args.get("cursor"))
+        if isinstance(start, dict) and start.get("name"):
+            kwargs["ExclusiveStartKey"] = {"client_id": current_client_id(), "name": str(start["name"])}
+        r = table.query(**kwargs)
+        out: Dict[str, Any] = {"items": r.get("Items", [])}
+        last = r.get("LastEvaluatedKey")
+        if last and last.get("name"):
+            out["next_cursor"] = encode_cursor({"name": last["name"]})
         _log("list_tasks.count", len(out.get("items", [])))
         return out
     except Exception as e:
@@ -55,7 +70,7 @@ def create_task(args: Dict[str, Any]) -> Dict[str, Any]:
     if not name:
         return {"error": "name is required"}
     item = {
-        "client_id": config.CLIENT_ID,
+        "client_id": current_client_id(),
         "name": str(name),
         "request": str(request),
         "start_datetime": str(start_datetime),
@@ -64,8 +79,11 @@ def create_task(args: Dict[str, Any]) -> Dict[str, Any]:
         "created_at": _now_iso(),
         "updated_at": _now_iso(),
     }
+    item.update(slot_attributes(item["client_id"], start_datetime))
+    item.update(caller_attributes(item["client_id"], phone_number))
     try:
         table.put_item(Item=item)
+        availability_cache.invalidate(item["client_id"])
         _log("create_task.ok", item)
         return {"item": item}
     except Exception as e:
@@ -79,10 +97,10 @@ def get_task(args: Dict[str, Any]) -> Dict[str, Any]:
     if not name:
         return {"error": "name is required"}
     try:
-        r = table.get_item(Key={"client_id": config.CLIENT_ID, "name": str(name)})
+        r = table.get_item(Key={"client_id": current_client_id(), "name": str(name)})
         it = r.get("Item")
         if not it:
-            _log("get_task.not_found", name)
+            _log("get_task.not_found", {"name": name})
             return {"error": "not found"}
         _log("get_task.ok", it)
         return {"item": it}
@@ -113,14 +131,35 @@ def update_task(args: Dict[str, Any]) -> Dict[str, Any]:
         names[f"#{k}"] = k
     if not expr:
         return {"error": "nothing to update"}
+    remove = ""
+    if updates["start_datetime"] is not None:
+        # Keep the date GSI attributes in step with start_datetime
+        slot = slot_attributes(current_client_id(), updates["start_datetime"])
+        for k, v in slot.items():
+            expr.append(f"#{k} = :{k}")
+            values[f":{k}"] = v
+            names[f"#{k}"] = k
+        if not slot:
+            names.update({"#slot_date": "slot_date", "#slot_start": "slot_start"})
+            remove = " REMOVE #slot_date, #slot_start"
+    if updates["phone_number"] is not None:
+        # Same for the caller GSI attribute
+        caller = caller_attributes(current_client_id(), updates["phone_number"])
+        names["#caller_key"] = "caller_key"
+        if caller:
+            expr.append("#caller_key = :caller_key")
+            values[":caller_key"] = caller["caller_key"]
+        else:
+            remove = (remove + ", #caller_key") if remove else " REMOVE #caller_key"
     try:
         r = table.update_item(
-            Key={"client_id": config.CLIENT_ID, "name": str(name)},
-            UpdateExpression="SET " + ", ".join(expr) + ", #updated_at = :u",
+            Key={"client_id": current_client_id(), "name": str(name)},
+            UpdateExpression="SET " + ", ".join(expr) + ", #updated_at = :u" + remove,
             ExpressionAttributeValues=values,
             ExpressionAttributeNames=names,
             ReturnValues="ALL_NEW",
         )
+        availability_cache.invalidate(current_client_id())
         out = {"item": r.get("Attributes")}
         _log("update_task.ok", out)
         return out
@@ -135,22 +174,102 @@ def delete_task(args: Dict[str, Any]) -> Dict[str, Any]:
     if not name:
         return {"error": "name is required"}
     try:
-        table.delete_item(Key={"client_id": config.CLIENT_ID, "name": str(name)})
+        table.delete_item(Key={"client_id": current_client_id(), "name": str(name)})
+        availability_cache.invalidate(current_client_id())
         _log("delete_task.ok", {"name": name})
         return {"ok": True}
     except Exception as e:
         _log("delete_task.error", repr(e))
         return {"error": str(e)}
 
+def search_faq(args: Dict[str, Any]) -> Dict[str, Any]:
+    _log("search_faq.args", args)
+    query = args.get("query") or args.get("question") or ""
+    if not str(query).strip():
+        return {"error": "query is required"}
+    try:
+        k = int(args.get("top_k") or config.FAQ_SEARCH_TOP_K)
+    except (TypeError, ValueError):
+        k = config.FAQ_SEARCH_TOP_K
+    results = tenant_registry.get(current_client_id()).faq.search(str(query), k=max(1, min(k, 10)))
+    _log("search_faq.count", len(results))
+    if not results:
+        return {"results": [], "note": "no matching FAQ"}
+    return {"results": results}
+
+def _duration(args: Dict[str, Any]) -> timedelta:
+    try:
+        minutes = int(args.get("duration_minutes") or config.RESERVATION_SLOT_MINUTES)
+    except (TypeError, ValueError):
+        minutes = config.RESERVATION_SLOT_MINUTES
+    return timedelta(minutes=max(5, min(minutes, 24 * 60)))
+
+def check_availability(args: Dict[str, Any]) -> Dict[str, Any]:
+    _log("check_availability.args", args)
+    start = parse_datetime(args.get("start_datetime"))
+    if start is None:
+        return {"error": "start_datetime must include a date and a time (YYYY-MM-DD HH:MM)"}
+    duration = _duration(args)
+    try:
+        index = availability_cache.day(current_client_id(), start.date())
+    except Exception as e:
+        _log("check_availability.error", repr(e))
+        return {"error": str(e)}
+    # Past starts and starts that do not fit in business hours are never bookable
+    now = now_local()
+    reason = None
+    if start < now:
+        reason = "past"
+    elif not within_business_hours(start, duration):
+        reason = "outside_business_hours"
+    available = reason is None and index.is_free(start, duration)
+    out: Dict[str, Any] = {"start": start.strftime("%Y-%m-%d %H:%M"), "available": available}
+    if reason:
+        out["reason"] = reason
+    if not available:
+        # Same clamping as find_free_slots: inside business hours and not before now;
+        # a start past closing falls back to the whole day
+        after = now if reason == "outside_business_hours" else max(start, now)
+        out["alternatives"] = [t.strftime("%H:%M") for t in index.free_slots(start.date(), duration, after=after, limit=3)]
+    _log("check_availability.ok", out)
+    return out
+
+def find_free_slots(args: Dict[str, Any]) -> Dict[str, Any]:
+    _log("find_free_slots.args", args)
+    day = parse_date(args.get("date"))
+    if day is None:
+        return {"error": "date is required (YYYY-MM-DD)"}
+    after = None
+    after_tod = parse_time_of_day(args.get("after"))
+    if after_tod:
+        after = datetime(day.year, day.month, day.day, *after_tod)
+    now = now_local()
+    if day == now.date() and (after is None or after < now):
+        after = now
+    try:
+        limit = max(1, min(int(args.get("limit") or 5), 20))
+    except (TypeError, ValueError):
+        limit = 5
+    try:
+        index = availability_cache.day(current_client_id(), day)
+    except Exception as e:
+        _log("find_free_slots.error", repr(e))
+        return {"error": str(e)}
+    slots = index.free_slots(day, _duration(args), after=after, limit=limit)
+    out = {"date": day.isoformat(), "slots": [t.strftime("%H:%M") for t in slots]}
+    _log("find_free_slots.ok", out)
+    return out
+
 TOOLS_SCHEMA: List[Dict[str, Any]] = [
     {
         "name": "list_tasks",
         "type": "function",
-        "description": "List existing reservation tasks",
+        "description": "List existing reservation tasks, one page at a time",
         "parameters": {
             "type": "object",
             "properties": {
-                "limit": {"type": "integer", "minimum": 1, "maximum": 200}
+                "limit": {"type": "integer", "minimum": 1, "maximum": 200},
+                "cursor": {"type": "string", "description": "next_cursor from the previous page"}
             }
         }
     },
@@ -210,6 +329,47 @@ TOOLS_SCHEMA: List[Dict[str, Any]] = [
             "required": ["name"]
         }
     },
+    {
+        "name": "search_faq",
+        "type": "function",
+        "description": "Search the shop FAQ and return the best matching question/answer pairs",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "caller's question in their own words"},
+                "top_k": {"type": "integer", "minimum": 1, "maximum": 10}
+            },
+            "required": ["query"]
+        }
+    },
+    {
+        "name": "check_availability",
+        "type": "function",
+        "description": "Check whether a reservation time is free; returns nearby free times when it is not",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "start_datetime": {"type": "string", "description": "requested start (YYYY-MM-DD HH:MM)"},
+                "duration_minutes": {"type": "integer", "minimum": 5}
+            },
+            "required": ["start_datetime"]
+        }
+    },
+    {
+        "name": "find_free_slots",
+        "type": "function",
+        "description": "List free reservation start times on a date",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "date": {"type": "string", "description": "YYYY-MM-DD"},
+                "after": {"type": "string", "description": "only times at or after HH:MM"},
+                "duration_minutes": {"type": "integer", "minimum": 5},
+                "limit": {"type": "integer", "minimum": 1, "maximum": 20}
+            },
+            "required": ["date"]
+        }
+    },
 ]
 
 TOOLS_IMPL = {
@@ -218,8 +378,22 @@ TOOLS_IMPL = {
     "get_task": get_task,
     "update_task": update_task,
     "delete_task": delete_task,
+    "search_faq": search_faq,
+    "check_availability": check_availability,
+    "find_free_slots": find_free_slots,
+}
+
+# Read-only tools whose result is fully determined by these argument fields; the
+# WS session may run them speculatively while the arguments are still streaming
+TOOLS_PREFETCH = {
+    "get_task": ("name",),
 }
 
+# Per-call result cache (tool_cache): reads are served from cache, writes go
+# through and invalidate the affected reads
+TOOLS_CACHEABLE = ("list_tasks", "get_task")
+TOOLS_WRITES = ("create_task", "update_task", "delete_task")
+
 if __name__ == "__main__":
     # Simplified CLI for testing (Requires CLIENT_ID in env or config)
     import argparse
@@ -259,6 +433,19 @@ if __name__ == "__main__":
     p_delete = sub.add_parser("delete", help="Delete task")
     p_delete.add_argument("--name", required=True)
 
+    p_sim = sub.add_parser("simulate", help="Run scripted calls through websocket_task against a local Realtime stand-in and local DynamoDB")
+    p_sim.add_argument("--sessions", type=int, default=20)
+    p_sim.add_argument("--concurrency", type=int, default=10)
+    p_sim.add_argument("--speed", type=float, default=4.0, help="script speed multiplier")
+    p_sim.add_argument("--turns", type=int, default=4)
+    p_sim.add_argument("--no-tools", dest="with_tools", action="store_false")
+    p_sim.add_argument("--script", default=None, help="recorded session script (JSON list of steps)")
+    p_sim.add_argument("--endpoint-url", dest="endpoint_url", default=None, help="dynamodb-local URL (default: start moto server)")
+    p_sim.add_argument("--log-mode", dest="log_mode", choices=("items", "transcript", "both"), default=None,
+                       help="CALL_LOG_MODE for this run")
+    p_sim.add_argument("--drops", action="store_true", help="abort each session's socket twice (reconnect path)")
+    p_sim.add_argument("--verbose", action="store_true")
+
     parser.add_argument("--selftest", action="store_true", help="Run self test flow (create->get->list->update->delete)")
 
     args = parser.parse_args()
@@ -308,6 +495,20 @@ if __name__ == "__main__":
         _print(update_task(payload))
     elif args.cmd == "delete":
         _print(delete_task({"name": args.name}))
+    elif args.cmd == "simulate":
+        from .simulator import simulate
+        _print(simulate(
+            sessions=args.sessions,
+            concurrency=args.concurrency,
+            speed=args.speed,
+            turns=args.turns,
+            with_tools=args.with_tools,
+            script_path=args.script,
+            endpoint_url=args.endpoint_url,
+            verbose=args.verbose,
+            log_mode=args.log_mode,
+            drops=args.drops,
+        ))
     else:
         parser.print_help()
         _sys.exit(1)
@@ -0,0 +1,80 @@
+import inspect
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from .app_logging import get_logger
+
+log = get_logger(__name__)
+
+# Realtime server events always carry "type" as their first key, so it can be read
+# from the head of the raw frame without parsing the (often large) rest of it.
+_TYPE_RE = re.compile(r'"type"\s*:\s*"([^"\\]+)"')
+_PEEK_CHARS = 256
+
+Handler = Callable[[Dict[str, Any]], Any]
+Observer = Callable[[Optional[str]], None]
+
+
+def peek_type(raw: Any) -> Optional[str]:
+    if isinstance(raw, (bytes, bytearray)):
+        raw = bytes(raw[:_PEEK_CHARS]).decode("utf-8", "ignore")
+    if not isinstance(raw, str):
+        return None
+    m = _TYPE_RE.search(raw, 0, _PEEK_CHARS)
+    return m.group(1) if m else None
+
+
+class EventDispatcher:
+    """Routes raw WS frames to handlers registered per event type.
+
+    Frames whose type nobody subscribes to are counted and dropped without json.loads
+    (audio deltas are most of the traffic). Observers see every event type, parsed or not.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._observers: List[Observer] = []
+        self.stats = {"received": 0, "parsed": 0, "skipped": 0, "handler_errors": 0}
+
+    def on(self, *evt_types: str) -> Callable[[Handler], Handler]:
+        def _register(handler: Handler) -> Handler:
+            for t in evt_types:
+                self._handlers.setdefault(t, []).append(handler)
+            return handler
+        return _register
+
+    def observe(self, observer: Observer) -> None:
+        self._observers.append(observer)
+
+    def subscribed(self, evt_type: Optional[str]) -> bool:
+        return evt_type in self._handlers
+
+    async def dispatch(self, raw: Any) -> Optional[Dict[str, Any]]:
+        self.stats["received"] += 1
+        evt_type = peek_type(raw)
+        if evt_type is not None and evt_type not in self._handlers:
+            self.stats["skipped"] += 1
+            for observer in self._observers:
+                observer(evt_type)
+            return None
+        try:
+            evt = json.loads(raw)
+        except Exception:
+            return None
+        self.stats["parsed"] += 1
+        evt_type = evt.get("type")
+        for observer in self._observers:
+            observer(evt_type)
+        for handler in self._handlers.get(evt_type, ()):
+            try:
+                res = handler(evt)
+                if inspect.isawaitable(res):
+                    await res
+            except Exception as e:
+                # One failing subscriber must not stop the others or the receive loop
+                self.stats["handler_errors"] += 1
+                log.error("handler_failed", extra={"event_type": evt_type,
+                                                   "handler": getattr(handler, "__name__", str(handler))},
+                          exc_info=e)
+        return evt
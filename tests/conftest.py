@@ -0,0 +1,22 @@
+import logging
+import os
+import sys
+
+import pytest
+
+# Tests run against the same local stand-ins as the benchmarks: moto for DynamoDB and
+# src/fake_realtime.py for the Realtime API (pip install -r requirements-dev.txt).
+#
+#   python -m pytest -q
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+
+@pytest.fixture(scope="session")
+def dynamo():
+    from bench import local_dynamo
+
+    endpoint = local_dynamo.start()
+    logging.getLogger("app").setLevel(logging.WARNING)
+    return endpoint
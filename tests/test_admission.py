@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from src.admission import AdmissionController
+from src.call_host import CallHost
+
+
+def _wait(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not cond():
+        time.sleep(0.01)
+    return cond()
+
+
+@pytest.fixture
+def host():
+    host = CallHost(max_concurrent_calls=3, drain_timeout=1.0)
+    yield host
+    host.drain(timeout=1.0)
+
+
+def _hold(host, release):
+    async def _call():
+        await asyncio.wrap_future(release)
+    return _call
+
+
+def test_admits_until_max_active(host):
+    admission = AdmissionController(host, max_active=2, max_lag_ms=0)
+    release = host.run_coroutine(asyncio.sleep(3600))
+    assert admission.check() == (True, "ok")
+    for n in range(2):
+        assert host.submit(f"rtc_{n}", _hold(host, release))
+    assert _wait(lambda: host.active_count() == 2)
+    assert admission.check() == (False, "capacity")
+    assert admission.load()["accepting"] is False
+    release.cancel()
+    assert _wait(lambda: host.active_count() == 0)
+    assert admission.check() == (True, "ok")
+
+
+def test_host_refuses_beyond_its_limit_and_duplicates(host):
+    release = host.run_coroutine(asyncio.sleep(3600))
+    assert host.submit("rtc_a", _hold(host, release))
+    assert not host.submit("rtc_a", _hold(host, release))
+    assert host.submit("rtc_b", _hold(host, release))
+    assert host.submit("rtc_c", _hold(host, release))
+    assert not host.submit("rtc_d", _hold(host, release))
+    release.cancel()
+
+
+def test_draining_refuses_everything(host):
+    admission = AdmissionController(host, max_active=10, max_lag_ms=0)
+    assert host.drain(timeout=1.0)
+    assert admission.check() == (False, "draining")
+    assert not host.submit("rtc_late", lambda: asyncio.sleep(0))
@@ -0,0 +1,54 @@
+from datetime import date, datetime, timedelta
+
+from src import config
+from src.availability import SlotIndex, _slot_start, within_business_hours
+
+HOUR = timedelta(hours=1)
+
+
+def _index(*starts):
+    return SlotIndex([(datetime(2026, 11, 2, h, m), f"r{h}{m}") for h, m in starts], slot_minutes=60)
+
+
+def test_overlap_is_half_open():
+    index = _index((10, 0))
+    # [10:00, 11:00) against requests around it
+    assert not index.is_free(datetime(2026, 11, 2, 10, 30), HOUR, capacity=1)
+    assert not index.is_free(datetime(2026, 11, 2, 9, 30), HOUR, capacity=1)
+    assert index.is_free(datetime(2026, 11, 2, 11, 0), HOUR, capacity=1)
+    assert index.is_free(datetime(2026, 11, 2, 9, 0), HOUR, capacity=1)
+    assert index.overlapping(datetime(2026, 11, 2, 10, 59), datetime(2026, 11, 2, 11, 30)) == ["r100"]
+
+
+def test_capacity_counts_concurrent_reservations():
+    index = _index((10, 0), (10, 30))
+    start = datetime(2026, 11, 2, 10, 45)
+    assert index.count(start, start + HOUR) == 2
+    assert not index.is_free(start, HOUR, capacity=2)
+    assert index.is_free(start, HOUR, capacity=3)
+
+
+def test_free_slots_stay_inside_business_hours(monkeypatch):
+    monkeypatch.setattr(config, "BUSINESS_HOURS", "09:00-12:00")
+    monkeypatch.setattr(config, "RESERVATION_CAPACITY", 1)
+    index = _index((10, 0))
+    slots = index.free_slots(date(2026, 11, 2), HOUR, step_minutes=30, limit=10)
+    assert [t.strftime("%H:%M") for t in slots] == ["09:00", "11:00"]
+    after = index.free_slots(date(2026, 11, 2), HOUR, after=datetime(2026, 11, 2, 9, 10), step_minutes=30)
+    assert [t.strftime("%H:%M") for t in after] == ["11:00"]
+
+
+def test_within_business_hours(monkeypatch):
+    monkeypatch.setattr(config, "BUSINESS_HOURS", "11:00-22:00")
+    assert within_business_hours(datetime(2026, 11, 2, 11, 0), HOUR)
+    assert within_business_hours(datetime(2026, 11, 2, 21, 0), HOUR)
+    assert not within_business_hours(datetime(2026, 11, 2, 21, 30), HOUR)
+    assert not within_business_hours(datetime(2026, 11, 2, 10, 30), HOUR)
+
+
+def test_stored_slot_start_wins_over_relative_text():
+    # Written yesterday as "明日 19時": the stored absolute slot must not move with today's date
+    item = {"name": "r1", "start_datetime": "明日 19時", "slot_start": "2026-11-02T19:00"}
+    assert _slot_start(item) == datetime(2026, 11, 2, 19, 0)
+    assert _slot_start({"name": "r2", "start_datetime": "2026-11-03 18:30"}) == datetime(2026, 11, 3, 18, 30)
+    assert _slot_start({"name": "r3", "start_datetime": "2026-11-03 18:30"}, legacy=False) is None
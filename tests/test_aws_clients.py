@@ -0,0 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from src import aws_clients
+
+
+def test_each_thread_gets_its_own_handles(dynamo):
+    table = aws_clients.dynamodb_table("app-tasks")
+    assert aws_clients.dynamodb_table("app-tasks") is table
+    assert aws_clients.dynamodb_resource() is aws_clients.dynamodb_resource()
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        other = ex.submit(aws_clients.dynamodb_table, "app-tasks").result()
+    assert other is not table
+    assert other.meta.client is not table.meta.client
+
+
+def test_reset_drops_every_threads_handles(dynamo):
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        before = ex.submit(aws_clients.dynamodb_resource).result()
+        aws_clients.reset()
+        after = ex.submit(aws_clients.dynamodb_resource).result()
+    assert after is not before
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+
+from src.call_log_writer import CallLogWriter
+
+
+class _GatedResource:
+    """batch_write_item stand-in that holds every batch containing a gated call_sid."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gated = set()
+        self.written = []
+
+    def batch_write_item(self, RequestItems):
+        items = [r["PutRequest"]["Item"] for reqs in RequestItems.values() for r in reqs]
+        if any(it["call_sid"] in self.gated for it in items):
+            self.gate.wait(10)
+        self.written.extend(items)
+        return {"UnprocessedItems": {}}
+
+
+def _item(call_sid, n):
+    return {"client_id": "t", "sk": f"{call_sid}#{n}", "call_sid": call_sid}
+
+
+def test_wait_for_covers_only_the_calls_own_items():
+    ddb = _GatedResource()
+    writer = CallLogWriter(lambda: ddb, linger=0.01)
+
+    async def _scenario():
+        ddb.gated.add("CA_SLOW")
+        for n in range(3):
+            writer.enqueue("app-logs", _item("CA_FAST", n))
+        # Another call keeps logging while CA_FAST ends; past the 10 ms linger, so its (hanging) batch is separate
+        asyncio.get_running_loop().call_later(0.05, writer.enqueue, "app-logs", _item("CA_SLOW", 0))
+        fast_done = await writer.wait_for("CA_FAST", timeout=5)
+        await asyncio.sleep(0.1)
+        pending = writer.pending()
+        slow_done = await writer.wait_for("CA_SLOW", timeout=0.2)
+        ddb.gate.set()
+        return fast_done, pending, slow_done, await writer.wait_for("CA_SLOW", timeout=5)
+
+    fast_done, pending, slow_timed_out, slow_done = asyncio.run(_scenario())
+    assert fast_done is True
+    assert pending >= 1
+    assert slow_timed_out is False
+    assert slow_done is True
+    assert sorted(it["sk"] for it in ddb.written if it["call_sid"] == "CA_FAST") == [
+        "CA_FAST#0", "CA_FAST#1", "CA_FAST#2"]
+    assert writer.flush(5)
+
+
+def test_wait_for_returns_at_once_when_nothing_is_pending():
+    writer = CallLogWriter(lambda: _GatedResource())
+    assert asyncio.run(writer.wait_for("CA_NONE", timeout=0.01)) is True
+
+
+def test_block_policy_never_blocks_the_event_loop():
+    ddb = _GatedResource()
+    ddb.gated.add("CA_HELD")
+    writer = CallLogWriter(lambda: ddb, max_queue=2, policy="block", block_timeout=0.5, linger=0.01)
+
+    async def _scenario():
+        writer.enqueue("app-logs", _item("CA_HELD", 0))
+        # The writer thread holds that batch; the next two fill the queue
+        await asyncio.sleep(0.1)
+        for n in range(1, 3):
+            writer.enqueue("app-logs", _item("CA_HELD", n))
+        started = time.monotonic()
+        accepted = writer.enqueue("app-logs", _item("CA_LATE", 0))
+        on_loop = time.monotonic() - started
+        # Room appears while the handed-off put is still waiting
+        await asyncio.sleep(0.1)
+        ddb.gate.set()
+        return accepted, on_loop, await writer.wait_for("CA_LATE", timeout=5)
+
+    accepted, on_loop, late_done = asyncio.run(_scenario())
+    assert accepted is True
+    assert on_loop < 0.05
+    assert late_done is True
+    assert any(it["call_sid"] == "CA_LATE" for it in ddb.written)
+    assert writer.stats["dropped"] == 0
+
+
+def test_block_policy_gives_up_after_the_timeout():
+    ddb = _GatedResource()
+    ddb.gated.add("CA_HELD")
+    writer = CallLogWriter(lambda: ddb, max_queue=1, policy="block", block_timeout=0.1, linger=0.01)
+
+    async def _scenario():
+        writer.enqueue("app-logs", _item("CA_HELD", 0))
+        await asyncio.sleep(0.1)
+        writer.enqueue("app-logs", _item("CA_HELD", 1))
+        writer.enqueue("app-logs", _item("CA_LATE", 0))
+        done = await writer.wait_for("CA_LATE", timeout=2)
+        ddb.gate.set()
+        return done
+
+    assert asyncio.run(_scenario()) is True
+    assert writer.stats["dropped"] == 1
+    assert not any(it["call_sid"] == "CA_LATE" for it in ddb.written)
+    assert writer.flush(5)
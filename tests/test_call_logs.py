@@ -0,0 +1,37 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src import aws_clients, config
+from src.dynamo_utils import list_call_logs
+
+DAY = datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(params=["client-ts-index", ""])
+def logs(request, dynamo, monkeypatch):
+    monkeypatch.setattr(config, "CALL_LOGS_TS_INDEX", request.param)
+    client_id = "t-" + uuid.uuid4().hex[:8]
+    table = aws_clients.dynamodb_table(config.CALL_LOGS_TABLE_NAME)
+    # Two numbers with interleaved calls: sk (phone#ts) order differs from ts order
+    sks = []
+    for n in range(6):
+        phone = ["09011112222", "08033334444"][n % 2]
+        ts = (DAY + timedelta(minutes=n)).isoformat(timespec="microseconds")
+        sks.append(f"{phone}#{ts}")
+        table.put_item(Item={"client_id": client_id, "sk": sks[-1], "phone_number": phone, "ts": ts})
+    return client_id, sorted(sks)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_pages_cover_every_item_once(logs, limit):
+    client_id, sks = logs
+    seen, cursor = [], None
+    for _ in range(len(sks) + 2):
+        page = list_call_logs(DAY, DAY + timedelta(days=1), client_id, limit=limit, cursor=cursor)
+        seen += [it["sk"] for it in page["items"]]
+        cursor = page.get("next_cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == sks
@@ -0,0 +1,19 @@
+from src.faq_index import FaqIndex
+
+ENTRIES = [
+    {"question": "予約のキャンセル方法", "answer": "前日までにお電話ください。"},
+    {"question": "営業時間を教えてください", "answer": "11時から22時まで営業しています。"},
+    {"question": "駐車場はありますか", "answer": "店舗裏に3台分の駐車場があります。"},
+]
+
+
+def test_weak_tail_results_are_not_counted_as_hits():
+    index = FaqIndex(ENTRIES, half_life=0)
+    for _ in range(3):
+        results = index.search("駐車場はありますか", k=3)
+    # 営業時間 shares only "ます" with the query
+    assert [r["question"] for r in results] == ["駐車場はありますか", "営業時間を教えてください"]
+    assert results[1]["score"] < results[0]["score"] / 2
+    index.search("キャンセルしたい", k=3)
+    assert [e["question"] for e in index.hot_entries(3)] == [
+        "駐車場はありますか", "予約のキャンセル方法", "営業時間を教えてください"]
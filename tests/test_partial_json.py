@@ -0,0 +1,40 @@
+import json
+
+from src.partial_json import PartialJsonObject
+
+
+def _feed_in_chunks(text, size):
+    scan = PartialJsonObject()
+    done = []
+    for i in range(0, len(text), size):
+        done.extend(scan.feed(text[i:i + size]))
+    return scan, done
+
+
+def test_fields_complete_before_the_closing_brace():
+    scan = PartialJsonObject()
+    assert scan.feed('{"name": "山田') == []
+    assert scan.feed('太郎", "limit": 5') == ["name"]
+    assert scan.fields["name"] == "山田太郎"
+    assert scan.feed("}") == ["limit"]
+    assert scan.fields == {"name": "山田太郎", "limit": 5}
+    assert scan.closed
+
+
+def test_any_chunking_gives_the_same_fields():
+    args = {"name": 'a "quoted" \\ name', "n": -1.5, "ok": True, "none": None,
+            "nested": {"x": [1, 2, {"y": "}"}]}, "after": "z"}
+    text = json.dumps(args, ensure_ascii=False)
+    for size in (1, 2, 3, 7, len(text)):
+        scan, done = _feed_in_chunks(text, size)
+        assert scan.closed and not scan.broken
+        # Nested values are skipped, every top-level scalar is decoded
+        assert scan.fields == {k: v for k, v in args.items() if k != "nested"}
+        assert sorted(done) == sorted(scan.fields)
+
+
+def test_not_an_object_is_broken():
+    scan = PartialJsonObject()
+    scan.feed("[1, 2]")
+    assert scan.broken
+    assert scan.feed('{"a": 1}') == []
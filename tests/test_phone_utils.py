@@ -0,0 +1,23 @@
+import pytest
+
+from src.phone_utils import to_e164
+
+
+@pytest.mark.parametrize("raw, cc, expected", [
+    ("090-1234-5678", "81", "+819012345678"),
+    ("+81 (0)90 1234 5678", "81", "+819012345678"),
+    ("+81 090 1234 5678", "81", "+819012345678"),
+    ("0081 90 1234 5678", "81", "+819012345678"),
+    ("010-1-212-555-0100", "81", "+12125550100"),
+    ("011 81 90 1234 5678", "1", "+819012345678"),
+    # "010" is a Beijing area code, not an international prefix, outside Japan
+    ("010-1234-5678", "86", "+861012345678"),
+    ("0086 10 1234 5678", "86", "+861012345678"),
+])
+def test_to_e164(raw, cc, expected):
+    assert to_e164(raw, cc) == expected
+
+
+@pytest.mark.parametrize("raw", ["anonymous", "110", "1234", "+1234567890123456", "", None])
+def test_to_e164_rejects_non_numbers(raw):
+    assert to_e164(raw, "81") is None
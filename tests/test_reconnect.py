@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import pytest
+
+from src import config
+from src.call_metrics import CallMetrics
+from src.fake_realtime import FakeRealtimeServer
+
+# The fake server aborts the socket right after a tool call (the output can only arrive on
+# the next socket) and again between turns (the output is already acknowledged by then).
+SCRIPT = [
+    {"user": "予約を確認したいです"},
+    {"tool": "list_tasks", "args": {"limit": 5}, "say": "確認しました。", "drop": True},
+    {"user": "明日の予約は？"},
+    {"drop": True},
+    {"user": "山田です"},
+    {"tool": "get_task", "args": {"name": "LOAD-0"}, "say": "お調べしました。"},
+]
+
+
+@pytest.fixture
+def fake(dynamo, monkeypatch):
+    server = FakeRealtimeServer(SCRIPT, speed=8).start_in_thread()
+    monkeypatch.setattr(config, "OPENAI_REALTIME_WS_URL", server.ws_url)
+    monkeypatch.setattr(config, "OPENAI_API_BASE", server.api_base)
+    return server
+
+
+def _run_call(call_id):
+    from src.realtime_ws import websocket_task
+    from src.tenant_cache import tenant_registry
+
+    cm = CallMetrics(call_id, time.monotonic())
+    cm.accepted()
+    tenant = tenant_registry.get(config.CLIENT_ID)
+    asyncio.run(asyncio.wait_for(websocket_task(call_id, "+819012345678", tenant.response_create(),
+                                                twilio_call_sid="CATEST", client_id=config.CLIENT_ID,
+                                                call_metrics=cm), 60))
+    return cm
+
+
+def test_tool_outputs_are_replayed_once(fake):
+    cm = _run_call("rtc_test_replay")
+    assert fake.stats["drops"] == 2
+    assert fake.stats["resumes"] == 2
+    assert len(cm.reconnect_gaps) == 2
+    # One output per tool call: the first arrives only through the replay, and the
+    # acknowledged one is not sent again after the second reconnect
+    assert sorted(fake.outputs.values()) == [1, 1]
+    assert fake.stats["tool_outputs"] == 2
+    assert fake.stats["tool_timeouts"] == 0
+    assert [t["tool"] for t in cm.tool_timings] == ["list_tasks", "get_task"]
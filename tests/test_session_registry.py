@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+
+from src.session_registry import DynamoRegistry, MemoryRegistry, SessionNode, SessionRegistry
+
+
+@pytest.fixture(params=["memory", "dynamodb"])
+def registry(request):
+    if request.param == "dynamodb":
+        request.getfixturevalue("dynamo")
+        return DynamoRegistry("app-sessions")
+    return MemoryRegistry()
+
+
+def _call_id():
+    return "rtc_" + uuid.uuid4().hex
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        SessionRegistry()
+
+
+def test_claim_race_has_one_winner(registry):
+    call_id = _call_id()
+    start = threading.Barrier(16)
+    winners = []
+
+    def _claim(node):
+        start.wait()
+        if registry.claim(call_id, node, {}, 30):
+            winners.append(node)
+
+    threads = [threading.Thread(target=_claim, args=(f"node-{n}",)) for n in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(winners) == 1
+    assert registry.owner(call_id)["node_id"] == winners[0]
+
+
+def test_owner_renews_others_are_refused(registry):
+    call_id = _call_id()
+    assert registry.claim(call_id, "node-a", {"client_id": "ueki"}, 30)
+    assert registry.claim(call_id, "node-a", {"client_id": "ueki"}, 30)
+    assert not registry.claim(call_id, "node-b", {}, 30)
+    assert registry.renew({call_id: {}}, "node-b", 30) == [call_id]
+    assert registry.renew({call_id: {}}, "node-a", 30) == []
+    assert call_id in [c["call_id"] for c in registry.calls()]
+
+
+def test_release_only_by_the_owner(registry):
+    call_id = _call_id()
+    registry.claim(call_id, "node-a", {}, 30)
+    registry.release(call_id, "node-b")
+    assert registry.owner(call_id)["node_id"] == "node-a"
+    registry.release(call_id, "node-a")
+    assert registry.owner(call_id) is None
+    assert registry.claim(call_id, "node-b", {}, 30)
+
+
+def test_lease_expires_without_renewal(registry):
+    call_id = _call_id()
+    assert registry.claim(call_id, "node-dead", {}, 1)
+    assert not registry.claim(call_id, "node-b", {}, 30)
+    # DynamoDB keeps whole-second expiries
+    time.sleep(2.2)
+    assert registry.owner(call_id) is None
+    assert call_id not in [c["call_id"] for c in registry.calls()]
+    assert registry.claim(call_id, "node-b", {}, 30)
+
+
+def test_mailbox_round_trip(registry):
+    registry.post("node-a", {"id": "req-1", "call_id": "rtc_x", "action": "status"})
+    assert [m["id"] for m in registry.fetch("node-a")] == ["req-1"]
+    assert registry.fetch("node-a") == []
+    registry.reply("req-1", {"status": 200, "body": {"ok": True}})
+    assert registry.take_reply("req-1") == {"status": 200, "body": {"ok": True}}
+    assert registry.take_reply("req-1") is None
+
+
+def test_reply_polling_backs_off():
+    class _Counting(MemoryRegistry):
+        polls = 0
+
+        def take_reply(self, request_id):
+            self.polls += 1
+            return super().take_reply(request_id)
+
+    registry = _Counting()
+    node = SessionNode(host=None, registry=registry, node_id="node-a")
+    started = time.monotonic()
+    status, _, outcome = asyncio.run(node._remote("node-b", "rtc_x", "status", {}, timeout=2.0))
+    assert (status, outcome) == (504, "timeout")
+    assert time.monotonic() - started < 2.5
+    # 50, 100, 200, 400 ms, then every 500 ms: 7 reads in 2 s instead of 40
+    assert registry.polls <= 8
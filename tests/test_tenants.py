@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src import config, tenants
+from src.tenants import resolve_client_id
+
+
+def _event(*headers):
+    return SimpleNamespace(data=SimpleNamespace(
+        call_id="rtc_1", sip_headers=[SimpleNamespace(name=n, value=v) for n, v in headers]))
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    monkeypatch.setattr(config, "CLIENT_ID", "default")
+    monkeypatch.setattr(config, "TENANT_NUMBERS", {"0312345678": "shop-a"})
+    monkeypatch.setattr(config, "TENANT_ALLOWLIST", [])
+    monkeypatch.setattr(tenants, "_tenant_numbers", None)
+    yield monkeypatch
+    tenants._tenant_numbers = None
+
+
+def test_dialed_number_picks_the_tenant(routing):
+    assert resolve_client_id(_event(("To", "<sip:+81312345678@sip.example>"))) == "shop-a"
+    assert resolve_client_id(_event(("To", "<sip:+81399999999@sip.example>"))) == "default"
+
+
+def test_path_wins(routing):
+    assert resolve_client_id(_event(("To", "<sip:+81312345678@sip.example>")), "shop-b") == "shop-b"
+    assert resolve_client_id(_event(), "bad id!") == "default"
+
+
+def test_tenant_header_needs_the_allowlist(routing):
+    event = _event(("X-Client-Id", "shop-x"))
+    assert resolve_client_id(event) == "default"
+    routing.setattr(config, "TENANT_ALLOWLIST", ["shop-x"])
+    assert resolve_client_id(event) == "shop-x"
+    assert resolve_client_id(_event(("X-Tenant-Id", "shop-y"))) == "default"
+
+
+def test_dialed_number_beats_the_header(routing):
+    routing.setattr(config, "TENANT_ALLOWLIST", ["shop-a", "shop-x"])
+    event = _event(("X-Client-Id", "shop-x"), ("To", "<sip:+81312345678@sip.example>"))
+    assert resolve_client_id(event) == "shop-a"
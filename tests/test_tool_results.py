@@ -0,0 +1,28 @@
+import json
+
+from src.tool_results import decode_cursor, encode_cursor, shape_result
+
+
+def _page(n, request_chars):
+    return {"items": [{"name": f"R-{i}", "start_datetime": "2025-12-24 19:00", "request": "x" * request_chars}
+                      for i in range(n)],
+            "next_cursor": encode_cursor({"name": f"R-{n - 1}"})}
+
+
+def test_cut_page_resumes_after_the_last_kept_record():
+    out = json.loads(shape_result("list_tasks", _page(10, 100), max_bytes=600))
+    kept = [r["name"] for r in out["items"]]
+    assert out["truncated"] is True
+    assert 0 < len(kept) < 10
+    assert decode_cursor(out["next_cursor"]) == {"name": kept[-1]}
+
+
+def test_oversized_first_record_keeps_a_cursor_for_the_rest():
+    out = json.loads(shape_result("list_tasks", _page(3, 2000), max_bytes=300))
+    assert [r["name"] for r in out["items"]] == ["R-0"]
+    assert out["truncated"] is True
+    assert decode_cursor(out["next_cursor"]) == {"name": "R-0"}
+
+
+def test_small_results_pass_through():
+    assert json.loads(shape_result("list_tasks", _page(2, 10), max_bytes=4096))["items"][1]["name"] == "R-1"